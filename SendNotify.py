@@ -10,32 +10,195 @@
 
 import os
 import sys
+import json
+import time
+import tempfile
+import atexit
+import threading
+from collections import deque
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # ==================== notify.py 集成 ====================
 NOTIFY_PATHS = ['./notify.py', '../notify.py']
 HAS_NOTIFY = False
 notify_send = None
+_notify_loaded = False
 
-for path in NOTIFY_PATHS:
-    if os.path.exists(path):
-        try:
-            sys.path.append(os.path.dirname(os.path.abspath(path)))
-            from notify import send as notify_send
-            HAS_NOTIFY = True
-            break
-        except ImportError:
-            continue
 
-if not HAS_NOTIFY:
-    print("⚠️ 未找到青龙自带通知模块，请确保notify.py文件存在于当前目录或上级目录中")
-    print("   访问青龙面板，打开“配置文件”页面，从44行开始，找到自己想要使用的推送方式，在双引号中填入对应的配置")
+def _load_notify():
+    """首次发送通知时才查找并导入notify.py（其中会导入requests等依赖），不发送通知的运行无需加载"""
+    global HAS_NOTIFY, notify_send, _notify_loaded
+    if _notify_loaded:
+        return HAS_NOTIFY
+    _notify_loaded = True
+
+    for path in NOTIFY_PATHS:
+        if os.path.exists(path):
+            try:
+                sys.path.append(os.path.dirname(os.path.abspath(path)))
+                from notify import send
+                notify_send = send
+                HAS_NOTIFY = True
+                break
+            except ImportError:
+                continue
+
+    return HAS_NOTIFY
 
 # ==================== 输出捕获类 ====================
+CAPTURE_MAX_BYTES = 64 * 1024
+CAPTURE_ERROR_LINES = 10
+CAPTURE_MARKERS = ('✅', '❌', '⚠️', '🎉')
+_CAPTURE_MARKER_BYTES = tuple(marker.encode('utf-8') for marker in CAPTURE_MARKERS)
+
+
+def _capture_max_bytes():
+    # 环境变量SendNotifyMaxBytes为通知内容（也是内存中缓存）的字节上限，0为不限制
+    try:
+        return max(0, int(os.getenv('SendNotifyMaxBytes', CAPTURE_MAX_BYTES)))
+    except ValueError:
+        return CAPTURE_MAX_BYTES
+
+
+class _CaptureBuffer:
+    """
+    有上限的输出缓存：开头1/4的额度常驻内存，之后的输出进入环形缓冲，超出上限时最早的部分写入临时文件
+    写入临时文件时累计各类状态行数并保留前几条错误，生成通知内容时保留开头和结尾，中间部分只输出汇总
+    """
+
+    def __init__(self, max_bytes=None):
+        self._configured = max_bytes
+        self._lock = threading.Lock()
+        self._spill = None
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.max_bytes = _capture_max_bytes() if self._configured is None else self._configured
+            self.head_limit = self.max_bytes // 4
+            self._head = []
+            self._head_size = 0
+            self._tail = deque()
+            self._tail_size = 0
+            self._spilled_lines = 0
+            self._spilled_bytes = 0
+            self._spilled_counts = dict.fromkeys(CAPTURE_MARKERS, 0)
+            self._spilled_errors = []
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
+    @property
+    def truncated(self):
+        return self._spilled_lines > 0
+
+    def append(self, text):
+        if not self.max_bytes:
+            with self._lock:
+                self._tail.append(text)
+            return
+
+        # 环形缓冲中保存编码后的字节，写入临时文件时无需再次编码
+        data = text.encode('utf-8')
+        if len(data) > self.max_bytes // 2:
+            # 单条输出过长时只保留开头，避免一条输出占满全部额度
+            data = (text[:self.max_bytes // 8] + " ……（该条输出过长已截断）").encode('utf-8')
+
+        with self._lock:
+            if not self._tail and self._head_size + len(data) <= self.head_limit:
+                self._head.append(data.decode('utf-8'))
+                self._head_size += len(data)
+                return
+            self._tail.append(data)
+            self._tail_size += len(data)
+            while self._tail_size > self.max_bytes - self._head_size and len(self._tail) > 1:
+                old = self._tail.popleft()
+                self._tail_size -= len(old)
+                self._write_spill(old)
+
+    def _write_spill(self, data):
+        if self._spill is None:
+            self._spill = tempfile.NamedTemporaryFile(prefix='sendnotify_', suffix='.log')
+        self._spill.write(data + b"\n")
+        self._spilled_lines += data.count(b"\n") + 1
+        self._spilled_bytes += len(data)
+
+        stripped = data.lstrip()
+        if not stripped.startswith(_CAPTURE_MARKER_BYTES):
+            return
+        for marker, prefix in zip(CAPTURE_MARKERS, _CAPTURE_MARKER_BYTES):
+            if stripped.startswith(prefix):
+                self._spilled_counts[marker] += 1
+                if marker == '❌' and len(self._spilled_errors) < CAPTURE_ERROR_LINES:
+                    self._spilled_errors.append(stripped.decode('utf-8'))
+                break
+
+    def _snapshot(self):
+        # 只在锁内复制内存中的部分并记下临时文件当前长度，读取临时文件时不持有锁，读取期间仍可继续输出
+        with self._lock:
+            spill = None
+            if self._spill is not None:
+                self._spill.flush()
+                spill = (self._spill.name, self._spill.tell())
+            tail = [item.decode('utf-8') if self.max_bytes else item for item in self._tail]
+            return list(self._head), spill, tail
+
+    @staticmethod
+    def _read_spill(spill):
+        if spill is None:
+            return
+        path, end = spill
+        try:
+            with open(path, 'rb') as file:
+                while file.tell() < end:
+                    line = file.readline()
+                    if not line:
+                        break
+                    yield line.decode('utf-8', 'replace').rstrip("\n")
+        except OSError:
+            return
+
+    def _summary(self):
+        # 调用方需持有self._lock
+        details = "，".join(f"{marker}{count}行" for marker, count in self._spilled_counts.items() if count)
+        lines = [f"…… 中间省略{self._spilled_lines}行（{self._spilled_bytes / 1024:.1f}KB）"
+                 f"{'：' + details if details else ''}，完整输出见任务日志 ……"]
+        if self._spilled_errors:
+            lines.append(f"省略部分中的错误（前{len(self._spilled_errors)}条）:")
+            lines.extend(self._spilled_errors)
+            lines.append("……")
+        return lines
+
+    def render(self):
+        """返回通知内容：未超出上限时为全部输出，否则为开头+中间部分的汇总+结尾"""
+        with self._lock:
+            parts = list(self._head)
+            if self._spilled_lines:
+                parts.extend(self._summary())
+            parts.extend(item.decode('utf-8') if self.max_bytes else item for item in self._tail)
+        return "\n".join(parts)
+
+    def iter_lines(self):
+        """按顺序逐条返回全部输出（包括已写入临时文件的部分），用于保存完整日志"""
+        head, spill, tail = self._snapshot()
+        yield from head
+        yield from self._read_spill(spill)
+        yield from tail
+
+
 class OutputCapture:
+    """
+    捕获标准输出用于发送通知，内存占用有上限（SendNotifyMaxBytes，默认64KB），
+    超出部分写入临时文件，通知中只保留开头、结尾和中间部分的汇总
+    """
     
-    def __init__(self):
-        self.content = []
+    def __init__(self, max_bytes=None):
+        self.buffer = _CaptureBuffer(max_bytes)
         self.original_stdout = sys.stdout
         self.capture_enabled = False
     
@@ -51,13 +214,16 @@ class OutputCapture:
     
     def add_content(self, content):
         if content:
-            self.content.append(str(content))
+            self.buffer.append(str(content))
     
     def get_content(self):
-        return "\n".join(self.content)
+        return self.buffer.render()
+    
+    def iter_content(self):
+        return self.buffer.iter_lines()
     
     def clear(self):
-        self.content.clear()
+        self.buffer.clear()
     
     def __enter__(self):
         self.start_capture()
@@ -83,7 +249,180 @@ class OutputCapture:
         def __getattr__(self, name):
             return getattr(self.original_stdout, name)
 
+# ==================== 结构化事件 ====================
+# 事件类型: (图标, 汇总时的名称)
+EVENT_KINDS = {
+    'signin': ('✅', '签到'),
+    'points': ('📊', '积分'),
+    'purchase': ('✅', '购买'),
+    'reward': ('🎁', '奖励'),
+    'task': ('📝', '任务'),
+    'warning': ('⚠️', '警告'),
+    'failure': ('❌', '失败'),
+    'license': ('📅', '授权'),
+    'notice': ('📢', '系统通知'),
+}
+# 只作为说明出现在通知内容中、不计入账号统计的事件类型（如cloud_auth输出的授权码截止日期和系统通知）
+EVENT_INFO_KINDS = ('license', 'notice')
+REPORT_MAX_EVENTS = 5000
+
+
+class RunReport:
+    """
+    脚本运行结果的结构化事件，由emit()记录，结束时统一生成通知内容、控制台汇总和JSON报告
+    只保留前REPORT_MAX_EVENTS条事件的详情，之后的事件只计入统计
+    """
+
+    def __init__(self, max_events=REPORT_MAX_EVENTS):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.title = ""
+            self.started = time.time()
+            self.events = []
+            self.dropped = 0
+            self.accounts = {}
+
+    def emit(self, account, kind, message="", **fields):
+        event = {'time': time.time(), 'account': None if account is None else str(account),
+                 'kind': kind, 'message': message, **fields}
+        with self._lock:
+            if kind not in EVENT_INFO_KINDS:
+                counts = self.accounts.setdefault(event['account'], {})
+                counts[kind] = counts.get(kind, 0) + 1
+            if len(self.events) < self.max_events:
+                self.events.append(event)
+            else:
+                self.dropped += 1
+        return event
+
+    @staticmethod
+    def format_event(event, with_account=True):
+        icon = EVENT_KINDS.get(event['kind'], ('•',))[0]
+        message = event['message'] or "，".join(f"{key}={value}" for key, value in event.items()
+                                                if key not in ('time', 'account', 'kind', 'message'))
+        if with_account and event['account'] is not None:
+            return f"{icon} {event['account']}: {message}"
+        return f"{icon} {message}"
+
+    @staticmethod
+    def _format_counts(counts):
+        names = [kind for kind in EVENT_KINDS if counts.get(kind)] + [kind for kind in counts if kind not in EVENT_KINDS]
+        return "，".join(f"{EVENT_KINDS.get(kind, (None, kind))[1]}{counts[kind]}次" for kind in names)
+
+    def totals(self):
+        with self._lock:
+            totals = {}
+            for counts in self.accounts.values():
+                for kind, count in counts.items():
+                    totals[kind] = totals.get(kind, 0) + count
+            return totals
+
+    def summary_lines(self):
+        """每个账号一行的统计和合计"""
+        with self._lock:
+            accounts = [(account, dict(counts)) for account, counts in self.accounts.items() if account is not None]
+        lines = [f"📊 {account}: {self._format_counts(counts)}" for account, counts in accounts]
+        totals = self.totals()
+        if totals:
+            lines.append(f"📊 共{len(accounts)}个账号: {self._format_counts(totals)}")
+        return lines
+
+    def render_text(self, max_bytes=None):
+        """按账号分组生成通知内容，与输出捕获一样不超过SendNotifyMaxBytes字节"""
+        with self._lock:
+            events = list(self.events)
+            dropped = self.dropped
+        groups = {}
+        for event in events:
+            groups.setdefault(event['account'], []).append(event)
+
+        buffer = _CaptureBuffer(max_bytes)
+        for account, account_events in sorted(groups.items(), key=lambda item: item[0] is not None):
+            if account is not None:
+                buffer.append(f"【{account}】")
+            for event in account_events:
+                buffer.append(self.format_event(event, with_account=False))
+        if dropped:
+            buffer.append(f"…… 另有{dropped}条结果未保留详情，完整输出见任务日志 ……")
+        if events:
+            for line in self.summary_lines()[-1:]:
+                buffer.append(line)
+        content = buffer.render()
+        buffer.clear()
+        return content
+
+    def to_dict(self):
+        with self._lock:
+            events = [dict(event, time=datetime.fromtimestamp(event['time']).isoformat(timespec='seconds'))
+                      for event in self.events]
+            accounts = {'' if account is None else account: dict(counts) for account, counts in self.accounts.items()}
+            dropped = self.dropped
+        return {
+            'title': self.title,
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'totals': self.totals(),
+            'accounts': accounts,
+            'events': events,
+            'dropped': dropped,
+        }
+
+    def save_json(self, path):
+        # 先写临时文件再替换，读取报告的程序不会读到半截文件
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(self.to_dict(), file, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
 _global_output_capture = OutputCapture()
+_global_report = RunReport()
+_events_mode = False
+_report_saved = False
+
+
+def emit(account, kind, message="", **fields):
+    """
+    记录一条结果事件并输出到控制台，如emit('账号1', 'purchase', '购买成功 - 标题', item_id=123)
+    account为None时表示与具体账号无关的结果；kind见EVENT_KINDS，也可以使用其他名称
+    """
+    global _report_saved
+    event = _global_report.emit(account, kind, message, **fields)
+    _report_saved = False
+    print(RunReport.format_event(event))
+    return event
+
+
+def save_report(path=None):
+    """把结果事件保存为JSON报告，path默认为环境变量SendNotifyReport，未设置时不保存"""
+    global _report_saved
+    path = path or os.getenv('SendNotifyReport')
+    if not path or not _global_report.events:
+        return False
+    try:
+        _global_report.save_json(path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ 保存运行报告失败: {e}")
+        return False
+    _report_saved = True
+    return True
+
+
+@atexit.register
+def _save_report_at_exit():
+    # 未启用通知的脚本不会调用stop_capture_and_notify，退出时补存运行报告
+    if not _report_saved:
+        save_report()
 
 def capture_output(title="脚本运行结果"):
     def decorator(func):
@@ -110,17 +449,30 @@ def capture_output(title="脚本运行结果"):
     return decorator
 
 
-def start_capture():
-    global _global_output_capture
+def start_capture(events=False):
+    """
+    开始收集通知内容：默认捕获标准输出；events=True时不拦截print，通知内容只由emit()记录的结果生成
+    """
+    global _global_output_capture, _events_mode
+    _events_mode = events
     _global_output_capture.clear()
-    _global_output_capture.start_capture()
+    _global_report.clear()
+    if not events:
+        _global_output_capture.start_capture()
 
 
 def stop_capture_and_notify(title="脚本运行结果"):
     global _global_output_capture
     _global_output_capture.stop_capture()
+    _global_report.title = title
     
-    captured_content = _global_output_capture.get_content()
+    if _events_mode:
+        for line in _global_report.summary_lines():
+            print(line)
+        captured_content = _global_report.render_text()
+    else:
+        captured_content = _global_output_capture.get_content()
+    save_report()
     if captured_content:
         SendNotify(title, captured_content)
 
@@ -130,9 +482,190 @@ def add_to_capture(content):
     _global_output_capture.add_content(content)
 
 
+# ==================== 通知发送 ====================
+NOTIFY_TIMEOUT = 30
+NOTIFY_OUTBOX_NAME = '.sendnotify_outbox.json'
+NOTIFY_OUTBOX_MAX_ATTEMPTS = 5
+NOTIFY_SPOOL_NAME = '.sendnotify_spool.json'
+
+
+def _notify_timeout():
+    # 环境变量SendNotifyTimeout设置等待推送完成的最长秒数，0为一直等待
+    try:
+        return max(0.0, float(os.getenv('SendNotifyTimeout', NOTIFY_TIMEOUT)))
+    except ValueError:
+        return NOTIFY_TIMEOUT
+
+
+def _spool_window():
+    """
+    环境变量SendNotifySpool开启汇总模式，返回汇总窗口秒数，未开启时返回None
+    汇总模式下各脚本的通知先写入本地文件，最早一条超过窗口时长后合并发送，0为只由flush命令发送
+    """
+    value = os.getenv('SendNotifySpool', '').strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _state_path(filename):
+    # 与cloud_auth共用状态目录，默认为SendNotify.py所在目录
+    state_dir = os.getenv('CloudAuthStateDir') or os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(state_dir, filename)
+
+
+class _NotificationFile:
+    """
+    保存在本地文件中的通知列表，多个脚本同时结束时通过文件锁保证同一条通知只被一个脚本取出
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _locked(self, update):
+        try:
+            with open(self.path, 'a+', encoding='utf-8') as file:
+                if fcntl:
+                    fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    file.seek(0)
+                    try:
+                        entries = json.loads(file.read() or '[]')
+                    except ValueError:
+                        entries = []
+                    if not isinstance(entries, list):
+                        entries = []
+                    result, entries = update(entries)
+                    file.seek(0)
+                    file.truncate()
+                    if entries:
+                        file.write(json.dumps(entries, ensure_ascii=False))
+                    file.flush()
+                    return result
+                finally:
+                    if fcntl:
+                        fcntl.flock(file, fcntl.LOCK_UN)
+        except OSError as e:
+            print(f"⚠️ 读写待发送通知文件失败: {e}")
+            return None
+
+    def take(self):
+        """取出全部待补发的通知"""
+        if not os.path.exists(self.path):
+            return []
+        return self._locked(lambda entries: (entries, [])) or []
+
+
+
+class NotificationOutbox(_NotificationFile):
+    """发送失败或超时的通知，下次发送通知时一并补发"""
+
+    def __init__(self, path=None):
+        super().__init__(path or _state_path(NOTIFY_OUTBOX_NAME))
+
+    def put(self, entries):
+        """保存未发送成功的通知，超过重试次数的丢弃，返回丢弃的数量"""
+        kept = [entry for entry in entries if entry.get('attempts', 0) < NOTIFY_OUTBOX_MAX_ATTEMPTS]
+        if kept:
+            self._locked(lambda existing: (None, existing + kept))
+        return len(entries) - len(kept)
+
+    def discard(self, entry_id):
+        """移除超时后才发送成功的通知"""
+        if os.path.exists(self.path):
+            self._locked(lambda entries: (None, [entry for entry in entries if entry.get('id') != entry_id]))
+
+
+class NotificationSpool(_NotificationFile):
+    """汇总模式下各脚本待合并发送的通知"""
+
+    def __init__(self, path=None):
+        super().__init__(path or _state_path(NOTIFY_SPOOL_NAME))
+
+    def add(self, entry, window):
+        """
+        写入一条通知，返回(待发送的通知, 是否为本批第一条)
+        最早一条已超过窗口时长时取出全部通知（包括本条）由调用方合并发送，否则待发送的通知为空列表
+        文件读写失败时返回None
+        """
+        def update(entries):
+            first = not entries
+            entries = entries + [entry]
+            if window and time.time() - min(item.get('time', 0) for item in entries) >= window:
+                return (entries, first), []
+            return ([], first), entries
+        return self._locked(update)
+
+    def oldest(self):
+        """最早一条通知的写入时间，没有通知时返回None"""
+        if not os.path.exists(self.path):
+            return None
+
+        # 在锁内读取，避免读到其他脚本正在重写的文件而误以为没有通知
+        def update(entries):
+            times = [item.get('time', 0) for item in entries if isinstance(item, dict)]
+            return (min(times) if times else None), entries
+        return self._locked(update)
+
+    def take_due(self, window):
+        """最早一条已超过窗口时长时取出全部通知，否则返回空列表"""
+        if not os.path.exists(self.path):
+            return []
+
+        def update(entries):
+            if entries and time.time() - min(item.get('time', 0) for item in entries) >= window:
+                return entries, []
+            return [], entries
+        return self._locked(update) or []
+
+
+def build_digest(entries, max_bytes=None):
+    """
+    把多条通知合并为一条，返回(标题, 内容)
+    标题与内容都相同的通知只保留一条并注明次数；内容总大小不超过max_bytes（默认SendNotifyMaxBytes），
+    每条通知平分额度，超出的部分只保留开头和结尾
+    """
+    merged = {}
+    for entry in entries:
+        key = (entry.get('title') or '', entry.get('content') or '')
+        if key in merged:
+            merged[key]['count'] += 1
+        else:
+            merged[key] = {'title': key[0], 'content': key[1], 'time': entry.get('time'), 'count': 1}
+
+    if max_bytes is None:
+        max_bytes = _capture_max_bytes()
+    share = max(max_bytes // max(len(merged), 1), 1024) if max_bytes else 0
+
+    sections = []
+    for item in merged.values():
+        header = f"【{item['title'] or '脚本运行结果'}】"
+        if item['time']:
+            header += f" {datetime.fromtimestamp(item['time']).strftime('%H:%M:%S')}"
+        if item['count'] > 1:
+            header += f"（相同内容{item['count']}次）"
+        buffer = _CaptureBuffer(share)
+        for line in item['content'].split("\n"):
+            buffer.append(line)
+        sections.append(f"{header}\n{buffer.render()}")
+        buffer.clear()
+
+    titles = list(dict.fromkeys(item['title'] for item in merged.values() if item['title']))
+    if len(merged) == 1:
+        title = titles[0] if titles else ""
+    else:
+        title = f"{len(merged)}条通知汇总: {'、'.join(titles)}"
+    return title, "\n\n".join(sections)
+
+
 class NotificationSender:
-    def __init__(self):
-        pass
+    def __init__(self, timeout=None, outbox=None, spool=None):
+        self.timeout = _notify_timeout() if timeout is None else timeout
+        self.outbox = outbox or NotificationOutbox()
+        self.spool = spool or NotificationSpool()
 
     def _truncate_title(self, content: str, max_length: int = 30) -> str:
         if not content:
@@ -158,20 +691,138 @@ class NotificationSender:
         timestamp = self._get_current_time()
         content = f"发送时间: {timestamp}\n\n{content}"
         
-        if HAS_NOTIFY and notify_send:
-            try:
-                notify_send(title, content)
+        if _load_notify() and notify_send:
+            # 本次通知优先发送，之后补发上次运行未发送成功的通知
+            entries = [{'id': os.urandom(8).hex(), 'title': title, 'content': content, 'attempts': 0}]
+            for entry in self.outbox.take():
+                entry.setdefault('id', os.urandom(8).hex())
+                entries.append(entry)
+            sent = self._dispatch(entries)
+            if sent[0]:
                 print("✅ 通知已通过notify.py发送")
-                return True
-            except Exception as e:
-                print(f"❌ 通过notify.py发送通知失败: {e}")
-                return False
+            retried = sum(sent[1:])
+            if retried:
+                print(f"✅ 已补发{retried}条之前未发送成功的通知")
+            return sent[0]
         else:
             print("⚠️ 未找到notify.py模块，无法发送通知")
             print("   请确保notify.py文件存在于当前目录或上级目录中")
             print("   访问青龙面板，打开“配置文件”页面，找到自己想要使用的推送方式填入对应的配置")
             return False
 
+    def spool_notification(self, title: str = "", content: str = "", window: float = 0) -> bool:
+        """汇总模式：写入待合并的通知，窗口到期时合并发送，返回是否已发送"""
+        if not content:
+            print("⚠️ 通知内容为空，跳过推送")
+            return False
+
+        added = self.spool.add({'title': title, 'content': content, 'time': time.time()}, window)
+        if added is None:
+            return self.send_notification(title, content)
+        entries, first = added
+        if not entries:
+            print("📥 通知已写入汇总文件，将与其他脚本的通知合并发送")
+            if first and window:
+                self._schedule_flush(window)
+            return False
+        return self.send_digest(entries)
+
+    def _schedule_flush(self, window):
+        """
+        本批第一条通知写入时启动独立的后台进程，窗口到期时合并发送，
+        即使之后没有其他脚本运行，最后一批通知也不会一直留在汇总文件中
+        """
+        import subprocess
+        try:
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), 'flush-due', str(window)],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            print(f"⏰ 将在{window:g}秒后合并发送汇总通知")
+        except OSError as e:
+            print(f"⚠️ 无法启动汇总发送进程，通知将在下一个脚本结束时发送: {e}")
+
+    def flush_due(self, window) -> bool:
+        """等到最早一条通知超过窗口时长后合并发送；期间已被其他脚本发送时不再重复发送"""
+        oldest = self.spool.oldest()
+        if oldest is None:
+            return True
+        if not _load_notify():
+            # 找不到notify.py时不取出通知，留给之后结束的脚本或flush命令发送
+            return False
+        remaining = oldest + window - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+        entries = self.spool.take_due(window)
+        if not entries:
+            return True
+        return self.send_digest(entries)
+
+    def flush_spool(self) -> bool:
+        """立即合并发送汇总文件中的全部通知"""
+        entries = self.spool.take()
+        if not entries:
+            print("📭 汇总文件中没有待发送的通知")
+            return True
+        return self.send_digest(entries)
+
+    def send_digest(self, entries) -> bool:
+        title, content = build_digest(entries)
+        print(f"📤 合并发送{len(entries)}条通知")
+        return self.send_notification(self._truncate_title(title), content)
+
+    def _save_unsent(self, entries, sent):
+        unsent = [dict(entry, attempts=entry.get('attempts', 0) + 1)
+                  for entry, ok in zip(entries, sent) if not ok]
+        if not unsent:
+            return
+        dropped = self.outbox.put(unsent)
+        if len(unsent) > dropped:
+            print(f"📮 {len(unsent) - dropped}条通知未发送成功，已保存到{self.outbox.path}，下次运行时重试")
+        if dropped:
+            print(f"❌ {dropped}条通知重试{NOTIFY_OUTBOX_MAX_ATTEMPTS}次仍未成功，已放弃")
+
+    def _dispatch(self, entries):
+        """
+        在后台线程中依次推送，最多等待timeout秒，返回每条通知是否发送成功，未发送成功的保存到待发送文件
+        超时后不再等待，未完成的通知先保存到待发送文件；后台线程之后发送成功的再从文件中移除，
+        若进程在此之前退出，下次会重发这条通知（至少送达一次，可能重复）
+        """
+        sent = [False] * len(entries)
+        lock = threading.Lock()
+        timed_out = threading.Event()
+
+        def worker():
+            for index, entry in enumerate(entries):
+                try:
+                    notify_send(entry['title'], entry['content'])
+                except Exception as e:
+                    print(f"❌ 通过notify.py发送通知失败: {e}")
+                    continue
+                with lock:
+                    sent[index] = True
+                    if timed_out.is_set():
+                        self.outbox.discard(entry['id'])
+
+        if not self.timeout:
+            worker()
+            self._save_unsent(entries, sent)
+            return sent
+
+        thread = threading.Thread(target=worker, name='SendNotify', daemon=True)
+        started = time.monotonic()
+        thread.start()
+        thread.join(self.timeout)
+        # 在锁内确定结果并保存未发送的通知，后台线程之后完成的发送一定能在文件中找到对应的通知
+        with lock:
+            if thread.is_alive():
+                timed_out.set()
+                print(f"⏱️ 推送超过{time.monotonic() - started:.0f}秒仍未完成，不再等待")
+            result = list(sent)
+            self._save_unsent(entries, result)
+        return result
+
 
 _notification_sender = None
 
@@ -181,11 +832,30 @@ def SendNotify(title: str = "", content: str = "") -> bool:
     if _notification_sender is None:
         _notification_sender = NotificationSender()
     
+    window = _spool_window()
+    if window is not None:
+        return _notification_sender.spool_notification(title, content, window)
     return _notification_sender.send_notification(title, content)
 
 
+def flush_spool() -> bool:
+    """合并发送汇总模式下积累的通知，可在一批定时任务之后运行：python SendNotify.py flush"""
+    global _notification_sender
+    
+    if _notification_sender is None:
+        _notification_sender = NotificationSender()
+    
+    return _notification_sender.flush_spool()
+
+
 # ==================== 测试代码 ====================
 if __name__ == "__main__":
+    if sys.argv[1:] == ['flush']:
+        sys.exit(0 if flush_spool() else 1)
+    if sys.argv[1:2] == ['flush-due'] and len(sys.argv) == 3:
+        # 汇总模式下由第一条通知启动的后台进程
+        sys.exit(0 if NotificationSender().flush_due(float(sys.argv[2])) else 1)
+    
     print("📱 SendNotify通知模块测试")
     print("=" * 30)
     
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量服务调用吞吐量对比：逐个call_service与call_service_batch
+使用本地替身服务器模拟网络往返延迟，无需访问云端
+用法：python benchmarks/bench_batch.py --calls 200 --latency 0.02
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CloudAuth', '00000000-0000-0000-0000-000000000000')
+os.environ.setdefault('CloudAuthStateDir', tempfile.mkdtemp(prefix='cloud_auth_bench_'))
+
+from cloud_auth_stub import StubCloudServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量服务调用吞吐量对比")
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.02, help="替身服务器每个请求的模拟延迟（秒）")
+    args = parser.parse_args()
+
+    with StubCloudServer(latency=args.latency) as stub:
+        os.environ['CloudAuthURL'] = stub.url
+        import cloud_auth
+        client = cloud_auth.CloudAuth()
+        calls = [('ONE', {'action': 'purchase', 'item_id': i}) for i in range(args.calls)]
+
+        start = time.perf_counter()
+        for service_name, kwargs in calls:
+            client.call_service(service_name, **kwargs)
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = client.call_service_batch(calls)
+        batch_elapsed = time.perf_counter() - start
+
+    ok = sum(1 for result in results if result.get('success'))
+    print(f"调用数: {args.calls}，模拟延迟: {args.latency * 1000:.0f}ms")
+    print(f"逐个调用: {single_elapsed:.3f}s，{args.calls / single_elapsed:.1f} 次/秒")
+    print(f"批量调用: {batch_elapsed:.3f}s，{args.calls / batch_elapsed:.1f} 次/秒（成功{ok}个）")
+    print(f"加速比: {single_elapsed / batch_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
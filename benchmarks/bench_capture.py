@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出捕获内存对比：模拟freePlug多账号长时间运行的输出，比较不限制（SendNotifyMaxBytes=0）与有上限时
+捕获过程中的内存峰值、生成通知内容的耗时和通知内容大小
+用法：python benchmarks/bench_capture.py --lines 200000 --max-bytes 65536
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SendNotify import OutputCapture
+
+
+def simulated_output(lines):
+    # 与freePlug的输出结构相近：每页一行进度，大部分为购买成功，偶尔有失败
+    for index in range(lines):
+        if index % 500 == 0:
+            yield f"\n===== 账号{index // 500 + 1} 开始处理 ====="
+        elif index % 97 == 0:
+            yield f"❌ 购买失败: 点播{index} 余额不足"
+        else:
+            yield f"✅ 成功购买点播 [{index}] 第{index % 60 + 1}页 2021-{index % 12 + 1}月 标题{'x' * (index % 40)}"
+
+
+def capture_all(lines, max_bytes):
+    capture = OutputCapture(max_bytes=max_bytes)
+    started = time.perf_counter()
+    for text in simulated_output(lines):
+        capture.add_content(text.strip())
+    captured = time.perf_counter()
+    content = capture.get_content()
+    rendered = time.perf_counter()
+    capture.clear()
+    return content, captured - started, rendered - captured
+
+
+def measure(lines, max_bytes):
+    # tracemalloc会显著拖慢分配，耗时与内存峰值分两次测量
+    content, capture_s, render_s = capture_all(lines, max_bytes)
+    tracemalloc.start()
+    capture_all(lines, max_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'max_bytes': max_bytes,
+        'peak_kb': peak / 1024,
+        'capture_s': capture_s,
+        'render_ms': render_s * 1000,
+        'content_kb': len(content.encode('utf-8')) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="输出捕获内存对比")
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--max-bytes', type=int, default=64 * 1024)
+    parser.add_argument('--json', help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    results = [measure(args.lines, 0), measure(args.lines, args.max_bytes)]
+    print(f"模拟输出 {args.lines} 行")
+    print(f"{'上限':>10}{'内存峰值':>12}{'捕获耗时':>10}{'生成内容':>10}{'通知大小':>10}")
+    for row in results:
+        limit = f"{row['max_bytes'] // 1024}KB" if row['max_bytes'] else '不限制'
+        print(f"{limit:>10}{row['peak_kb'] / 1024:>12.1f}MB{row['capture_s']:>10.2f}s"
+              f"{row['render_ms']:>10.1f}ms{row['content_kb']:>10.1f}KB")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'lines': args.lines, 'results': results}, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
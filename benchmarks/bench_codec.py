@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+信封编解码微基准：对比旧实现（每次重新派生密钥、多次str/bytes转换）与EnvelopeCodec（标准库json / orjson）
+负载从100B到1MB，每种组合测量一次完整的请求编码+响应解码往返耗时
+标准库json的密文与旧实现逐字节相同，耗时也基本持平；明显的提升只来自orjson
+用法：python benchmarks/bench_codec.py [--json output.json]
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cloud_auth
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
+
+SIZES = [100, 1024, 10 * 1024, 100 * 1024, 1024 * 1024]
+
+
+def legacy_encode(payload, timestamp_ms):
+    # 与旧版CloudAuth._aes_encrypt逻辑一致，作为对照
+    iv = timestamp_ms.to_bytes(8, byteorder='big') + b'\x00' * 8
+    key = cloud_auth._CloudAuthBase._set_connection(None).encode('utf-8')
+    return base64.b64encode(
+        AES.new(key, AES.MODE_CBC, iv).encrypt(pad(json.dumps(payload, ensure_ascii=False).encode('utf-8'), AES.block_size))
+    ).decode('utf-8')
+
+
+def legacy_roundtrip(payload):
+    # 与旧版CloudAuth._aes_encrypt/_aes_decrypt逻辑一致，作为对照
+    timestamp_ms = int(time.time() * 1000)
+    encrypted = legacy_encode(payload, timestamp_ms)
+    random_hex = hex(timestamp_ms)[2:]
+
+    key = cloud_auth._CloudAuthBase._set_connection(None).encode('utf-8')
+    iv = int(random_hex, 16).to_bytes(8, byteorder='big') + b'\x00' * 8
+    decrypted = unpad(AES.new(key, AES.MODE_CBC, iv).decrypt(base64.b64decode(encrypted)), AES.block_size)
+    return json.loads(decrypted.decode('utf-8'))
+
+
+def codec_roundtrip(codec):
+    def roundtrip(payload):
+        encrypted, random_hex = codec.encode(payload)
+        return codec.decode(encrypted, random_hex)
+    return roundtrip
+
+
+def make_payload(size):
+    # 模拟shiyang解密请求：一段加密响应文本加少量字段
+    filler = ('石小羊' + 'x' * 61) * (size // 70 + 1)
+    return {'mod': 'shiyang', 'encrypted': filler[:max(1, size - 60)], 'auth_code': '00000000-0000-0000-0000-000000000000'}
+
+
+def measure(func, payload, min_time=0.3):
+    assert func(payload) == payload
+    iterations = 0
+    started = time.perf_counter()
+    while True:
+        func(payload)
+        iterations += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return elapsed / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="信封编解码微基准")
+    parser.add_argument('--json', help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    key = cloud_auth._CloudAuthBase._set_connection(None)
+    implementations = {
+        'legacy': legacy_roundtrip,
+        'codec-json': codec_roundtrip(cloud_auth.EnvelopeCodec(key, json_backend='json')),
+    }
+    try:
+        import orjson  # noqa: F401
+        implementations['codec-orjson'] = codec_roundtrip(cloud_auth.EnvelopeCodec(key, json_backend='orjson'))
+    except ImportError:
+        print("⚠️ 未安装orjson，跳过orjson对比")
+
+    # 标准库json路径的密文必须与旧实现完全相同
+    timestamp_ms = int(time.time() * 1000)
+    for size in SIZES:
+        payload = make_payload(size)
+        encrypted, _ = cloud_auth.EnvelopeCodec(key, json_backend='json').encode(payload, timestamp_ms)
+        assert encrypted == legacy_encode(payload, timestamp_ms), f"{size}字节负载的密文与旧实现不一致"
+    print("✅ 标准库json路径的密文与旧实现逐字节一致")
+
+    results = []
+    header = f"{'负载':>8}" + ''.join(f"{name:>16}" for name in implementations)
+    print(header)
+    for size in SIZES:
+        payload = make_payload(size)
+        row = {'size': size}
+        for name, func in implementations.items():
+            row[name] = measure(func, payload)
+        results.append(row)
+        print(f"{size:>8}" + ''.join(f"{row[name]:>14.1f}us" for name in implementations))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
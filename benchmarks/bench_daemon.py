@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+守护进程对比：模拟定时任务多次启动短脚本，每次在新进程中获取客户端并调用若干次服务
+分别测量直连（每次新建连接并验证授权码）与经本地认证守护进程转发时的单次运行耗时和单次调用耗时
+用法：python benchmarks/bench_daemon.py --runs 10 --calls 5 --latency 0.02
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+def run_worker(calls):
+    started = time.perf_counter()
+    import cloud_auth
+    client = cloud_auth.get_auth_client()
+    ready = time.perf_counter()
+    for index in range(calls):
+        client.call_service('ONE', action='ping', call=index)
+    finished = time.perf_counter()
+    print(json.dumps({'startup': ready - started, 'per_call': (finished - ready) / calls,
+                      'daemon': isinstance(client, cloud_auth.DaemonAuthClient)}))
+    return 0
+
+
+def run_mode(args, env):
+    rows = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', str(args.calls)],
+                                   env=env, capture_output=True, text=True, timeout=120)
+        wall = time.perf_counter() - started
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr[-2000:])
+        rows.append({'wall': wall, **json.loads(completed.stdout.strip().splitlines()[-1])})
+    return {
+        'wall_ms': statistics.median(row['wall'] for row in rows) * 1000,
+        'startup_ms': statistics.median(row['startup'] for row in rows) * 1000,
+        'per_call_ms': statistics.median(row['per_call'] for row in rows) * 1000,
+        'daemon': all(row['daemon'] for row in rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="直连与本地认证守护进程对比")
+    parser.add_argument('--runs', type=int, default=10, help="模拟脚本启动次数")
+    parser.add_argument('--calls', type=int, default=5, help="每次运行的服务调用次数")
+    parser.add_argument('--latency', type=float, default=0.02, help="替身服务器每个请求的模拟延迟（秒）")
+    parser.add_argument('--json', help="将结果保存为JSON文件")
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        return run_worker(args.worker)
+
+    from cloud_auth_stub import StubCloudServer
+
+    results = {}
+    with StubCloudServer(latency=args.latency) as stub, tempfile.TemporaryDirectory(prefix='cloud_auth_bench_') as state_dir:
+        stub.register_handler('ONE', lambda request: {'success': True, 'data': request.get('call')})
+        # 关闭授权码验证缓存，直连模式每次运行都要验证，与没有缓存文件的首次运行一致
+        env = dict(os.environ, CloudAuth='00000000-0000-0000-0000-000000000000', CloudAuthURL=stub.url,
+                   CloudAuthStateDir=state_dir, CloudAuthCacheTTL='0', CloudAuthDaemon='0')
+        before = dict(stub.stats)
+        results['direct'] = run_mode(args, env)
+        results['direct']['verify'] = stub.stats['verify'] - before['verify']
+
+        daemon_env = dict(env, CloudAuthDaemon='auto')
+        daemon = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, 'cloud_auth.py'), 'daemon'],
+                                  env=daemon_env, stdout=subprocess.DEVNULL)
+        try:
+            socket_path = os.path.join(state_dir, '.cloud_auth.sock')
+            deadline = time.time() + 10
+            while not os.path.exists(socket_path) and time.time() < deadline:
+                time.sleep(0.05)
+            before = dict(stub.stats)
+            results['daemon'] = run_mode(args, daemon_env)
+            results['daemon']['verify'] = stub.stats['verify'] - before['verify']
+        finally:
+            subprocess.run([sys.executable, os.path.join(REPO_DIR, 'cloud_auth.py'), 'daemon', '--stop'],
+                           env=daemon_env, capture_output=True)
+            daemon.wait(10)
+
+    print(f"运行{args.runs}次，每次调用{args.calls}次，替身延迟{args.latency * 1000:.0f}ms")
+    print(f"{'模式':<8}{'单次运行':>10}{'获取客户端':>10}{'单次调用':>10}{'验证次数':>8}")
+    for mode, row in results.items():
+        print(f"{mode:<10}{row['wall_ms']:>12.1f}ms{row['startup_ms']:>12.1f}ms{row['per_call_ms']:>12.2f}ms{row['verify']:>10}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'runs': args.runs, 'calls': args.calls, 'latency': args.latency, 'results': results},
+                      file, ensure_ascii=False, indent=2)
+
+    if not results['daemon']['daemon']:
+        print("❌ 脚本未通过守护进程调用")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
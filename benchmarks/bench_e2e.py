@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端基准测试：freeBuy、freePlug、laobandianqi、shixiaoyang在本地替身环境下随账号数的扩展情况
+云认证服务使用cloud_auth_stub（含ONE模拟接口），老板电器与石小羊使用e2e_fakes中的目标接口替身
+每次运行在独立子进程中执行脚本，统计耗时、每账号云端请求数、每账号目标接口请求数、峰值内存和吞吐量
+用法：
+    python benchmarks/bench_e2e.py --accounts 1,10,100 --json e2e.json
+    python benchmarks/bench_e2e.py --scripts freePlug --accounts 1000 --concurrency 8 --baseline e2e.json
+    python benchmarks/bench_e2e.py --scripts freePlug --accounts 10 --latency 0.02 --page-concurrency 4
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+SCRIPTS = ('freeBuy', 'freePlug', 'laobandianqi', 'shixiaoyang')
+MAX_ACCOUNTS = 10000
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _previous_month():
+    now = datetime.now()
+    return f"{now.year}-{now.month - 1}" if now.month > 1 else f"{now.year - 1}-12"
+
+
+def _setup_one(module_name, accounts, concurrency, workdir, page_concurrency=1):
+    module = __import__(module_name)
+    module.config_path = os.path.join(workdir, 'config.json')
+    config = {
+        'API_URL': 'https://api.one.example', 'APP_VERSION': '1.0.0', 'PLATFORM': 'android',
+        'SendNotify': False, 'max_workers': concurrency, 'page_concurrency': page_concurrency,
+        'end_month': _previous_month(),
+        'accounts': [{'TOKEN': f"token{i:05d}", 'USER_KEY': f"user{i:05d}"} for i in range(accounts)],
+    }
+    with open(module.config_path, 'w', encoding='utf-8') as file:
+        json.dump(config, file)
+    return module.main
+
+
+def _setup_async(module_name, class_name, env_name, concurrency_env, target_url, accounts, concurrency):
+    os.environ[env_name] = '#'.join(f"token{i:05d}" for i in range(accounts))
+    os.environ[concurrency_env] = str(concurrency)
+    module = __import__(module_name)
+    script_class = getattr(module, class_name)
+    original_init = script_class.__init__
+
+    def patched_init(self):
+        original_init(self)
+        self.base_url = target_url
+
+    script_class.__init__ = patched_init
+    return lambda: asyncio.run(module.main())
+
+
+def run_worker(args):
+    """子进程：在替身环境中运行一个脚本，结果写入--result-file"""
+    # 脚本中的任务间隔按比例缩短，默认完全跳过
+    real_sleep = asyncio.sleep
+
+    def scaled_sleep(delay, *sleep_args, **sleep_kwargs):
+        return real_sleep(delay * args.sleep_scale, *sleep_args, **sleep_kwargs)
+
+    asyncio.sleep = scaled_sleep
+
+    workdir = tempfile.mkdtemp(prefix='cloud_auth_e2e_')
+    os.chdir(workdir)
+    if args.worker in ('freeBuy', 'freePlug'):
+        entry = _setup_one(args.worker, args.accounts, args.concurrency, workdir, args.page_concurrency)
+    elif args.worker == 'laobandianqi':
+        entry = _setup_async('laobandianqi', 'LaoBanDianQi', 'laobandianqi', 'laobandianqi_concurrency',
+                             os.environ['E2E_ROKI_URL'], args.accounts, args.concurrency)
+    else:
+        entry = _setup_async('shixiaoyang', 'ShiXiaoYang', 'sxyjy', 'sxyjy_concurrency',
+                             os.environ['E2E_SHIYANG_URL'], args.accounts, args.concurrency)
+
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+    started = time.perf_counter()
+    try:
+        entry()
+    finally:
+        elapsed = time.perf_counter() - started
+        sys.stdout = real_stdout
+
+    with open(args.result_file, 'w', encoding='utf-8') as file:
+        json.dump({'wall': elapsed, 'peak_rss_kb': _peak_rss_kb()}, file)
+    return 0
+
+
+def run_case(script, accounts, args):
+    from cloud_auth_stub import StubCloudServer
+    from e2e_fakes import FakeRokiAPI, FakeShiyangAPI
+
+    with StubCloudServer(latency=args.latency).install_fakes() as cloud, \
+            FakeRokiAPI() as roki, FakeShiyangAPI() as shiyang, \
+            tempfile.TemporaryDirectory(prefix='cloud_auth_e2e_') as state_dir:
+        result_file = os.path.join(state_dir, 'result.json')
+        env = dict(os.environ,
+                   PYTHONPATH=os.pathsep.join([REPO_DIR, BENCH_DIR]),
+                   CloudAuth='00000000-0000-0000-0000-000000000000',
+                   CloudAuthURL=cloud.url,
+                   CloudAuthStateDir=state_dir,
+                   E2E_ROKI_URL=roki.url,
+                   E2E_SHIYANG_URL=shiyang.url)
+        command = [sys.executable, os.path.abspath(__file__), '--worker', script,
+                   '--accounts', str(accounts), '--concurrency', str(args.concurrency),
+                   '--page-concurrency', str(args.page_concurrency),
+                   '--sleep-scale', str(args.sleep_scale), '--result-file', result_file]
+        completed = subprocess.run(command, env=env, cwd=REPO_DIR, capture_output=True, text=True,
+                                   timeout=args.timeout)
+        if completed.returncode != 0 or not os.path.exists(result_file):
+            raise RuntimeError(f"{script}运行失败 (退出码{completed.returncode}):\n{completed.stderr[-2000:]}")
+
+        with open(result_file, 'r', encoding='utf-8') as file:
+            worker = json.load(file)
+
+        stats = cloud.stats
+        cloud_requests = stats['verify'] + stats['service'] + stats['batch']
+        if script in ('freeBuy', 'freePlug'):
+            target_requests = sum(cloud.handlers['ONE'].calls.values())
+        elif script == 'laobandianqi':
+            target_requests = roki.requests
+        else:
+            target_requests = shiyang.requests
+
+    return {
+        'script': script,
+        'accounts': accounts,
+        'concurrency': args.concurrency,
+        'page_concurrency': args.page_concurrency,
+        'wall': worker['wall'],
+        'accounts_per_sec': accounts / worker['wall'] if worker['wall'] else None,
+        'cloud_requests': cloud_requests,
+        'cloud_calls': stats['service'] + stats['batch_calls'],
+        'cloud_requests_per_account': cloud_requests / accounts,
+        'http_requests_per_account': target_requests / accounts,
+        'peak_rss_kb': worker['peak_rss_kb'],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _print_row(row, baseline=None):
+    rss = f"{row['peak_rss_kb'] / 1024:.1f}MB" if row['peak_rss_kb'] else '-'
+    line = (f"{row['script']:<13}{row['accounts']:>7}{row['wall']:>10.2f}s{row['accounts_per_sec']:>10.1f}"
+            f"{row['cloud_requests_per_account']:>10.2f}{row['http_requests_per_account']:>10.2f}{rss:>10}")
+    if baseline:
+        wall_change = (row['wall'] / baseline['wall'] - 1) * 100 if baseline['wall'] else 0
+        line += f"   耗时{wall_change:+.1f}%"
+        if row['peak_rss_kb'] and baseline.get('peak_rss_kb'):
+            line += f" 内存{(row['peak_rss_kb'] / baseline['peak_rss_kb'] - 1) * 100:+.1f}%"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="四个脚本的端到端基准测试")
+    parser.add_argument('--scripts', default=','.join(SCRIPTS), help="逗号分隔的脚本名")
+    parser.add_argument('--accounts', default='1,10,100', help=f"逗号分隔的账号数（1~{MAX_ACCOUNTS}）")
+    parser.add_argument('--concurrency', type=int, default=1, help="同时处理的账号数（max_workers或*_concurrency）")
+    parser.add_argument('--page-concurrency', type=int, default=1, help="freePlug每个账号同时请求的列表页数")
+    parser.add_argument('--latency', type=float, default=0.0, help="云认证替身服务器每个请求的模拟延迟（秒）")
+    parser.add_argument('--sleep-scale', type=float, default=0.0, help="脚本中asyncio.sleep等待的缩放比例，默认跳过等待")
+    parser.add_argument('--timeout', type=float, default=3600, help="单次运行超时（秒）")
+    parser.add_argument('--json', help="将结果保存为JSON文件")
+    parser.add_argument('--baseline', help="与之前保存的JSON结果对比")
+    parser.add_argument('--worker', choices=SCRIPTS, help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.accounts = int(args.accounts)
+        return run_worker(args)
+
+    scripts = [name.strip() for name in args.scripts.split(',') if name.strip()]
+    unknown = [name for name in scripts if name not in SCRIPTS]
+    if unknown:
+        parser.error(f"未知脚本: {', '.join(unknown)}")
+    counts = [int(count) for count in args.accounts.split(',') if count.strip()]
+    if any(not 1 <= count <= MAX_ACCOUNTS for count in counts):
+        parser.error(f"账号数应在1~{MAX_ACCOUNTS}之间")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            for row in json.load(file)['results']:
+                baseline[(row['script'], row['accounts'], row.get('concurrency', 1))] = row
+
+    print(f"{'脚本':<11}{'账号数':>5}{'耗时':>10}{'账号/秒':>7}{'云端/账号':>6}{'HTTP/账号':>8}{'峰值内存':>6}")
+    results = []
+    for script in scripts:
+        for count in counts:
+            row = run_case(script, count, args)
+            results.append(row)
+            _print_row(row, baseline.get((script, count, args.concurrency)))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'commit': _git_commit(), 'python': sys.version.split()[0],
+                       'created_at': datetime.now().isoformat(timespec='seconds'), 'results': results},
+                      file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对冲请求效果测试：主备两个本地替身服务器均注入长尾延迟，对比开启对冲前后的p50/p90/p99和对冲比例
+用法：python benchmarks/bench_hedge.py --calls 300 --latency 0.01 --tail-latency 0.3 --tail-ratio 0.05
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CloudAuth', '00000000-0000-0000-0000-000000000000')
+os.environ.setdefault('CloudAuthStateDir', tempfile.mkdtemp(prefix='cloud_auth_bench_'))
+
+from cloud_auth_stub import StubCloudServer
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_sync(client, calls):
+    latencies = []
+    for i in range(calls):
+        started = time.perf_counter()
+        client.call_service('roki', timestamp=i)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def run_async(client_factory, calls):
+    async def runner():
+        client = client_factory()
+        latencies = []
+        try:
+            for i in range(calls):
+                started = time.perf_counter()
+                await client.call_service('roki', timestamp=i)
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            await client.aclose()
+        return latencies, client.hedge_rate()
+
+    return asyncio.run(runner())
+
+
+def report(name, latencies):
+    p50, p90, p99 = (percentile(latencies, q) for q in (0.5, 0.9, 0.99))
+    print(f"{name:<12} p50={p50:7.1f}ms  p90={p90:7.1f}ms  p99={p99:7.1f}ms")
+    return p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对冲请求效果测试")
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--tail-latency', type=float, default=0.3)
+    parser.add_argument('--tail-ratio', type=float, default=0.05)
+    parser.add_argument('--async', dest='use_async', action='store_true', help="使用AsyncCloudAuth测试")
+    args = parser.parse_args()
+
+    options = dict(latency=args.latency, tail_latency=args.tail_latency, tail_ratio=args.tail_ratio)
+    with StubCloudServer(**options) as primary, StubCloudServer(**options) as backup:
+        os.environ['CloudAuthURL'] = f"{primary.url},{backup.url}"
+        import cloud_auth
+
+        if args.use_async:
+            baseline, _ = run_async(lambda: cloud_auth.AsyncCloudAuth(hedge_mods=()), args.calls)
+            hedged, hedge_rate = run_async(lambda: cloud_auth.AsyncCloudAuth(hedge_mods=('roki',)), args.calls)
+        else:
+            baseline = run_sync(cloud_auth.CloudAuth(hedge_mods=()), args.calls)
+            client = cloud_auth.CloudAuth(hedge_mods=('roki',))
+            hedged = run_sync(client, args.calls)
+            hedge_rate = client.hedge_rate()
+
+    print(f"\n调用数: {args.calls}，长尾: {args.tail_ratio:.0%}的请求延迟{args.tail_latency * 1000:.0f}ms")
+    baseline_p99 = report('未开启对冲', baseline)
+    hedged_p99 = report('开启对冲', hedged)
+    print(f"对冲比例: {hedge_rate:.1%}")
+    print(f"p99改善: {(baseline_p99 - hedged_p99) / baseline_p99:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地服务实现对比：roki签名分别由云端替身服务器与进程内注册的本地实现处理，比较单次调用耗时
+另外验证批量调用中本地处理与云端处理的调用能按原顺序合并，并输出按处理方式区分的调用统计
+用法：python benchmarks/bench_providers.py --calls 200 --latency 0.02
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CloudAuth', '00000000-0000-0000-0000-000000000000')
+os.environ.setdefault('CloudAuthStateDir', tempfile.mkdtemp(prefix='cloud_auth_bench_'))
+
+from cloud_auth_stub import StubCloudServer, fake_roki_handler
+
+
+def local_roki(**kwargs):
+    return fake_roki_handler(kwargs)
+
+
+def measure(client, calls):
+    started = time.perf_counter()
+    for index in range(calls):
+        client.call_service('roki', timestamp=1700000000000 + index)
+    return (time.perf_counter() - started) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地服务实现与云端调用对比")
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.02, help="替身服务器每个请求的模拟延迟（秒）")
+    parser.add_argument('--json', help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    with StubCloudServer(latency=args.latency).install_fakes() as stub:
+        os.environ['CloudAuthURL'] = stub.url
+        import cloud_auth
+        client = cloud_auth.CloudAuth()
+
+        remote_ms = measure(client, args.calls)
+        remote_requests = stub.stats['service']
+
+        cloud_auth.register_provider('roki', local_roki)
+        local_ms = measure(client, args.calls)
+        local_requests = stub.stats['service'] - remote_requests
+
+        # 批量调用中roki在本地处理，ONE仍发往云端
+        stub.register_handler('ONE', lambda request: {'success': True, 'data': request.get('index')})
+        calls = [('roki', {'timestamp': index}) if index % 2 else ('ONE', {'action': 'ping', 'index': index})
+                 for index in range(10)]
+        results = client.call_service_batch(calls)
+        batch_ok = all(result.get('signature') if index % 2 else result.get('data') == index
+                       for index, result in enumerate(results))
+        cloud_auth.unregister_provider('roki')
+        client.close()
+
+    print(f"roki签名 {args.calls}次，替身延迟{args.latency * 1000:.0f}ms")
+    print(f"  云端处理: {remote_ms:>8.3f}ms/次  云端请求{remote_requests}次")
+    print(f"  本地处理: {local_ms:>8.3f}ms/次  云端请求{local_requests}次")
+    print(f"批量调用混合本地与云端结果: {'✅' if batch_ok else '❌'}")
+    for line in cloud_auth.METRICS.summary_lines():
+        print(f"  {line}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'calls': args.calls, 'latency': args.latency, 'remote_ms': remote_ms, 'local_ms': local_ms},
+                      file, ensure_ascii=False, indent=2)
+    return 0 if batch_ok and local_requests == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
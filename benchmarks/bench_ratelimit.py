@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨进程限流验证：多个进程同时调用本地替身服务器，共享同一个CloudAuthStateDir中的令牌桶
+检查所有进程合计的请求速率不超过CloudAuthRateLimit设定值，并输出各进程的等待时间
+用法：python benchmarks/bench_ratelimit.py --processes 4 --calls 25 --rate 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CloudAuth', '00000000-0000-0000-0000-000000000000')
+
+
+def run_worker(calls):
+    import cloud_auth
+    client = cloud_auth.CloudAuth()
+    for index in range(calls):
+        client.call_service('ONE', action='ping', call=index)
+    print(json.dumps(client.rate_limiter.stats.get('ONE', {})))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="跨进程限流验证")
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--calls', type=int, default=25, help="每个进程的调用次数")
+    parser.add_argument('--rate', type=float, default=20, help="ONE每秒允许的请求数")
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        return run_worker(args.worker)
+
+    from cloud_auth_stub import StubCloudServer
+
+    with StubCloudServer() as stub, tempfile.TemporaryDirectory(prefix='cloud_auth_bench_') as state_dir:
+        env = dict(os.environ, CloudAuthURL=stub.url, CloudAuthStateDir=state_dir,
+                   CloudAuthRateLimit=f"ONE={args.rate}")
+        started = time.perf_counter()
+        workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', str(args.calls)],
+                                    env=env, stdout=subprocess.PIPE, text=True)
+                   for _ in range(args.processes)]
+        outputs = [worker.communicate()[0] for worker in workers]
+        elapsed = time.perf_counter() - started
+
+    total = args.processes * args.calls
+    # 初始突发额度为1秒的量，其余请求受速率限制
+    expected = max(0.0, (total - args.rate) / args.rate)
+    print(f"进程数: {args.processes}，总调用: {total}，限速: {args.rate:.0f}次/秒")
+    print(f"实际耗时: {elapsed:.2f}s（理论下限约{expected:.2f}s），服务器处理: {stub.stats['service']}")
+    for index, output in enumerate(outputs):
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"  进程{index + 1}: 等待{stats.get('waited', 0)}次，共{stats.get('wait_seconds', 0):.2f}s")
+
+    if stub.stats['service'] != total or elapsed < expected * 0.9:
+        print("❌ 限流验证未通过")
+        return 1
+    print("✅ 限流验证通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷启动基准：用python -X importtime在独立子进程中导入cloud_auth、SendNotify与各脚本，统计导入耗时
+每个模块重复多次取中位数，并列出耗时最多的依赖；--budget可设置耗时上限，超出时以退出码1结束，用于防止回退
+用法：
+    python benchmarks/bench_startup.py --runs 7 --top 5
+    python benchmarks/bench_startup.py --budget cloud_auth=30 --budget freePlug=60 --json startup.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ('cloud_auth', 'SendNotify', 'freeBuy', 'freePlug', 'laobandianqi', 'shixiaoyang')
+
+
+def parse_importtime(stderr, module):
+    """返回(模块累计耗时ms, {依赖名: 累计耗时ms})，只统计导入该模块期间加载的依赖（不含解释器启动时的site等）"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            _, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        except ValueError:
+            continue
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        entries.append((depth, raw_name.strip(), int(cumulative_us) / 1000))
+
+    # importtime在子模块全部导入后才输出父模块，因此目标模块的依赖是它之前、上一个顶层模块之后的条目
+    for index in range(len(entries) - 1, -1, -1):
+        depth, name, total_ms = entries[index]
+        if depth == 0 and name == module:
+            deps = {}
+            for dep_depth, dep_name, dep_ms in reversed(entries[:index]):
+                if dep_depth == 0:
+                    break
+                deps[dep_name] = max(deps.get(dep_name, 0), dep_ms)
+            return total_ms, deps
+    raise ValueError(f"importtime输出中没有{module}")
+
+
+def measure(module, runs):
+    env = dict(os.environ, CloudAuth='00000000-0000-0000-0000-000000000000')
+    totals = []
+    deps = {}
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                                   cwd=REPO_DIR, env=env, capture_output=True, text=True, timeout=120)
+        if completed.returncode != 0:
+            raise RuntimeError(f"导入{module}失败:\n{completed.stderr[-2000:]}")
+        total_ms, run_deps = parse_importtime(completed.stderr, module)
+        totals.append(total_ms)
+        for name, ms in run_deps.items():
+            deps.setdefault(name, []).append(ms)
+    return statistics.median(totals), {name: statistics.median(values) for name, values in deps.items()}
+
+
+def _top_level(deps, limit):
+    # 只列出顶层包（requests而不是requests.adapters），避免同一依赖重复出现
+    packages = {name: ms for name, ms in deps.items() if '.' not in name and not name.startswith('_')}
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模块冷启动导入耗时")
+    parser.add_argument('--modules', default=','.join(MODULES), help="逗号分隔的模块名")
+    parser.add_argument('--runs', type=int, default=5, help="每个模块的测量次数，取中位数")
+    parser.add_argument('--top', type=int, default=5, help="列出耗时最多的依赖数量")
+    parser.add_argument('--budget', action='append', default=[], metavar='模块=毫秒',
+                        help="导入耗时上限，可重复指定")
+    parser.add_argument('--json', help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    budgets = {}
+    for item in args.budget:
+        name, _, value = item.partition('=')
+        try:
+            budgets[name.strip()] = float(value)
+        except ValueError:
+            parser.error(f"无效的耗时上限: {item}")
+
+    modules = [name.strip() for name in args.modules.split(',') if name.strip()]
+    # 先导入一次生成字节码缓存，避免第一次测量包含编译时间
+    subprocess.run([sys.executable, '-c', f"import {', '.join(modules)}"], cwd=REPO_DIR,
+                   env=dict(os.environ, CloudAuth='00000000-0000-0000-0000-000000000000'), capture_output=True)
+
+    results = []
+    failed = []
+    for module in modules:
+        total_ms, deps = measure(module, args.runs)
+        top = _top_level(deps, args.top)
+        budget = budgets.get(module)
+        row = {'module': module, 'ms': total_ms, 'budget_ms': budget, 'top': [{'name': n, 'ms': ms} for n, ms in top]}
+        results.append(row)
+
+        status = ''
+        if budget is not None:
+            status = '✅' if total_ms <= budget else '❌'
+            if total_ms > budget:
+                failed.append(module)
+        print(f"{module:<14}{total_ms:>9.1f}ms {status}" + (f" (上限{budget:.0f}ms)" if budget is not None else ''))
+        for name, ms in top:
+            print(f"    {name:<24}{ms:>9.1f}ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'python': sys.version.split()[0], 'runs': args.runs, 'results': results},
+                      file, ensure_ascii=False, indent=2)
+
+    if failed:
+        print(f"❌ 导入耗时超出上限: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+传输字节数对比：JSON信封（JSON+AES+base64+JSON）与二进制信封（可选zlib/zstd压缩，密文不做base64）
+模拟shiyang解密：请求携带一段base64密文，响应为解密后的奖励列表JSON
+用法：python benchmarks/bench_wire.py --calls 20 [--json output.json]
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CloudAuth', '00000000-0000-0000-0000-000000000000')
+os.environ.setdefault('CloudAuthStateDir', tempfile.mkdtemp(prefix='cloud_auth_bench_'))
+
+from cloud_auth_stub import StubCloudServer
+
+SIZES = [1024, 10 * 1024, 100 * 1024]
+
+
+def shiyang_handler(request):
+    # 响应大小与请求密文长度成正比，内容为结构重复的奖励记录
+    count = max(1, len(request.get('encrypted', '')) // 120)
+    rewards = [{'id': 100000 + i, 'rewardName': f'石小羊积分奖励{i % 7}', 'rewardValue': (i % 5) * 10,
+                'status': 'PENDING', 'createTime': '2026-10-17 08:00:00'} for i in range(count)]
+    return {'success': True, 'data': {'list': rewards, 'total': count}}
+
+
+def run_mode(stub, client, mode, compression, raw_text, calls):
+    client.envelope_mode = mode
+    client.frame_compression = compression
+    before_in, before_out = stub.stats['bytes_in'], stub.stats['bytes_out']
+    started = time.perf_counter()
+    for _ in range(calls):
+        client.call_service('shiyang', encrypted=raw_text)
+    elapsed = time.perf_counter() - started
+    return {
+        'up': (stub.stats['bytes_in'] - before_in) / calls,
+        'down': (stub.stats['bytes_out'] - before_out) / calls,
+        'ms': elapsed / calls * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON信封与二进制信封传输字节数对比")
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--json', help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    with StubCloudServer() as stub:
+        os.environ['CloudAuthURL'] = stub.url
+        import cloud_auth
+        stub.register_handler('shiyang', shiyang_handler)
+        client = cloud_auth.CloudAuth()
+
+        modes = [('json', 'none'), ('frame', 'none'), ('frame', 'zlib')]
+        if 'zstd' in cloud_auth._load_compressors():
+            modes.append(('frame', 'zstd'))
+        else:
+            print("⚠️ 未安装zstandard，跳过zstd对比")
+
+        results = []
+        for size in SIZES:
+            raw_text = base64.b64encode(os.urandom(size * 3 // 4)).decode('ascii')
+            print(f"\n请求密文 {size} 字节")
+            baseline = None
+            for mode, compression in modes:
+                row = {'size': size, 'mode': mode, 'compression': compression,
+                       **run_mode(stub, client, mode, compression, raw_text, args.calls)}
+                total = row['up'] + row['down']
+                baseline = baseline or total
+                results.append(row)
+                print(f"  {mode:>5}/{compression:<5} 上行 {row['up']:>9.0f}B  下行 {row['down']:>9.0f}B  "
+                      f"节省 {(1 - total / baseline) * 100:>5.1f}%  {row['ms']:>7.2f}ms/次")
+        client.close()
+
+    # 旧服务器不支持二进制信封时应自动回退到JSON信封
+    with StubCloudServer(frames=False) as legacy:
+        os.environ['CloudAuthURL'] = legacy.url
+        client = cloud_auth.CloudAuth()
+        client.envelope_mode = 'frame'
+        result = client.call_service('ONE', action='ping')
+        fallback_ok = result.get('success') and client.envelope_mode == 'json'
+        print(f"\n旧服务器回退JSON信封: {'✅' if fallback_ok else '❌'}")
+        client.close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    return 0 if fallback_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端基准测试用的目标接口替身：老板电器（aio.myroki.com）与石小羊家园（xy-api-jswm.gxshiyang.cn）
+只实现脚本实际调用的接口，响应结构与脚本解析逻辑一致；石小羊的“加密”响应为base64编码的JSON，
+由cloud_auth_stub中的fake_shiyang_handler解码
+ONE的buy_url由云端转发调用，替身见cloud_auth_stub.FakeOneService
+"""
+
+import json
+import base64
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def fake_encrypt(payload):
+    return base64.b64encode(json.dumps(payload, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+
+class _FakeAPIServer:
+    """路由表为{(方法, 路径): 处理函数}，处理函数接收(query, headers, body)，返回(状态码, dict或str)"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def routes(self):
+        return {}
+
+    def _make_handler(self):
+        fake = self
+        routes = self.routes()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self, method):
+                length = int(self.headers.get('Content-Length', 0) or 0)
+                raw = self.rfile.read(length) if length else b''
+                with fake._lock:
+                    fake.requests += 1
+
+                parts = urlsplit(self.path)
+                route = routes.get((method, parts.path))
+                if route is None:
+                    status, body = 404, {'success': False, 'message': 'not found'}
+                else:
+                    body_data = json.loads(raw) if raw else {}
+                    query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+                    status, body = route(query, self.headers, body_data)
+
+                payload = body.encode('utf-8') if isinstance(body, str) else json.dumps(
+                    body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/plain' if isinstance(body, str) else 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                try:
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class FakeRokiAPI(_FakeAPIServer):
+    """老板电器：用户信息与签到，每个token每天只能签到一次"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__(host, port)
+        self.checked_in = {}
+
+    def _authorized(self, headers):
+        return headers.get('x-user-token') and headers.get('signature') and headers.get('secret')
+
+    def profile(self, query, headers, body):
+        if not self._authorized(headers):
+            return 200, {'success': False, 'message': '签名校验失败'}
+        token = headers['x-user-token']
+        days = self.checked_in.get(token, 0)
+        return 200, {'success': True, 'data': {
+            'nickName': f"用户{token[-4:]}", 'todayIsCheckIn': 1 if days else 0,
+            'points': 100 + days * 10, 'expiringPoints': 0}}
+
+    def check_in(self, query, headers, body):
+        if not self._authorized(headers):
+            return 200, {'success': False, 'message': '签名校验失败'}
+        token = headers['x-user-token']
+        with self._lock:
+            if self.checked_in.get(token):
+                return 200, {'success': False, 'message': '今日已签到'}
+            self.checked_in[token] = 1
+        return 200, {'success': True, 'data': {'consecutiveDays': 1}}
+
+    def routes(self):
+        return {
+            ('GET', '/api/v1/mini-app/user/profile'): self.profile,
+            ('POST', '/api/v1/mini-app/user/check-in-record/check-in'): self.check_in,
+        }
+
+
+class FakeShiyangAPI(_FakeAPIServer):
+    """石小羊家园：积分、签到、任务提交与奖励领取，大部分响应为“加密”文本"""
+
+    def __init__(self, host='127.0.0.1', port=0, tasks=2):
+        super().__init__(host, port)
+        self.task_names = [f"task{i}" for i in range(tasks)]
+        self.signed = set()
+        self.completed = {}
+
+    def _token(self, headers):
+        return headers.get('Xyjy-Auth', '')
+
+    def user_count(self, query, headers, body):
+        token = self._token(headers)
+        credit = 50 + 5 * (token in self.signed) + 10 * len(self.completed.get(token, ()))
+        return 200, fake_encrypt({'code': 200, 'data': {'userName': f"用户{token[-4:]}", 'credit': credit}})
+
+    def sign_rules(self, query, headers, body):
+        signed = self._token(headers) in self.signed
+        return 200, fake_encrypt({'code': 200, 'data': [
+            {'id': 1, 'isToday': True, 'isSign': signed, 'reward': 5}]})
+
+    def sign(self, query, headers, body):
+        with self._lock:
+            self.signed.add(self._token(headers))
+        return 200, fake_encrypt({'code': 200, 'data': f"签到成功，积分+{body.get('reward', 0)}"})
+
+    def task_list(self, query, headers, body):
+        done = self.completed.get(self._token(headers), set())
+        return 200, fake_encrypt({'code': 200, 'data': [
+            {'name': name, 'finishNumber': 1 if name in done else 0} for name in self.task_names]})
+
+    def complete(self, query, headers, body):
+        with self._lock:
+            self.completed.setdefault(self._token(headers), set()).add(body.get('taskType'))
+        return 200, {'code': 200, 'msg': '提交成功'}
+
+    def finished(self, query, headers, body):
+        done = self.completed.get(self._token(headers), set())
+        return 200, fake_encrypt({'code': 200, 'data': [
+            {'id': index + 1, 'name': name, 'finishNumber': 1 if name in done else 0}
+            for index, name in enumerate(self.task_names)]})
+
+    def receive(self, query, headers, body):
+        return 200, {'code': 200, 'data': fake_encrypt({'taskId': query.get('taskId'), 'credit': 10})}
+
+    def routes(self):
+        prefix = '/credit-shop/app'
+        return {
+            ('GET', f'{prefix}/creditAppUser/getCreditAppUserCount'): self.user_count,
+            ('POST', f'{prefix}/creditSignRule/signRuleList'): self.sign_rules,
+            ('POST', f'{prefix}/creditSignRule/sign'): self.sign,
+            ('GET', f'{prefix}/creditTask/list'): self.task_list,
+            ('POST', f'{prefix}/creditTask/complete'): self.complete,
+            ('GET', f'{prefix}/carouselChart/getList'): self.finished,
+            ('GET', f'{prefix}/creditTask/receive'): self.receive,
+        }
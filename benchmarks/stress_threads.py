@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CloudAuth线程安全压力测试：多个线程共享同一个客户端并发调用本地替身服务器
+运行中途让主地址替身服务器全部返回HTTP 500，检查主备切换在并发下仍然正确，且每个线程拿到的都是自己请求的结果
+用法：python benchmarks/stress_threads.py --threads 32 --calls 200
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('CloudAuth', '00000000-0000-0000-0000-000000000000')
+os.environ.setdefault('CloudAuthStateDir', tempfile.mkdtemp(prefix='cloud_auth_bench_'))
+
+from cloud_auth_stub import StubCloudServer
+
+
+class _PoolFullCounter(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        if 'Connection pool is full' in record.getMessage():
+            self.count += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CloudAuth线程安全压力测试")
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--calls', type=int, default=200, help="每个线程的调用次数")
+    args = parser.parse_args()
+
+    pool_full = _PoolFullCounter()
+    logging.getLogger('urllib3.connectionpool').addHandler(pool_full)
+
+    with StubCloudServer() as primary, StubCloudServer() as backup:
+        os.environ['CloudAuthURL'] = f"{primary.url},{backup.url}"
+        import cloud_auth
+        client = cloud_auth.CloudAuth(pool_size=args.threads)
+        mismatches = []
+        errors = []
+        fail_primary_at = args.threads * args.calls // 2
+        counter = {'calls': 0}
+        counter_lock = threading.Lock()
+
+        def worker(thread_index):
+            for call_index in range(args.calls):
+                with counter_lock:
+                    counter['calls'] += 1
+                    if counter['calls'] == fail_primary_at:
+                        primary.error_rate = 1.0
+                try:
+                    result = client.call_service('ONE', thread=thread_index, call=call_index)
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                echoed = result.get('data', {})
+                if echoed.get('thread') != thread_index or echoed.get('call') != call_index:
+                    mismatches.append((thread_index, call_index, echoed))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            list(executor.map(worker, range(args.threads)))
+        elapsed = time.perf_counter() - started
+
+    total = args.threads * args.calls
+    print(f"\n线程数: {args.threads}，总调用: {total}，耗时: {elapsed:.2f}s，{total / elapsed:.0f} 次/秒")
+    print(f"主地址处理: {primary.stats['service']}（注入错误{primary.stats['errors']}次），备用地址处理: {backup.stats['service']}")
+    print(f"失败: {len(errors)}，结果错乱: {len(mismatches)}，连接池溢出: {pool_full.count}")
+
+    if errors or mismatches or pool_full.count:
+        print("❌ 压力测试未通过")
+        return 1
+    print("✅ 压力测试通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
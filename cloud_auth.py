@@ -18,24 +18,34 @@
 import os
 import json
 import time
-import uuid
 import base64
 import sys
+import atexit
+import zlib
+import struct
+import hashlib
+import tempfile
+import weakref
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 
-def check_required_packages():
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+def check_required_packages(need_requests=True):
     missing_packages = []
 
-    try:
-        import requests
-    except ImportError:
-        missing_packages.append('requests')
+    if need_requests:
+        try:
+            import requests
+        except ImportError:
+            missing_packages.append('requests')
 
     try:
         from Crypto.Cipher import AES
-        from Crypto.Util.Padding import pad, unpad
-        from Crypto.PublicKey import RSA
-        from Crypto.Cipher import PKCS1_v1_5
     except ImportError:
         missing_packages.append('pycryptodome')
 
@@ -48,25 +58,1209 @@ def check_required_packages():
         print("安装完成后请重新运行脚本。")
         sys.exit(1)
 
-check_required_packages()
+# requests与pycryptodome在首次创建客户端时才导入（导入requests约需80ms），只用异步客户端的脚本不会加载requests
+requests = None
+AES = None
 
-import requests
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad, unpad
+
+def _load_dependencies(need_requests=True):
+    global requests, AES
+    if AES is not None and (requests is not None or not need_requests):
+        return
+    check_required_packages(need_requests)
+    from Crypto.Cipher import AES as cipher_module
+    AES = cipher_module
+    if need_requests:
+        import requests as requests_module
+        requests = requests_module
 
 PRIMARY_BASE_URL = "https://3ixi.top"
 BACKUP_BASE_URL = "https://cloud.3ixi.top"
 
-class CloudAuth:
+# 单次批量请求最多打包的服务调用数，超出部分自动分多次发送
+BATCH_MAX_CALLS = 50
+
+
+class ServiceNotSupported(Exception):
+    """服务器不支持所请求的接口（HTTP 404/405），不进行主备切换"""
+
+
+class FrameNotSupported(ServiceNotSupported):
+    """服务器拒绝二进制信封（HTTP 400/415），改用JSON信封重发"""
+
+
+class RateLimitExceeded(Exception):
+    """限流令牌不足且等待时间超过允许值（非阻塞获取时立即抛出）"""
+
+
+# /api/verify结果缓存有效期（秒），环境变量CloudAuthCacheTTL可覆盖，设为0关闭缓存
+VERIFY_CACHE_TTL = 6 * 3600
+# 缓存中的授权码截止日期在该天数内时强制联网刷新
+VERIFY_CACHE_REFRESH_DAYS = 3
+
+
+def _emit_notice(kind, message):
+    """
+    授权码截止日期、系统通知等需要出现在推送内容中的信息
+    脚本已加载SendNotify时通过emit()记录（同时输出到控制台），结构化事件模式下也会进入通知；否则直接输出
+    """
+    emit = getattr(sys.modules.get('SendNotify'), 'emit', None)
+    if emit is None:
+        print(f"{'📅' if kind == 'license' else '📢'} {message}")
+    else:
+        emit(None, kind, message)
+
+
+def _get_env_number(name, default, cast=float):
+    try:
+        return cast(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _state_path(filename):
+    # 本地状态文件默认与cloud_auth.py放在同一目录，可通过环境变量CloudAuthStateDir指定
+    state_dir = os.getenv('CloudAuthStateDir') or os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(state_dir, filename)
+
+
+def _read_json_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_file(path, data):
+    _write_text_file(path, json.dumps(data, ensure_ascii=False))
+
+
+def _update_json_file(path, update, lock=None):
+    """
+    在文件锁内读取JSON、交给update修改，update返回True时通过临时文件替换写回
+    锁在旁边的.lock文件上，数据文件被替换后锁仍然有效；Windows下无fcntl时仅限本进程内
+    """
+    with (lock or threading.Lock()), open(path + '.lock', 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            data = _read_json_file(path)
+            if not isinstance(data, dict):
+                data = {}
+            if update(data):
+                _write_json_file(path, data)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_text_file(path, text):
+    # 先写临时文件再替换，避免多个脚本同时运行时读到半截文件
+    directory = os.path.dirname(path) or '.'
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+    except OSError:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+class VerifyCache:
+    """
+    /api/verify成功结果的本地文件缓存，以授权码哈希为键，不保存授权码明文
+    缓存未过期且截止日期不临近时直接使用，跳过联网验证
+    查询只读文件，命中/未命中次数计入METRICS（mod为verify），随调用统计一起导出；写入在文件锁内进行，且只在缓存内容变化时写
+    """
+
+    def __init__(self, path=None, ttl=None, refresh_days=None):
+        self.path = path or _state_path('.cloud_auth_cache.json')
+        self.ttl = ttl if ttl is not None else _get_env_number('CloudAuthCacheTTL', VERIFY_CACHE_TTL)
+        self.refresh_days = refresh_days if refresh_days is not None else _get_env_number(
+            'CloudAuthCacheRefreshDays', VERIFY_CACHE_REFRESH_DAYS)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _key(self, auth_code):
+        return hashlib.sha256(auth_code.encode('utf-8')).hexdigest()[:32]
+
+    def _is_fresh(self, entry, now):
+        if now - entry.get('cached_at', 0) > self.ttl:
+            return False
+
+        expire_date = entry.get('response', {}).get('expire_date')
+        if expire_date:
+            try:
+                expire_dt = datetime.fromisoformat(expire_date.replace('Z', '+00:00'))
+                if expire_dt.tzinfo is None:
+                    expire_dt = expire_dt.replace(tzinfo=timezone.utc)
+            except ValueError:
+                return False
+            remaining = expire_dt - datetime.fromtimestamp(now, timezone.utc)
+            if remaining < timedelta(days=self.refresh_days):
+                return False
+        return True
+
+    def get(self, auth_code):
+        if not self.enabled:
+            return None
+
+        entry = (_read_json_file(self.path) or {}).get(self._key(auth_code))
+        if not entry or 'response' not in entry or not self._is_fresh(entry, time.time()):
+            METRICS.record_memo('verify', 'misses')
+            return None
+
+        METRICS.record_memo('verify', 'hits')
+        return entry['response']
+
+    def put(self, auth_code, response):
+        if not self.enabled or not response.get('success'):
+            return
+
+        def update(data):
+            data[self._key(auth_code)] = {'response': response, 'cached_at': time.time()}
+            return True
+
+        _update_json_file(self.path, update, self._lock)
+
+    def invalidate(self, auth_code):
+        def update(data):
+            return data.pop(self._key(auth_code), None) is not None
+
+        _update_json_file(self.path, update, self._lock)
+
+
+def _load_rate_limits(value=None):
+    """
+    解析CloudAuthRateLimit，格式为逗号分隔的mod=每秒请求数[:突发数]，*表示未列出的mod
+    例如：ONE=5,roki=2:4,*=10；突发数默认与每秒请求数相同（至少为1）
+    """
+    value = value if value is not None else os.getenv('CloudAuthRateLimit', '')
+    limits = {}
+    for item in value.split(','):
+        mod, _, spec = item.partition('=')
+        rate, _, burst = spec.partition(':')
+        try:
+            rate = float(rate)
+            burst = float(burst) if burst else max(1.0, rate)
+        except ValueError:
+            continue
+        if mod.strip() and rate > 0:
+            limits[mod.strip()] = (rate, max(1.0, burst))
+    return limits
+
+
+class RateLimiter:
+    """
+    令牌桶限流，每个mod一个桶，桶状态保存在.cloud_auth_ratelimit.json中，
+    同一台机器上同时运行的多个脚本通过文件锁共享同一份额度（Windows下无fcntl时仅限本进程内）
+    令牌不足时预先扣除（允许为负）并返回需要等待的时间，调用方在锁外等待，先到先得
+    """
+
+    def __init__(self, limits=None, path=None, max_wait=None):
+        self.limits = limits if limits is not None else _load_rate_limits()
+        self.path = path or _state_path('.cloud_auth_ratelimit.json')
+        # 获取令牌时最多等待的秒数，None为一直等待，0为非阻塞
+        if max_wait is None and os.getenv('CloudAuthRateLimitWait'):
+            max_wait = _get_env_number('CloudAuthRateLimitWait', None)
+        self.max_wait = max_wait
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.limits)
+
+    def _limit(self, mod):
+        return self.limits.get(mod) or self.limits.get('*')
+
+    def _locked_state(self, update):
+        # 在文件锁内读取桶状态、交给update修改后写回；文件损坏时视为空状态
+        with self._lock, open(self.path, 'a+', encoding='utf-8') as file:
+            if fcntl:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                try:
+                    state = json.loads(file.read() or '{}')
+                except ValueError:
+                    state = {}
+                result = update(state)
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps(state))
+                file.flush()
+                return result
+            finally:
+                if fcntl:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+    def reserve(self, costs, max_wait=None):
+        """
+        为{mod: 令牌数}预留令牌，返回需要等待的秒数；等待时间超过max_wait时不扣除令牌并抛出RateLimitExceeded
+        max_wait为None时使用实例的max_wait
+        """
+        costs = {mod: tokens for mod, tokens in costs.items() if self._limit(mod)}
+        if not costs:
+            return 0.0
+        max_wait = self.max_wait if max_wait is None else max_wait
+
+        def update(state):
+            now = time.time()
+            buckets = {}
+            wait = 0.0
+            for mod, tokens in costs.items():
+                rate, burst = self._limit(mod)
+                bucket = state.get(mod) or {'tokens': burst, 'updated': now}
+                available = min(burst, bucket['tokens'] + (now - bucket['updated']) * rate)
+                buckets[mod] = available - tokens
+                if available < tokens:
+                    wait = max(wait, (tokens - available) / rate)
+
+            if max_wait is not None and wait > max_wait:
+                return None
+            for mod, remaining in buckets.items():
+                state[mod] = {'tokens': remaining, 'updated': now}
+            return wait
+
+        wait = self._locked_state(update)
+        self._record(costs, wait)
+        if wait is None:
+            raise RateLimitExceeded(f"{'、'.join(costs)}请求过于频繁，已超过限流额度")
+        return wait
+
+    def try_acquire(self, mod, tokens=1):
+        """非阻塞获取，有令牌时立即扣除并返回True"""
+        try:
+            return self.reserve({mod: tokens}, max_wait=0) == 0
+        except RateLimitExceeded:
+            return False
+
+    def acquire(self, mod, tokens=1, timeout=None):
+        """阻塞获取，返回实际等待的秒数"""
+        wait = self.reserve({mod: tokens}, max_wait=timeout)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def _record(self, costs, wait):
+        with self._lock:
+            for mod in costs:
+                entry = self.stats.setdefault(mod, {'acquired': 0, 'waited': 0, 'wait_seconds': 0.0, 'rejected': 0})
+                if wait is None:
+                    entry['rejected'] += 1
+                    continue
+                entry['acquired'] += 1
+                if wait > 0:
+                    entry['waited'] += 1
+                    entry['wait_seconds'] += wait
+
+
+# 结果只取决于参数的服务调用可在本地缓存（秒），CloudAuthMemo=1时使用以下默认规则
+# shiyang解密相同密文结果相同；roki签名只在同一时间戳内有效，缓存时间很短；ONE会修改账号状态，永远不缓存
+MEMO_DEFAULT_RULES = {'shiyang': 3600, 'roki': 30}
+MEMO_NEVER = ('ONE',)
+MEMO_MAX_ENTRIES = 2048
+MEMO_MAX_MB = 32
+
+
+def _load_memo_rules(value=None):
+    """解析CloudAuthMemo：1为默认规则，也可填mod=秒数或mod/action=秒数，逗号分隔"""
+    value = (value if value is not None else os.getenv('CloudAuthMemo', '')).strip()
+    if not value or value.lower() in ('0', 'false', 'no'):
+        return {}
+    if value.lower() in ('1', 'true', 'yes'):
+        return dict(MEMO_DEFAULT_RULES)
+
+    rules = {}
+    for item in value.split(','):
+        target, _, ttl = item.partition('=')
+        target = target.strip()
+        if not target:
+            continue
+        if target.split('/')[0] in MEMO_NEVER:
+            print(f"⚠️ {target}会修改账号状态，不能缓存，已忽略")
+            continue
+        try:
+            ttl = float(ttl) if ttl else MEMO_DEFAULT_RULES.get(target, 300)
+        except ValueError:
+            continue
+        if ttl > 0:
+            rules[target] = ttl
+    return rules
+
+
+class MemoCache:
+    """
+    幂等服务调用的结果缓存：以mod和排序后的参数的sha256为键，LRU淘汰，按条数和内存占用限制大小
+    只缓存声明为可缓存的mod（或mod/action）的成功结果，每次返回新的副本
+    CloudAuthMemoStore为1或sqlite文件路径时额外持久化到磁盘，下次运行可直接命中
+    """
+
+    def __init__(self, rules=None, max_entries=None, max_bytes=None, store=None):
+        self.rules = rules if rules is not None else _load_memo_rules()
+        self.max_entries = max_entries or MEMO_MAX_ENTRIES
+        self.max_bytes = max_bytes or int(_get_env_number('CloudAuthMemoMaxMB', MEMO_MAX_MB) * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._db = None
+        store = store if store is not None else os.getenv('CloudAuthMemoStore', '')
+        if self.enabled and store and store != '0':
+            self._open_store(_state_path('.cloud_auth_memo.sqlite') if store == '1' else store)
+
+    @property
+    def enabled(self):
+        return bool(self.rules)
+
+    def ttl(self, mod, kwargs):
+        action = kwargs.get('action')
+        if action is not None and f"{mod}/{action}" in self.rules:
+            return self.rules[f"{mod}/{action}"]
+        return self.rules.get(mod)
+
+    def key(self, mod, kwargs):
+        normalized = json.dumps({'mod': mod, 'kwargs': kwargs}, sort_keys=True, ensure_ascii=False,
+                                separators=(',', ':'), default=str)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _count(self, mod, name):
+        entry = self.stats.setdefault(mod, {'hits': 0, 'misses': 0})
+        entry[name] += 1
+        METRICS.record_memo(mod, name)
+
+    def get(self, mod, kwargs):
+        """命中时返回结果副本，未命中或不可缓存时返回None"""
+        kwargs = kwargs or {}
+        if not self.enabled or not self.ttl(mod, kwargs):
+            return None
+        key = self.key(mod, kwargs)
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] <= now:
+                self._evict(key)
+                entry = None
+            if entry is None and self._db is not None:
+                entry = self._load_from_store(key, now)
+            if entry is None:
+                self._count(mod, 'misses')
+                return None
+            self.entries.move_to_end(key)
+            self._count(mod, 'hits')
+            value = entry[1]
+        return json.loads(value)
+
+    def put(self, mod, kwargs, result):
+        kwargs = kwargs or {}
+        ttl = self.enabled and self.ttl(mod, kwargs)
+        if not ttl or not isinstance(result, dict) or not result.get('success'):
+            return
+        value = json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+        if len(value) > self.max_bytes:
+            return
+        key = self.key(mod, kwargs)
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._insert(key, expires_at, value)
+            if self._db is not None:
+                import sqlite3
+                try:
+                    self._db.execute('INSERT OR REPLACE INTO memo (key, expires_at, value) VALUES (?, ?, ?)',
+                                     (key, expires_at, value))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    # 数据库被锁或磁盘已满时不影响本次已成功的调用，之后只在内存中缓存
+                    self._disable_store(e)
+
+    def _insert(self, key, expires_at, value):
+        if key in self.entries:
+            self._evict(key)
+        self.entries[key] = (expires_at, value)
+        self.size += len(value)
+        while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            self._evict(next(iter(self.entries)))
+
+    def _evict(self, key):
+        _, value = self.entries.pop(key)
+        self.size -= len(value)
+
+    def _open_store(self, path):
+        import sqlite3
+        try:
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)')
+            self._db.execute('DELETE FROM memo WHERE expires_at <= ?', (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ 无法打开结果缓存文件{path}: {e}")
+            self._db = None
+
+    def _disable_store(self, error):
+        print(f"⚠️ 结果缓存文件写入失败，本次运行只在内存中缓存: {error}")
+        try:
+            self._db.close()
+        except Exception:
+            pass
+        self._db = None
+
+    def _load_from_store(self, key, now):
+        import sqlite3
+        try:
+            row = self._db.execute('SELECT expires_at, value FROM memo WHERE key = ? AND expires_at > ?',
+                                   (key, now)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        self._insert(key, row[0], row[1])
+        return row
+
+    def lookup_batch(self, calls):
+        """返回(结果列表, 未命中的下标)，命中的位置已填入缓存结果"""
+        results = [self.get(mod, kwargs) for mod, kwargs in calls]
+        return results, [index for index, result in enumerate(results) if result is None]
+
+    def store_batch(self, calls, pending, fetched, results):
+        for index, result in zip(pending, fetched):
+            results[index] = result
+            self.put(calls[index][0], calls[index][1], result)
+        return results
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                import sqlite3
+                try:
+                    # 持久化文件只保留未过期且最近写入的条目
+                    self._db.execute('DELETE FROM memo WHERE expires_at <= ?', (time.time(),))
+                    self._db.execute('DELETE FROM memo WHERE key NOT IN '
+                                     '(SELECT key FROM memo ORDER BY expires_at DESC LIMIT ?)', (self.max_entries,))
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+                self._db.close()
+                self._db = None
+
+
+# 单次请求超时（秒）；熔断后半开探测使用更短的超时，避免每次都等满30秒
+REQUEST_TIMEOUT = 30
+PROBE_TIMEOUT = 5
+
+# 对冲请求：主地址超过其p90延迟仍未响应时，同一加密请求再发往备用地址，先返回的有效结果胜出
+# 通过环境变量CloudAuthHedge开启，值为1时对下列mod生效，也可填写逗号分隔的mod列表
+HEDGE_MODS = ('roki', 'shiyang')
+HEDGE_QUANTILE = 0.9
+HEDGE_DEFAULT_DELAY = 1.0
+HEDGE_MIN_DELAY = 0.05
+
+ALL_FAILED_MESSAGE = "所有服务器地址均请求失败，请检查网络连接或服务器状态"
+
+
+def _load_hedge_mods():
+    value = (os.getenv('CloudAuthHedge') or '').strip()
+    if not value or value.lower() in ('0', 'false', 'no'):
+        return set()
+    if value.lower() in ('1', 'true', 'yes'):
+        return set(HEDGE_MODS)
+    return {mod.strip() for mod in value.split(',') if mod.strip()}
+
+
+class EndpointHealth:
+    """
+    记录每个服务器地址的健康状况：延迟EWMA、最近请求错误率和熔断器状态
+    熔断器状态：closed正常；open已熔断，冷却期内直接跳过；冷却期过后进入half_open，同一时间只放行一个短超时探测请求
+    状态保存在.cloud_auth_health.json中，下次运行时直接跳过已知变慢或不可用的地址
+    所有读写都在同一把锁内完成，可被多个线程共享
+    """
+
+    EWMA_ALPHA = 0.3
+    WINDOW = 20
+    LATENCY_SAMPLES = 50
+    MIN_SAMPLES = 4
+    ERROR_RATE_THRESHOLD = 0.5
+    CONSECUTIVE_FAILURES = 3
+    SAVE_INTERVAL = 30
+
+    def __init__(self, path=None, cooldown=None):
+        self.path = path or _state_path('.cloud_auth_health.json')
+        self.cooldown = cooldown if cooldown is not None else _get_env_number('CloudAuthCircuitCooldown', 60)
+        self.endpoints = (_read_json_file(self.path) or {}).get('endpoints', {})
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_save = time.time()
+        _health_instances.add(self)
+
+    def _entry(self, url):
+        return self.endpoints.setdefault(url, {
+            'ewma_ms': None,
+            'samples': [],
+            'outcomes': [],
+            'consecutive_failures': 0,
+            'state': 'closed',
+            'opened_at': 0,
+        })
+
+    def state(self, url, now=None):
+        with self._lock:
+            entry = self._entry(url)
+            if entry['state'] == 'open' and (now or time.time()) - entry['opened_at'] >= self.cooldown:
+                entry['state'] = 'half_open'
+            return entry['state']
+
+    def latency_quantile(self, url, q):
+        with self._lock:
+            samples = sorted(self._entry(url).setdefault('samples', []))
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def error_rate(self, url):
+        with self._lock:
+            outcomes = self._entry(url)['outcomes']
+            return (outcomes.count(0) / len(outcomes)) if outcomes else 0.0
+
+    def plan(self, urls):
+        """
+        返回本次请求的尝试顺序[(url, timeout), ...]
+        正常地址按预期耗时（延迟EWMA + 错误率 × 超时时间）排序；半开地址以短超时探测；全部熔断时仍按原顺序尝试，不拒绝服务
+        """
+        with self._lock:
+            now = time.time()
+            closed, half_open = [], []
+            for index, url in enumerate(urls):
+                state = self.state(url, now)
+                entry = self._entry(url)
+                if state == 'closed':
+                    expected_ms = (entry['ewma_ms'] or 0.0) + self.error_rate(url) * REQUEST_TIMEOUT * 1000
+                    closed.append((expected_ms, index, url))
+                elif state == 'half_open' and now - entry.get('probe_started', 0) >= PROBE_TIMEOUT:
+                    # 其他线程的探测请求仍在进行时不重复探测
+                    entry['probe_started'] = now
+                    half_open.append(url)
+
+        plan = [(url, PROBE_TIMEOUT) for url in half_open]
+        plan.extend((url, REQUEST_TIMEOUT) for _, _, url in sorted(closed))
+        if not plan:
+            plan = [(url, REQUEST_TIMEOUT) for url in urls]
+        return plan
+
+    def _push_outcome(self, entry, ok):
+        entry['outcomes'].append(1 if ok else 0)
+        del entry['outcomes'][:-self.WINDOW]
+
+    def record_success(self, url, latency_ms):
+        with self._lock:
+            entry = self._entry(url)
+            if entry['ewma_ms'] is None:
+                entry['ewma_ms'] = latency_ms
+            else:
+                entry['ewma_ms'] = self.EWMA_ALPHA * latency_ms + (1 - self.EWMA_ALPHA) * entry['ewma_ms']
+            entry['consecutive_failures'] = 0
+            samples = entry.setdefault('samples', [])
+            samples.append(round(latency_ms, 1))
+            del samples[:-self.LATENCY_SAMPLES]
+            self._push_outcome(entry, True)
+            self._dirty = True
+
+            if entry['state'] != 'closed':
+                entry['state'] = 'closed'
+                entry['outcomes'] = [1]
+                self.save()
+            else:
+                self._maybe_save()
+
+    def record_failure(self, url):
+        with self._lock:
+            entry = self._entry(url)
+            entry['consecutive_failures'] += 1
+            self._push_outcome(entry, False)
+
+            outcomes = entry['outcomes']
+            too_many_errors = len(outcomes) >= self.MIN_SAMPLES and self.error_rate(url) >= self.ERROR_RATE_THRESHOLD
+            if (entry['state'] == 'half_open' or too_many_errors
+                    or entry['consecutive_failures'] >= self.CONSECUTIVE_FAILURES):
+                if entry['state'] != 'open':
+                    print(f"⚠️ 服务器地址{url}连续请求失败，暂停使用{int(self.cooldown)}秒")
+                entry['state'] = 'open'
+                entry['opened_at'] = time.time()
+            self._dirty = True
+            self.save()
+
+    def _maybe_save(self):
+        if time.time() - self._last_save >= self.SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            _write_json_file(self.path, {'endpoints': self.endpoints})
+            self._dirty = False
+            self._last_save = time.time()
+
+
+# 退出时保存所有仍存活实例中未写入的健康状态，只注册一个退出钩子，已释放的实例不再保存
+_health_instances = weakref.WeakSet()
+
+
+def _save_endpoint_health():
+    for health in list(_health_instances):
+        health.save()
+
+
+atexit.register(_save_endpoint_health)
+
+
+class _Histogram:
+    """累积分桶直方图，与Prometheus histogram语义一致（le为上界，含+Inf桶）"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        # 返回所在桶的上界，作为分位数的粗略估计
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.sum, 'buckets': list(self.buckets), 'counts': list(self.counts)}
+
+
+class CallMetrics:
+    """
+    进程内的云端调用统计，按(mod, action)分组：
+    加密/网络/解密三段耗时与请求/响应字节数的直方图、各服务器地址处理的调用数、主备切换次数和失败次数、
+    对冲请求发出次数及备用地址先返回的次数
+    add_hook注册的回调在每次调用结束后收到单次调用的明细字典
+    设置环境变量CloudAuthMetricsFile后退出时导出，.prom结尾为Prometheus textfile格式，其余为JSON
+    """
+
+    LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+    PHASES = ('rate_wait', 'encrypt', 'network', 'decrypt')
+
     def __init__(self):
-        self.base_urls = [PRIMARY_BASE_URL, BACKUP_BASE_URL]
-        self.current_url_index = 0
-        self.auth_code = None
-        self.session = requests.Session()
-        self._load_auth_code()
+        self._lock = threading.Lock()
+        self._series = {}
+        self._memo = {}
+        self._hooks = []
+
+    def add_hook(self, func):
+        self._hooks.append(func)
+
+    def _new_series(self):
+        series = {phase: _Histogram(self.LATENCY_BUCKETS) for phase in self.PHASES}
+        series['request_bytes'] = _Histogram(self.SIZE_BUCKETS)
+        series['response_bytes'] = _Histogram(self.SIZE_BUCKETS)
+        series.update(calls=0, errors=0, failovers=0, hedged=0, backup_wins=0, endpoints={})
+        return series
+
+    def observe(self, call):
+        """
+        call为单次调用明细：mod、action、endpoint、rate_wait/encrypt/network/decrypt（秒）、字节数、failovers、
+        hedged（是否发出了对冲请求）、backup_won（是否由备用地址先返回）、success
+        """
+        with self._lock:
+            series = self._series.get((call['mod'], call['action']))
+            if series is None:
+                series = self._series[(call['mod'], call['action'])] = self._new_series()
+            series['calls'] += 1
+            series['failovers'] += call['failovers']
+            series['hedged'] += int(call['hedged'])
+            series['backup_wins'] += int(call['backup_won'])
+            series['rate_wait'].observe(call['rate_wait'])
+            series['encrypt'].observe(call['encrypt'])
+            series['request_bytes'].observe(call['request_bytes'])
+            if call['success']:
+                series['network'].observe(call['network'])
+                series['decrypt'].observe(call['decrypt'])
+                series['response_bytes'].observe(call['response_bytes'])
+                series['endpoints'][call['endpoint']] = series['endpoints'].get(call['endpoint'], 0) + 1
+            else:
+                series['errors'] += 1
+
+        for hook in self._hooks:
+            try:
+                hook(call)
+            except Exception as e:
+                print(f"⚠️ 调用统计回调出错: {e}")
+
+    def record_memo(self, mod, name):
+        # name为hits或misses，记录本地结果缓存的命中情况，mod为verify时是授权验证缓存
+        with self._lock:
+            entry = self._memo.setdefault(mod, {'hits': 0, 'misses': 0})
+            entry[name] += 1
+
+    def memo_snapshot(self):
+        with self._lock:
+            return {mod: dict(entry) for mod, entry in self._memo.items()}
+
+    def snapshot(self):
+        with self._lock:
+            return [{
+                'mod': mod,
+                'action': action,
+                'calls': series['calls'],
+                'errors': series['errors'],
+                'failovers': series['failovers'],
+                'hedged': series['hedged'],
+                'backup_wins': series['backup_wins'],
+                'endpoints': dict(series['endpoints']),
+                **{name: series[name].to_dict() for name in self.PHASES + ('request_bytes', 'response_bytes')},
+            } for (mod, action), series in self._series.items()]
+
+    def summary_lines(self):
+        # 按总耗时从高到低排列，便于找出瓶颈所在的mod
+        lines = []
+        with self._lock:
+            items = sorted(self._series.items(),
+                           key=lambda item: -sum(item[1][phase].sum for phase in self.PHASES))
+            for (mod, action), series in items:
+                total = sum(series[phase].sum for phase in self.PHASES)
+                p90 = series['network'].quantile(0.9)
+                # 本地实现与守护进程转发的调用单独列出，其余为直接请求云端
+                served = ''.join(f" {label}{series['endpoints'][endpoint]}次"
+                                 for endpoint, label in (('local', '本地处理'), ('daemon', '经守护进程'))
+                                 if endpoint in series['endpoints'])
+                if series['hedged']:
+                    served += f" 对冲{series['hedged']}次(备用先返回{series['backup_wins']}次)"
+                lines.append(
+                    f"{mod}{'/' + action if action else ''}: {series['calls']}次 总耗时{total:.2f}s "
+                    f"(限流等待{series['rate_wait'].sum:.2f}s 加密{series['encrypt'].sum:.2f}s "
+                    f"网络{series['network'].sum:.2f}s 解密{series['decrypt'].sum:.2f}s) "
+                    f"网络p90≤{p90 * 1000 if p90 is not None else 0:.0f}ms "
+                    f"上行{series['request_bytes'].sum / 1024:.1f}KB 下行{series['response_bytes'].sum / 1024:.1f}KB "
+                    f"切换{series['failovers']}次 失败{series['errors']}次{served}")
+            for mod, entry in self._memo.items():
+                lines.append(f"{mod}本地缓存: 命中{entry['hits']}次 未命中{entry['misses']}次")
+        return lines
+
+    def to_prometheus(self):
+        def labels(mod, action, **extra):
+            pairs = {'mod': mod, 'action': action, **extra}
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in pairs.values())
+            return ','.join(f'{key}="{value}"' for key, value in zip(pairs, escaped))
+
+        def histogram(lines, name, mod, action, hist, **extra):
+            running = 0
+            for bound, count in zip(list(hist.buckets) + ['+Inf'], hist.counts):
+                running += count
+                lines.append(f'{name}_bucket{{{labels(mod, action, **extra, le=bound)}}} {running}')
+            lines.append(f'{name}_sum{{{labels(mod, action, **extra)}}} {hist.sum}')
+            lines.append(f'{name}_count{{{labels(mod, action, **extra)}}} {hist.count}')
+
+        lines = [
+            '# HELP cloud_auth_phase_seconds CloudAuth call latency by phase',
+            '# TYPE cloud_auth_phase_seconds histogram',
+        ]
+        with self._lock:
+            series_items = list(self._series.items())
+            for (mod, action), series in series_items:
+                for phase in self.PHASES:
+                    histogram(lines, 'cloud_auth_phase_seconds', mod, action, series[phase], phase=phase)
+            for name in ('request_bytes', 'response_bytes'):
+                lines.append(f'# HELP cloud_auth_{name} CloudAuth {name.replace("_", " ")} on the wire')
+                lines.append(f'# TYPE cloud_auth_{name} histogram')
+                for (mod, action), series in series_items:
+                    histogram(lines, f'cloud_auth_{name}', mod, action, series[name])
+            lines.append('# TYPE cloud_auth_calls_total counter')
+            for (mod, action), series in series_items:
+                for endpoint, count in series['endpoints'].items():
+                    lines.append(f'cloud_auth_calls_total{{{labels(mod, action, endpoint=endpoint)}}} {count}')
+            for name in ('errors', 'failovers', 'hedged', 'backup_wins'):
+                lines.append(f'# TYPE cloud_auth_{name}_total counter')
+                for (mod, action), series in series_items:
+                    lines.append(f'cloud_auth_{name}_total{{{labels(mod, action)}}} {series[name]}')
+            lines.append('# TYPE cloud_auth_memo_total counter')
+            for mod, entry in self._memo.items():
+                for result in ('hits', 'misses'):
+                    lines.append(f'cloud_auth_memo_total{{mod="{mod}",result="{result}"}} {entry[result]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        if path.endswith('.prom'):
+            _write_text_file(path, self.to_prometheus())
+        else:
+            _write_text_file(path, json.dumps({'generated_at': time.time(), 'series': self.snapshot(),
+                                               'memo': self.memo_snapshot()}, ensure_ascii=False, indent=2))
+
+    def export_at_exit(self):
+        path = os.getenv('CloudAuthMetricsFile')
+        if not path or not (self._series or self._memo):
+            return
+        self.export(path)
+        print("\n📊 云端调用统计:")
+        for line in self.summary_lines():
+            print(f"   {line}")
+        print(f"   已写入 {path}")
+
+
+# 进程内所有客户端共用的调用统计
+METRICS = CallMetrics()
+atexit.register(METRICS.export_at_exit)
+
+
+def _load_base_urls():
+    # 环境变量CloudAuthURL可覆盖服务器地址（多个用逗号分隔），用于本地替身服务器测试
+    custom_urls = os.getenv('CloudAuthURL')
+    if custom_urls:
+        urls = [url.strip() for url in custom_urls.split(',') if url.strip()]
+        if urls:
+            return urls
+    return [PRIMARY_BASE_URL, BACKUP_BASE_URL]
+
+def _load_json_backend(name=None):
+    """
+    返回(dumps, loads)，dumps输出UTF-8字节，loads接受字节
+    环境变量CloudAuthJSON可指定json或orjson，默认已安装orjson时使用orjson
+    标准库json的输出与旧版json.dumps(data, ensure_ascii=False)逐字节相同，orjson输出更紧凑
+    """
+    name = (name or os.getenv('CloudAuthJSON') or 'auto').lower()
+    if name in ('auto', 'orjson'):
+        try:
+            import orjson
+
+            def dumps(obj):
+                try:
+                    return orjson.dumps(obj)
+                except TypeError:
+                    # orjson不支持的类型（如超过64位的整数）退回标准库
+                    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+            return dumps, orjson.loads
+        except ImportError:
+            if name == 'orjson':
+                print("⚠️ 未安装orjson，使用标准库json")
+
+    def dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    def loads(data):
+        # json.loads直接处理bytes时使用surrogatepass解码，中文内容明显更慢
+        return json.loads(data if isinstance(data, str) else str(data, 'utf-8'))
+
+    return dumps, loads
+
+
+# 紧凑二进制信封：\0 3 X 版本号 | 压缩方式(1字节) | 明文长度(4字节) | 密文长度(4字节) | AES密文
+# 首字节为\0，不可能与JSON信封混淆，收到响应时按魔数识别
+FRAME_MAGIC = b'\x003X\x01'
+FRAME_HEADER = struct.Struct('>4sBII')
+FRAME_CONTENT_TYPE = 'application/x-cloud-frame'
+# 请求头，声明客户端可接收二进制信封及支持的压缩方式，服务器不认识时忽略即可
+ENVELOPE_HEADER = 'X-Cloud-Envelope'
+# 明文小于该字节数时不压缩
+FRAME_COMPRESS_MIN = 256
+
+
+# zstandard在首次编解码二进制信封时才导入，只用JSON信封的脚本不会加载
+COMPRESSORS = None
+_COMPRESSORS_BY_ID = None
+_zstd_found = None
+
+
+def _zstd_available():
+    # 只查找zstandard而不导入，用于选择压缩方式和声明可接收的压缩方式
+    global _zstd_found
+    if _zstd_found is None:
+        import importlib.util
+        _zstd_found = importlib.util.find_spec('zstandard') is not None
+    return _zstd_found
+
+
+def _load_compressors():
+    """返回{名称: (编号, 压缩函数, 解压函数)}，zstd需要可选依赖zstandard"""
+    global COMPRESSORS, _COMPRESSORS_BY_ID
+    if COMPRESSORS is not None:
+        return COMPRESSORS
+    compressors = {
+        'none': (0, None, None),
+        'zlib': (1, lambda data: zlib.compress(data, 3), zlib.decompress),
+    }
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        compressors['zstd'] = _zstd_compressor(zstandard)
+
+    _COMPRESSORS_BY_ID = {entry[0]: (name, entry) for name, entry in compressors.items()}
+    COMPRESSORS = compressors
+    return COMPRESSORS
+
+
+def _zstd_compressor(zstandard):
+    # ZstdCompressor/ZstdDecompressor不是线程安全的，每个线程各用一份
+    local = threading.local()
+
+    def zstd_compress(data):
+        if not hasattr(local, 'compressor'):
+            local.compressor = zstandard.ZstdCompressor(level=3)
+        return local.compressor.compress(data)
+
+    def zstd_decompress(data):
+        if not hasattr(local, 'decompressor'):
+            local.decompressor = zstandard.ZstdDecompressor()
+        return local.decompressor.decompress(data)
+
+    return 2, zstd_compress, zstd_decompress
 
-        if self.auth_code:
-            self._verify_auth_code()
+
+def _preferred_compression():
+    name = (os.getenv('CloudAuthCompress') or 'auto').lower()
+    if name in ('none', 'zlib'):
+        return name
+    return 'zstd' if _zstd_available() else 'zlib'
+
+
+def _load_envelope_mode():
+    # auto：声明支持二进制信封，服务器以二进制信封响应后改用二进制请求；json：始终使用JSON信封；frame：直接发送二进制信封
+    mode = (os.getenv('CloudAuthEnvelope') or 'auto').lower()
+    return mode if mode in ('auto', 'json', 'frame') else 'auto'
+
+
+def parse_envelope_header(value):
+    """解析X-Cloud-Envelope请求头，返回对方可接收的压缩方式列表，未声明二进制信封时返回None"""
+    if not value:
+        return None
+    parts = [part.strip() for part in value.split(';')]
+    if parts[0] != 'frame':
+        return None
+    for part in parts[1:]:
+        if part.startswith('compress='):
+            return [name for name in part[len('compress='):].split(',') if name in _load_compressors()]
+    return ['none']
+
+
+class EnvelopeCodec:
+    """
+    AES-CBC信封编解码器：密钥在创建时派生一次，IV由毫秒时间戳（random请求头）生成
+    直接在字节上完成JSON序列化、补位、加密和base64，减少str与bytes之间的来回转换
+    """
+
+    _IV_SUFFIX = b'\x00' * 8
+
+    def __init__(self, key, json_backend=None):
+        _load_dependencies(need_requests=False)
+        self.key = key if isinstance(key, bytes) else key.encode('utf-8')
+        self.dumps, self.loads = _load_json_backend(json_backend)
+
+    def _iv(self, timestamp_ms):
+        return timestamp_ms.to_bytes(8, byteorder='big') + self._IV_SUFFIX
+
+    def encrypt_bytes(self, plaintext, timestamp_ms):
+        # CBC可分段加密：整块部分直接加密，只有最后不足一块的尾部与补位拼接，避免复制整段明文
+        view = memoryview(plaintext)
+        tail = len(view) - len(view) % AES.block_size
+        padding = AES.block_size - len(view) % AES.block_size
+        cipher = AES.new(self.key, AES.MODE_CBC, self._iv(timestamp_ms))
+        return cipher.encrypt(view[:tail]) + cipher.encrypt(bytes(view[tail:]) + bytes((padding,)) * padding)
+
+    def decrypt_bytes(self, ciphertext, random_hex):
+        # 返回去掉补位的memoryview，交给loads时不再额外复制
+        cipher = AES.new(self.key, AES.MODE_CBC, self._iv(int(random_hex, 16)))
+        plaintext = cipher.decrypt(ciphertext)
+        padding = plaintext[-1] if plaintext else 0
+        if not 1 <= padding <= AES.block_size or plaintext[-padding:] != bytes((padding,)) * padding:
+            raise ValueError("Padding is incorrect.")
+        return memoryview(plaintext)[:-padding]
+
+    def encode(self, payload, timestamp_ms=None):
+        # 返回(base64密文, random_hex)，random_hex即请求头random的值
+        if timestamp_ms is None:
+            timestamp_ms = int(time.time() * 1000)
+        plaintext = payload if isinstance(payload, bytes) else self.dumps(payload)
+        encrypted = base64.b64encode(self.encrypt_bytes(plaintext, timestamp_ms)).decode('ascii')
+        return encrypted, format(timestamp_ms, 'x')
+
+    def decode(self, encrypted_data, random_hex):
+        return self.loads(self.decrypt_bytes(base64.b64decode(encrypted_data), random_hex))
+
+    def encode_frame(self, plaintext, timestamp_ms, compression='none'):
+        # 先压缩再加密（密文无法压缩），压缩后没有变小则按不压缩发送
+        compression_id = 0
+        payload = plaintext
+        if compression != 'none' and len(plaintext) >= FRAME_COMPRESS_MIN and compression in _load_compressors():
+            entry_id, compress, _ = COMPRESSORS[compression]
+            compressed = compress(plaintext)
+            if len(compressed) < len(plaintext):
+                compression_id, payload = entry_id, compressed
+        ciphertext = self.encrypt_bytes(payload, timestamp_ms)
+        return FRAME_HEADER.pack(FRAME_MAGIC, compression_id, len(plaintext), len(ciphertext)) + ciphertext
+
+    def decode_frame(self, frame, random_hex):
+        view = memoryview(frame)
+        if len(view) < FRAME_HEADER.size:
+            raise ValueError("二进制信封长度不足")
+        magic, compression_id, plaintext_length, ciphertext_length = FRAME_HEADER.unpack_from(view)
+        if magic != FRAME_MAGIC:
+            raise ValueError("二进制信封魔数不匹配")
+        if len(view) - FRAME_HEADER.size != ciphertext_length:
+            raise ValueError(f"二进制信封长度不匹配: 声明{ciphertext_length}字节，实际{len(view) - FRAME_HEADER.size}字节")
+        _load_compressors()
+        if compression_id not in _COMPRESSORS_BY_ID:
+            raise ValueError(f"不支持的压缩方式: {compression_id}")
+
+        plaintext = self.decrypt_bytes(view[FRAME_HEADER.size:], random_hex)
+        _, (_, _, decompress) = _COMPRESSORS_BY_ID[compression_id]
+        if decompress:
+            plaintext = decompress(plaintext)
+        if len(plaintext) != plaintext_length:
+            raise ValueError("二进制信封解压后长度不匹配")
+        return plaintext
+
+    @staticmethod
+    def is_frame(content):
+        return content[:len(FRAME_MAGIC)] == FRAME_MAGIC
+
+
+# ==================== 本地服务实现 ====================
+# 签名等确定性的计算可以注册本地实现，在进程内处理而不经过云端；没有本地实现的mod照常请求云端
+PROVIDER_ENTRY_POINT_GROUP = 'cloud_auth.providers'
+_providers = {}
+_providers_lock = threading.Lock()
+_providers_loaded = False
+
+
+def register_provider(mod, func):
+    """
+    注册mod的本地实现：func(**kwargs)返回与云端相同结构的结果字典（成功时含'success': True）
+    func抛出ServiceNotSupported表示不处理本次调用（如只实现了部分action），交由云端处理
+    """
+    with _providers_lock:
+        _providers[mod] = func
+
+
+def unregister_provider(mod):
+    with _providers_lock:
+        _providers.pop(mod, None)
+
+
+def _load_providers():
+    """
+    首次调用时加载环境变量CloudAuthProviders中列出的模块（逗号分隔），模块中的PROVIDERS字典为{mod: 函数}，
+    也可在导入时自行调用register_provider；列表中的entry_points表示加载已安装包在cloud_auth.providers分组下声明的入口点
+    扫描入口点需要读取所有已安装包的元数据（约20ms），因此不默认开启
+    """
+    global _providers_loaded
+    with _providers_lock:
+        if _providers_loaded:
+            return
+        _providers_loaded = True
+
+    names = [name.strip() for name in (os.getenv('CloudAuthProviders') or '').split(',') if name.strip()]
+    for name in names:
+        if name == 'entry_points':
+            _load_provider_entry_points()
+            continue
+        try:
+            import importlib
+            module = importlib.import_module(name)
+        except ImportError as e:
+            print(f"⚠️ 无法加载本地服务模块{name}: {e}")
+            continue
+        for mod, func in getattr(module, 'PROVIDERS', {}).items():
+            register_provider(mod, func)
+
+
+def _load_provider_entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return
+    try:
+        found = entry_points(group=PROVIDER_ENTRY_POINT_GROUP)
+    except TypeError:
+        # Python 3.8/3.9的entry_points()不支持group参数
+        found = entry_points().get(PROVIDER_ENTRY_POINT_GROUP, [])
+    for entry_point in found:
+        try:
+            register_provider(entry_point.name, entry_point.load())
+        except Exception as e:
+            print(f"⚠️ 无法加载本地服务入口点{entry_point.name}: {e}")
+
+
+def get_provider(mod):
+    _load_providers()
+    return _providers.get(mod)
+
+
+def _call_record(mod, action, endpoint, elapsed, request_bytes=0, response_bytes=0, success=True):
+    # 不经过AES信封的调用（本地实现、守护进程转发）只记录总耗时，计入network阶段
+    return {'mod': mod, 'action': str(action or ''), 'endpoint': endpoint, 'rate_wait': 0.0, 'encrypt': 0.0,
+            'network': elapsed, 'decrypt': 0.0, 'request_bytes': request_bytes, 'response_bytes': response_bytes,
+            'failovers': 0, 'hedged': False, 'backup_won': False, 'success': bool(success)}
+
+
+def _call_provider(metrics, service_name, kwargs):
+    """mod有本地实现时在进程内处理并返回结果字典；没有本地实现或本地实现放弃处理时返回None"""
+    provider = get_provider(service_name)
+    if provider is None:
+        return None
+
+    started = time.perf_counter()
+    try:
+        result = provider(**kwargs)
+    except ServiceNotSupported:
+        return None
+    except Exception as e:
+        print(f"⚠️ {service_name}本地处理出错，改由云端处理: {e}")
+        return None
+    if not isinstance(result, dict):
+        print(f"⚠️ {service_name}本地处理返回了无效的结果，改由云端处理")
+        return None
+
+    metrics.observe(_call_record(service_name, kwargs.get('action'), 'local', time.perf_counter() - started,
+                                 success=result.get('success')))
+    return result
+
+
+class _CloudAuthBase:
+    """同步/异步客户端共用的授权码加载、AES信封与响应处理逻辑"""
+
+    def __init__(self, hedge_mods=None, auth_code=None):
+        self.base_urls = _load_base_urls()
+        self.batch_supported = True
+        self.hedge_mods = set(hedge_mods) if hedge_mods is not None else _load_hedge_mods()
+        self.hedge_stats = {'requests': 0, 'hedged': 0, 'backup_wins': 0}
+        self._state_lock = threading.Lock()
+        self.auth_code = None
+        self.verify_cache = VerifyCache()
+        self.health = EndpointHealth()
+        self.codec = EnvelopeCodec(self._set_connection())
+        self.metrics = METRICS
+        self.rate_limiter = RateLimiter()
+        self.memo = MemoCache()
+        self.envelope_mode = _load_envelope_mode()
+        self.frame_compression = _preferred_compression()
+        self.verify_response = None
+        self._load_auth_code(auth_code)
 
     def _set_connection(self):
         key_fragments = {
@@ -85,184 +1279,1173 @@ class CloudAuth:
         backup_data = [64, 106, 119, 60, 85, 36, 48, 68, 73, 98, 100, 41, 101, 110, 41, 63]
         return ''.join([chr(x) for x in backup_data])
     
-    def _switch_to_next_url(self):
-        self.current_url_index = (self.current_url_index + 1) % len(self.base_urls)
-        return self.base_urls[self.current_url_index]
-    
-    def _get_current_url(self):
-        return self.base_urls[self.current_url_index].rstrip('/')
+    def _request_plan(self):
+        return self.health.plan(self.base_urls)
+
+    def _hedge_delay(self, base_url):
+        latency_ms = self.health.latency_quantile(base_url, HEDGE_QUANTILE)
+        if latency_ms is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(max(latency_ms / 1000, HEDGE_MIN_DELAY), REQUEST_TIMEOUT)
+
+    def _record_hedge(self, hedged, backup_won, call=None):
+        if call is not None:
+            call.update(hedged=hedged, backup_won=backup_won)
+        with self._state_lock:
+            self.hedge_stats['requests'] += 1
+            if hedged:
+                self.hedge_stats['hedged'] += 1
+            if backup_won:
+                self.hedge_stats['backup_wins'] += 1
+
+    def hedge_rate(self):
+        requests_count = self.hedge_stats['requests']
+        return self.hedge_stats['hedged'] / requests_count if requests_count else 0.0
+
+    def _on_request_succeeded(self, base_url, started):
+        self.health.record_success(base_url, (time.perf_counter() - started) * 1000)
     
-    def _load_auth_code(self):
-        self.auth_code = os.getenv('CloudAuth')
+    def _load_auth_code(self, auth_code=None):
+        self.auth_code = auth_code or os.getenv('CloudAuth')
         if not self.auth_code:
             raise ValueError("未找到环境变量'CloudAuth'，请访问https://3ixi.top获取授权码")
         
         try:
+            import uuid
             uuid.UUID(self.auth_code)
         except ValueError:
             raise ValueError("授权码格式无效，请访问https://3ixi.top重新获取")
     
-    def _get_timestamp(self):
-        timestamp_ms = int(time.time() * 1000)
-        timestamp_bytes = timestamp_ms.to_bytes(8, byteorder='big') + b'\x00' * 8
-        return timestamp_bytes, timestamp_ms
-    
-    def _aes_encrypt(self, data):
-        timestamp_data, timestamp_ms = self._get_timestamp()
-
-        cipher = AES.new(self._set_connection().encode('utf-8'), AES.MODE_CBC, timestamp_data)
-        
-        padded_data = pad(data.encode('utf-8'), AES.block_size)
-        encrypted_data = cipher.encrypt(padded_data)
-        
-        encrypted_b64 = base64.b64encode(encrypted_data).decode('utf-8')
-        random_hex = hex(timestamp_ms)[2:]
-        
-        return encrypted_b64, random_hex
-    
-    def _aes_decrypt(self, encrypted_data, random_hex):
-        timestamp_ms = int(random_hex, 16)
-        timestamp_bytes = timestamp_ms.to_bytes(8, byteorder='big') + b'\x00' * 8
+    def _envelope_accept(self):
+        # 按偏好顺序声明可接收的压缩方式，关闭压缩时只接收未压缩的二进制信封
+        if self.frame_compression == 'none':
+            return "frame;compress=none"
+        compressions = [self.frame_compression] + [
+            name for name in ('zstd', 'zlib') if name != self.frame_compression and (name != 'zstd' or _zstd_available())]
+        return f"frame;compress={','.join(compressions)}"
 
-        cipher = AES.new(self._set_connection().encode('utf-8'), AES.MODE_CBC, timestamp_bytes)
-        
-        encrypted_bytes = base64.b64decode(encrypted_data)
-        decrypted_padded = cipher.decrypt(encrypted_bytes)
-        decrypted_data = unpad(decrypted_padded, AES.block_size)
-        
-        return decrypted_data.decode('utf-8')
-    
-    def _make_request(self, endpoint, data=None, method='POST'):
+    def _build_request(self, data=None):
         if data is None:
             data = {}
-        
+
         data['auth_code'] = self.auth_code
-        json_data = json.dumps(data, ensure_ascii=False)
-        encrypted_data, random_hex = self._aes_encrypt(json_data)
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'random': random_hex
-        }
-        
-        for _ in range(len(self.base_urls)):
-            current_url = self._get_current_url()
-            url = f"{current_url}{endpoint}"
-            
-            try:
-                if method.upper() == 'GET':
-                    response = self.session.get(url, headers=headers, timeout=30)
-                else:
-                    response = self.session.post(url, json={'data': encrypted_data}, headers=headers, timeout=30)
-                
-                response.raise_for_status()
+        timestamp_ms = int(time.time() * 1000)
+        plaintext = self.codec.dumps(data)
+        random_hex = format(timestamp_ms, 'x')
+
+        headers = {'random': random_hex}
+        if self.envelope_mode != 'json':
+            headers[ENVELOPE_HEADER] = self._envelope_accept()
+        if self.envelope_mode == 'frame':
+            headers['Content-Type'] = FRAME_CONTENT_TYPE
+            body = self.codec.encode_frame(plaintext, timestamp_ms, self.frame_compression)
+        else:
+            headers['Content-Type'] = 'application/json'
+            encrypted_data, _ = self.codec.encode(plaintext, timestamp_ms)
+            body = self.codec.dumps({'data': encrypted_data})
+        return body, random_hex, headers
+
+    def _parse_response(self, content, random_hex):
+        if self.codec.is_frame(content):
+            if self.envelope_mode == 'auto':
+                # 服务器以二进制信封响应，说明支持，后续请求也改用二进制信封
+                self.envelope_mode = 'frame'
+            return self.codec.loads(self.codec.decode_frame(content, random_hex))
+
+        response_data = self.codec.loads(content)
+        if 'data' in response_data:
+            return self.codec.decode(response_data['data'], random_hex)
+        return response_data
+
+    def _on_frame_rejected(self):
+        print("⚠️ 服务器不支持二进制信封，改用JSON信封")
+        self.envelope_mode = 'json'
+
+    def _describe_failure(self, error):
+        if isinstance(error, ServiceNotSupported):
+            return str(error)
+        if isinstance(error, self._transport_error):
+            return f"请求失败: {error}"
+        if isinstance(error, json.JSONDecodeError):
+            return f"响应解析失败: {error}"
+        return f"解密失败: {error}"
+
+    def _new_call(self, endpoint, data):
+        data = data or {}
+        return {'mod': data.get('mod') or endpoint.rsplit('/', 1)[-1], 'action': str(data.get('action', '')),
+                'endpoint': None, 'rate_wait': 0.0, 'encrypt': 0.0, 'network': 0.0, 'decrypt': 0.0,
+                'request_bytes': 0, 'response_bytes': 0, 'failovers': 0, 'hedged': False, 'backup_won': False,
+                'success': False}
+
+    def _rate_limit_costs(self, endpoint, data):
+        # 批量请求按其中每个调用的mod分别计数
+        data = data or {}
+        if 'calls' in data:
+            costs = {}
+            for item in data['calls']:
+                costs[item.get('mod')] = costs.get(item.get('mod'), 0) + 1
+            return costs
+        return {data.get('mod') or endpoint.rsplit('/', 1)[-1]: 1}
+
+    def _reserve_rate_limit(self, call, endpoint, data):
+        if not self.rate_limiter.enabled:
+            return 0.0
+        call['rate_wait'] = self.rate_limiter.reserve(self._rate_limit_costs(endpoint, data))
+        return call['rate_wait']
+
+    def _timed_build_request(self, call, data):
+        started = time.perf_counter()
+        body, random_hex, headers = self._build_request(data)
+        call['encrypt'] = time.perf_counter() - started
+        call['request_bytes'] = len(body)
+        return body, random_hex, headers
+
+    def _record_attempt(self, call, base_url, started, received, content):
+        # 对冲请求中只记录最先成功的尝试，setdefault保证多线程下不被落选请求覆盖
+        if call is not None:
+            call.setdefault('attempt', (base_url, received - started, time.perf_counter() - received, len(content)))
+
+    def _finish_call(self, call):
+        attempt = call.pop('attempt', None)
+        if attempt:
+            endpoint, network, decrypt, response_bytes = attempt
+            call.update(endpoint=endpoint, network=network, decrypt=decrypt,
+                        response_bytes=response_bytes, success=True)
+        self.metrics.observe(dict(call))
+
+    def _on_request_failed(self, base_url, error, call=None):
+        if call is not None:
+            call['failovers'] += 1
+        print(self._describe_failure(error))
+        print(f"尝试切换到备用地址")
+
+    def _raise_all_failed(self, plan, unsupported):
+        # 只有所有地址都表示不支持时才视为服务器不支持该接口，主地址不支持时仍尝试备用地址
+        if unsupported and len(unsupported) == len(plan):
+            raise unsupported[-1]
+        raise Exception(ALL_FAILED_MESSAGE)
+
+    def _handle_verify_response(self, response):
+        if response.get('success'):
+            expire_date = response.get('expire_date')
+            if expire_date:
+                china_tz = timezone(timedelta(hours=8))
+                expire_dt = datetime.fromisoformat(expire_date.replace('Z', '+00:00'))
+                china_time = expire_dt.astimezone(china_tz)
+
+                _emit_notice('license', f"授权码截止日期: {china_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            else:
+                print("✅ 授权码验证成功，但未获取到截止日期")
+
+            notifications = response.get('notifications', [])
+            if notifications:
+                print("\n" + "="*30)
+                for i, notification in enumerate(notifications, 1):
+                    title = notification.get('title', '无标题')
+                    content = notification.get('content', '无内容')
+                    _emit_notice('notice', f"系统通知{i}. {title}\n   {content}")
+                print("="*30)
+
+        else:
+            error_msg = response.get('error', '未知错误')
+
+            if '禁用' in error_msg:
+                disable_reason = response.get('disable_reason', '未知原因')
+                disabled_at = response.get('disabled_at', '')
+
+                print(f"❌ 授权码已被禁用")
+                print(f"📝 禁用原因: {disable_reason}")
                 
-                response_data = response.json()
-                if 'data' in response_data:
-                    decrypted_response = self._aes_decrypt(response_data['data'], random_hex)
-                    return json.loads(decrypted_response)
-                else:
-                    return response_data
-                    
-            except requests.RequestException as e:
-                print(f"请求失败: {e}")
-                self._switch_to_next_url()
-                print(f"尝试切换到备用地址")
-            except json.JSONDecodeError as e:
-                print(f"响应解析失败: {e}")
-                self._switch_to_next_url()
-                print(f"尝试切换到备用地址")
-            except Exception as e:
-                print(f"解密失败: {e}")
-                self._switch_to_next_url()
-                print(f"尝试切换到备用地址")
-        
-        raise Exception("所有服务器地址均请求失败，请检查网络连接或服务器状态")
-    
-    def _verify_auth_code(self):
+                if disabled_at:
+                    try:
+                        china_tz = timezone(timedelta(hours=8))
+                        disabled_dt = datetime.fromisoformat(disabled_at.replace('Z', '+00:00'))
+                        china_time = disabled_dt.astimezone(china_tz)
+                        print(f"⏰ 禁用时间: {china_time.strftime('%Y-%m-%d %H:%M:%S')}")
+                    except:
+                        print(f"⏰ 禁用时间: {disabled_at}")
+            else:
+                print(f"❌ 授权码验证失败: {error_msg}")
+
+            raise Exception(f"授权码验证失败: {error_msg}")
+
+    def _call_local(self, service_name, kwargs):
+        result = _call_provider(self.metrics, service_name, kwargs)
+        if result is None:
+            return None
         try:
-            response = self._make_request('/api/verify')
+            return self._handle_service_response(service_name, result)
+        except Exception as e:
+            print(f"❌ {service_name}服务调用失败: {e}")
+            raise
+
+    def _call_batch_local(self, calls):
+        """返回(结果列表, 需要发往云端的下标列表)，本地处理的调用已填入结果"""
+        results = [None] * len(calls)
+        remote = []
+        for index, (service_name, kwargs) in enumerate(calls):
+            result = _call_provider(self.metrics, service_name, kwargs or {})
+            if result is None:
+                remote.append(index)
+            else:
+                results[index] = result
+        return results, remote
+
+    def _handle_service_response(self, service_name, response):
+        if response.get('success'):
+            return response
+        error_msg = response.get('error', '未知错误')
+        raise Exception(f"{service_name}服务调用失败: {error_msg}")
+
+    def _build_batch_data(self, calls):
+        return {'calls': [{'mod': service_name, **(kwargs or {})} for service_name, kwargs in calls]}
+
+    def _split_batch_results(self, calls, response):
+        # 批量请求整体失败（而非其中某项失败）时抛出异常，由调用方改为逐个调用
+        if not response.get('success'):
+            raise Exception(f"批量接口返回失败: {response.get('error', '未知错误')}")
+
+        results = response.get('results', [])
+        if len(results) != len(calls):
+            raise Exception(f"批量结果数量不匹配: 期望{len(calls)}个，实际{len(results)}个")
+
+        return [result if isinstance(result, dict) else {'success': False, 'error': '无效的结果'}
+                for result in results]
+
+    def _disable_batch(self, error):
+        # 批量接口整体失败时本次运行不再使用，改为逐个调用，保证每个调用都真正发到云端
+        self.batch_supported = False
+        if not isinstance(error, ServiceNotSupported):
+            print(f"⚠️ 批量服务调用失败，本次运行改为逐个调用: {error}")
+
+    def _check_status(self, status_code, headers=None):
+        if status_code in (400, 415) and headers and headers.get('Content-Type') == FRAME_CONTENT_TYPE:
+            raise FrameNotSupported(f"服务器不支持二进制信封 (HTTP {status_code})")
+        if status_code in (404, 405):
+            raise ServiceNotSupported(f"服务器不支持该接口 (HTTP {status_code})")
+
+
+class CloudAuth(_CloudAuthBase):
+    """
+    同步认证客户端，可在ThreadPoolExecutor等线程池中共享同一个实例：
+    - 地址健康状态、主备切换和统计数据的更新均加锁
+    - 授权码验证只执行一次，并发首次调用时其余线程等待验证完成
+    - pool_size指定连接池大小，应不小于并发线程数，否则多出的连接用完即被丢弃，失去复用效果
+    """
+
+    def __init__(self, hedge_mods=None, verify=True, pool_size=None, auth_code=None):
+        _load_dependencies()
+        super().__init__(hedge_mods, auth_code)
+        self._transport_error = requests.RequestException
+        self.session = requests.Session()
+        self.verified = False
+        self._verify_lock = threading.Lock()
+        if pool_size:
+            self.set_pool_size(pool_size)
+
+        if verify:
+            self.ensure_verified()
+
+    def set_pool_size(self, pool_size):
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(self.base_urls), pool_maxsize=max(1, pool_size))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def ensure_verified(self):
+        # 每个客户端只验证一次；verify=False创建的客户端在首次调用服务时才验证
+        if self.verified:
+            return
+        with self._verify_lock:
+            if not self.verified:
+                self._verify_auth_code()
+                self.verified = True
+
+    def close(self):
+        self.session.close()
+        self.memo.close()
+
+    def __enter__(self):
+        return self
 
-            if response.get('success'):
-                expire_date = response.get('expire_date')
-                if expire_date:
-                    china_tz = timezone(timedelta(hours=8))
-                    expire_dt = datetime.fromisoformat(expire_date.replace('Z', '+00:00'))
-                    china_time = expire_dt.astimezone(china_tz)
-
-                    print(f"📅 授权码截止日期: {china_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                else:
-                    print("✅ 授权码验证成功，但未获取到截止日期")
-
-                notifications = response.get('notifications', [])
-                if notifications:
-                    print("\n" + "="*30)
-                    print("📢 系统通知:")
-                    for i, notification in enumerate(notifications, 1):
-                        title = notification.get('title', '无标题')
-                        content = notification.get('content', '无内容')
-                        print(f"\n{i}. {title}")
-                        print(f"   {content}")
-                    print("="*30)
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
+    def _send_once(self, base_url, timeout, endpoint, body, random_hex, headers, method='POST', call=None,
+                   track_health=True):
+        url = f"{base_url.rstrip('/')}{endpoint}"
+        started = time.perf_counter()
+
+        try:
+            if method.upper() == 'GET':
+                response = self.session.get(url, headers=headers, timeout=timeout)
             else:
-                error_msg = response.get('error', '未知错误')
-
-                if '禁用' in error_msg:
-                    disable_reason = response.get('disable_reason', '未知原因')
-                    disabled_at = response.get('disabled_at', '')
-
-                    print(f"❌ 授权码已被禁用")
-                    print(f"📝 禁用原因: {disable_reason}")
-                    
-                    if disabled_at:
-                        try:
-                            china_tz = timezone(timedelta(hours=8))
-                            disabled_dt = datetime.fromisoformat(disabled_at.replace('Z', '+00:00'))
-                            china_time = disabled_dt.astimezone(china_tz)
-                            print(f"⏰ 禁用时间: {china_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                        except:
-                            print(f"⏰ 禁用时间: {disabled_at}")
-                else:
-                    print(f"❌ 授权码验证失败: {error_msg}")
-
-                raise Exception(f"授权码验证失败: {error_msg}")
+                response = self.session.post(url, data=body, headers=headers, timeout=timeout)
+
+            self._check_status(response.status_code, headers)
+            response.raise_for_status()
+
+            received = time.perf_counter()
+            result = self._parse_response(response.content, random_hex)
+        except ServiceNotSupported:
+            raise
+        except Exception:
+            if track_health:
+                self.health.record_failure(base_url)
+            raise
+
+        self._record_attempt(call, base_url, started, received, response.content)
+        self._on_request_succeeded(base_url, started)
+        return result
+
+    def _make_request(self, endpoint, data=None, method='POST', hedge=False, track_health=True):
+        """track_health=False时请求失败不计入地址健康状态（如批量接口失败后会改为逐个调用，不代表地址不可用）"""
+        try:
+            return self._make_request_once(endpoint, data, method, hedge, track_health)
+        except FrameNotSupported:
+            self._on_frame_rejected()
+            return self._make_request_once(endpoint, data, method, hedge, track_health)
+
+    def _make_request_once(self, endpoint, data, method, hedge, track_health=True):
+        call = self._new_call(endpoint, data)
+        try:
+            wait = self._reserve_rate_limit(call, endpoint, data)
+            if wait:
+                time.sleep(wait)
+            body, random_hex, headers = self._timed_build_request(call, data)
+            plan = self._request_plan()
+
+            if hedge and len(plan) > 1:
+                return self._make_hedged_request(plan, endpoint, body, random_hex, headers, call)
+
+            unsupported = []
+            for base_url, timeout in plan:
+                try:
+                    return self._send_once(base_url, timeout, endpoint, body, random_hex, headers, method, call,
+                                           track_health)
+                except Exception as e:
+                    if isinstance(e, ServiceNotSupported):
+                        unsupported.append(e)
+                    self._on_request_failed(base_url, e, call)
+
+            self._raise_all_failed(plan, unsupported)
+        finally:
+            self._finish_call(call)
+
+    def _make_hedged_request(self, plan, endpoint, body, random_hex, headers, call=None):
+        # 每个尝试在守护线程中发送，落选的请求结果直接丢弃，不会拖慢脚本退出
+        import queue
+        results = queue.Queue()
+        delay = self._hedge_delay(plan[0][0])
+        launched = in_flight = 0
+        hedged = False
+        unsupported = []
 
+        def attempt(base_url, timeout):
+            try:
+                results.put((base_url, self._send_once(
+                    base_url, timeout, endpoint, body, random_hex, headers, call=call), None))
+            except Exception as e:
+                results.put((base_url, None, e))
+
+        def launch():
+            nonlocal launched, in_flight
+            base_url, timeout = plan[launched]
+            threading.Thread(target=attempt, args=(base_url, timeout), daemon=True).start()
+            launched += 1
+            in_flight += 1
+
+        launch()
+        while in_flight:
+            wait_timeout = delay if not hedged and launched < len(plan) else None
+            try:
+                base_url, result, error = results.get(timeout=wait_timeout)
+            except queue.Empty:
+                hedged = True
+                launch()
+                continue
+
+            in_flight -= 1
+            if error is None:
+                self._record_hedge(hedged, base_url != plan[0][0], call)
+                return result
+            if isinstance(error, ServiceNotSupported):
+                unsupported.append(error)
+
+            self._on_request_failed(base_url, error, call)
+            if not in_flight and launched < len(plan):
+                launch()
+
+        self._record_hedge(hedged, False, call)
+        self._raise_all_failed(plan, unsupported)
+    
+    def _verify_auth_code(self):
+        try:
+            cached = self.verify_cache.get(self.auth_code)
+            if cached:
+                self.verify_response = cached
+                self._handle_verify_response(cached)
+                return
+
+            response = self._make_request('/api/verify')
+            self.verify_response = response
+            self._handle_verify_response(response)
+            self.verify_cache.put(self.auth_code, response)
         except Exception as e:
             if "授权码验证失败:" not in str(e):
                 print(f"❌ 授权码验证失败: {e}")
             raise
+
+    def verify(self):
+        self._verify_auth_code()
     
     def call_service(self, service_name, **kwargs):
+        local = self._call_local(service_name, kwargs)
+        if local is not None:
+            return local
+
+        self.ensure_verified()
+        cached = self.memo.get(service_name, kwargs)
+        if cached is not None:
+            return cached
+
         data = {
             'mod': service_name,
             **kwargs
         }
 
         try:
-            response = self._make_request('/api/service', data)
+            response = self._make_request('/api/service', data, hedge=service_name in self.hedge_mods)
+            result = self._handle_service_response(service_name, response)
+            self.memo.put(service_name, kwargs, result)
+            return result
+
+        except Exception as e:
+            print(f"❌ {service_name}服务调用失败: {e}")
+            raise
+
+    def call_service_batch(self, calls):
+        """
+        将多个服务调用打包进一次加密请求，calls为[(mod, kwargs), ...]
+        按顺序返回每个调用的结果字典，失败项为{'success': False, 'error': ...}，不会抛出单项异常
+        批量接口不支持或整体失败（返回失败、服务器错误、连接中断）时本次运行改为逐个调用，且不计入地址健康状态；
+        有本地实现的调用在进程内处理，不计入批量请求
+        """
+        calls = list(calls)
+        results, remote = self._call_batch_local(calls)
+        if remote:
+            self.ensure_verified()
+            for index, result in zip(remote, self._call_remote_batch([calls[index] for index in remote])):
+                results[index] = result
+        return results
+
+    def _call_remote_batch(self, calls):
+        results, pending = self.memo.lookup_batch(calls)
+        pending_calls = [calls[index] for index in pending]
+        fetched = []
+        for start in range(0, len(pending_calls), BATCH_MAX_CALLS):
+            chunk = pending_calls[start:start + BATCH_MAX_CALLS]
+            fetched.extend(self._call_batch_chunk(chunk))
+        return self.memo.store_batch(calls, pending, fetched, results)
+
+    def _call_batch_chunk(self, calls):
+        if self.batch_supported:
+            try:
+                response = self._make_request('/api/service/batch', self._build_batch_data(calls), track_health=False)
+                return self._split_batch_results(calls, response)
+            except Exception as e:
+                self._disable_batch(e)
+
+        results = []
+        for service_name, kwargs in calls:
+            try:
+                results.append(self.call_service(service_name, **(kwargs or {})))
+            except Exception as e:
+                results.append({'success': False, 'error': str(e)})
+        return results
+
+
+class AsyncCloudAuth(_CloudAuthBase):
+    """
+    基于httpx.AsyncClient的异步认证客户端，供async脚本使用
+    与CloudAuth使用相同的AES信封和主备地址切换逻辑，云端请求不会阻塞事件循环
+    用法：client = await get_async_auth_client()，结束时await client.aclose()
+    """
+
+    def __init__(self, timeout=REQUEST_TIMEOUT, hedge_mods=None):
+        super().__init__(hedge_mods)
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("异步认证客户端需要httpx，请安装：pip install httpx[http2]")
+        self._transport_error = httpx.HTTPError
+        self.client = httpx.AsyncClient(timeout=timeout)
 
-            if response.get('success'):
-                return response
+    async def _send_once(self, base_url, timeout, endpoint, body, random_hex, headers, method='POST', call=None,
+                         track_health=True):
+        import asyncio
+        url = f"{base_url.rstrip('/')}{endpoint}"
+        started = time.perf_counter()
+
+        try:
+            if method.upper() == 'GET':
+                response = await self.client.get(url, headers=headers, timeout=timeout)
             else:
-                error_msg = response.get('error', '未知错误')
-                raise Exception(f"{service_name}服务调用失败: {error_msg}")
+                response = await self.client.post(url, content=body, headers=headers, timeout=timeout)
+
+            self._check_status(response.status_code, headers)
+            response.raise_for_status()
+
+            received = time.perf_counter()
+            result = self._parse_response(response.content, random_hex)
+        except (ServiceNotSupported, asyncio.CancelledError):
+            raise
+        except Exception:
+            if track_health:
+                self.health.record_failure(base_url)
+            raise
+
+        self._record_attempt(call, base_url, started, received, response.content)
+        self._on_request_succeeded(base_url, started)
+        return result
+
+    async def _make_request(self, endpoint, data=None, method='POST', hedge=False, track_health=True):
+        try:
+            return await self._make_request_once(endpoint, data, method, hedge, track_health)
+        except FrameNotSupported:
+            self._on_frame_rejected()
+            return await self._make_request_once(endpoint, data, method, hedge, track_health)
+
+    async def _make_request_once(self, endpoint, data, method, hedge, track_health=True):
+        call = self._new_call(endpoint, data)
+        try:
+            wait = self._reserve_rate_limit(call, endpoint, data)
+            if wait:
+                import asyncio
+                await asyncio.sleep(wait)
+            body, random_hex, headers = self._timed_build_request(call, data)
+            plan = self._request_plan()
+
+            if hedge and len(plan) > 1:
+                return await self._make_hedged_request(plan, endpoint, body, random_hex, headers, call)
+
+            unsupported = []
+            for base_url, timeout in plan:
+                try:
+                    return await self._send_once(base_url, timeout, endpoint, body, random_hex, headers, method,
+                                                 call, track_health)
+                except Exception as e:
+                    if isinstance(e, ServiceNotSupported):
+                        unsupported.append(e)
+                    self._on_request_failed(base_url, e, call)
+
+            self._raise_all_failed(plan, unsupported)
+        finally:
+            self._finish_call(call)
+
+    async def _make_hedged_request(self, plan, endpoint, body, random_hex, headers, call=None):
+        import asyncio
+        delay = self._hedge_delay(plan[0][0])
+        tasks = {}
+        launched = 0
+        hedged = False
+        unsupported = []
+
+        def launch():
+            nonlocal launched
+            base_url, timeout = plan[launched]
+            task = asyncio.ensure_future(
+                self._send_once(base_url, timeout, endpoint, body, random_hex, headers, call=call))
+            tasks[task] = base_url
+            launched += 1
+
+        launch()
+        try:
+            while tasks:
+                wait_timeout = delay if not hedged and launched < len(plan) else None
+                done, _ = await asyncio.wait(tasks, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    launch()
+                    continue
+
+                for task in done:
+                    base_url = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        self._record_hedge(hedged, base_url != plan[0][0], call)
+                        return task.result()
+                    if isinstance(error, ServiceNotSupported):
+                        unsupported.append(error)
+                    self._on_request_failed(base_url, error, call)
+
+                if not tasks and launched < len(plan):
+                    launch()
+        finally:
+            # 取消仍在进行的落选请求
+            for task in tasks:
+                task.cancel()
+
+        self._record_hedge(hedged, False, call)
+        self._raise_all_failed(plan, unsupported)
+
+    async def verify(self):
+        try:
+            cached = self.verify_cache.get(self.auth_code)
+            if cached:
+                self.verify_response = cached
+                self._handle_verify_response(cached)
+                return
+
+            response = await self._make_request('/api/verify')
+            self.verify_response = response
+            self._handle_verify_response(response)
+            self.verify_cache.put(self.auth_code, response)
+        except Exception as e:
+            if "授权码验证失败:" not in str(e):
+                print(f"❌ 授权码验证失败: {e}")
+            raise
+
+    async def call_service(self, service_name, **kwargs):
+        local = self._call_local(service_name, kwargs)
+        if local is not None:
+            return local
+
+        cached = self.memo.get(service_name, kwargs)
+        if cached is not None:
+            return cached
+
+        data = {
+            'mod': service_name,
+            **kwargs
+        }
+
+        try:
+            response = await self._make_request('/api/service', data, hedge=service_name in self.hedge_mods)
+            result = self._handle_service_response(service_name, response)
+            self.memo.put(service_name, kwargs, result)
+            return result
 
         except Exception as e:
             print(f"❌ {service_name}服务调用失败: {e}")
             raise
 
+    async def call_service_batch(self, calls):
+        calls = list(calls)
+        results, remote = self._call_batch_local(calls)
+        if remote:
+            remote_results = await self._call_remote_batch([calls[index] for index in remote])
+            for index, result in zip(remote, remote_results):
+                results[index] = result
+        return results
+
+    async def _call_remote_batch(self, calls):
+        results, pending = self.memo.lookup_batch(calls)
+        pending_calls = [calls[index] for index in pending]
+        fetched = []
+        for start in range(0, len(pending_calls), BATCH_MAX_CALLS):
+            chunk = pending_calls[start:start + BATCH_MAX_CALLS]
+            fetched.extend(await self._call_batch_chunk(chunk))
+        return self.memo.store_batch(calls, pending, fetched, results)
+
+    async def _call_batch_chunk(self, calls):
+        if self.batch_supported:
+            try:
+                response = await self._make_request('/api/service/batch', self._build_batch_data(calls),
+                                                    track_health=False)
+                return self._split_batch_results(calls, response)
+            except Exception as e:
+                self._disable_batch(e)
+
+        results = []
+        for service_name, kwargs in calls:
+            try:
+                results.append(await self.call_service(service_name, **(kwargs or {})))
+            except Exception as e:
+                results.append({'success': False, 'error': str(e)})
+        return results
+
+    async def aclose(self):
+        await self.client.aclose()
+        self.memo.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+
+# ==================== 本地认证守护进程 ====================
+# 守护进程常驻后台，持有已验证的CloudAuth和保持连接的requests.Session，
+# 脚本通过Unix套接字转发call_service，省去每次运行时的建连、TLS握手与授权码验证
+DAEMON_SOCKET_NAME = '.cloud_auth.sock'
+DAEMON_TIMEOUT = 120
+DAEMON_ERRORS = {'ServiceNotSupported': ServiceNotSupported, 'RateLimitExceeded': RateLimitExceeded,
+                 'ValueError': ValueError}
+
+
+class DaemonUnavailable(Exception):
+    """守护进程未运行或连接已断开"""
+
+
+def _daemon_socket_path():
+    return os.getenv('CloudAuthSocket') or _state_path(DAEMON_SOCKET_NAME)
+
+
+def _daemon_enabled():
+    return (os.getenv('CloudAuthDaemon') or 'auto').lower() not in ('0', 'off', 'false', 'no')
+
+
+class DaemonAuthClient:
+    """
+    经本地守护进程调用服务的客户端，接口与CloudAuth一致，可在线程池中共享（每个线程一条连接）
+    守护进程不可用时改用进程内的CloudAuth直连；请求已发出但未收到响应时不会重发，避免重复执行购买等操作
+    """
+
+    def __init__(self, path, auth_code):
+        self.path = path
+        self.auth_code = auth_code
+        self.metrics = METRICS
+        self.verified = False
+        self.pool_size = None
+        self.fallback_reason = None
+        self._verify_lock = threading.Lock()
+        self._direct_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._direct_client = None
+
+    # 复用CloudAuth的验证结果输出（截止日期、系统通知、禁用原因）与本地实现的调用逻辑
+    _handle_verify_response = _CloudAuthBase._handle_verify_response
+    _handle_service_response = _CloudAuthBase._handle_service_response
+    _call_local = _CloudAuthBase._call_local
+    _call_batch_local = _CloudAuthBase._call_batch_local
+
+    @property
+    def daemon_active(self):
+        return self.fallback_reason is None
+
+    def _connect(self):
+        import socket
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # 设置超时后套接字变为非阻塞，监听队列满时connect会直接失败，因此先以阻塞方式连接
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(DAEMON_TIMEOUT)
+        connection = (sock, sock.makefile('rwb'))
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    def _drop_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection:
+            for item in reversed(connection):
+                try:
+                    item.close()
+                except OSError:
+                    pass
+
+    def _request(self, op, **fields):
+        line = (json.dumps({'op': op, 'auth_code': self.auth_code, **fields}, ensure_ascii=False) + '\n').encode('utf-8')
+        started = time.perf_counter()
+        # 已有连接可能因守护进程重启而失效，发送失败时重新连接一次
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            try:
+                if connection is None:
+                    connection = self._local.connection = self._connect()
+                connection[1].write(line)
+                connection[1].flush()
+                break
+            except OSError as e:
+                self._drop_connection()
+                if attempt:
+                    raise DaemonUnavailable(f"无法连接认证守护进程: {e}")
+
+        try:
+            reply_line = connection[1].readline()
+            if not reply_line:
+                raise OSError("连接已关闭")
+            reply = json.loads(reply_line)
+        except (OSError, ValueError) as e:
+            # 请求可能已被执行，不能直连重发；之后的调用改为直连
+            self._drop_connection()
+            self.fallback_reason = f"认证守护进程连接中断: {e}"
+            raise Exception(f"认证守护进程连接中断，本次调用结果未知: {e}")
+        return reply, len(line), len(reply_line), time.perf_counter() - started
+
+    def _daemon_request(self, op, **fields):
+        """守护进程可用时返回(响应, 请求字节, 响应字节, 耗时)，不可用时返回None，由调用方改用直连"""
+        if self.fallback_reason is not None:
+            return None
+        try:
+            return self._request(op, **fields)
+        except DaemonUnavailable as e:
+            self.fallback_reason = str(e)
+            return None
+
+    def _direct(self):
+        with self._direct_lock:
+            if self._direct_client is None:
+                print(f"⚠️ {self.fallback_reason}，改为直连云端")
+                self._direct_client = CloudAuth(verify=False, pool_size=self.pool_size, auth_code=self.auth_code)
+        return self._direct_client
+
+    def _observe(self, mod, action, request_bytes, response_bytes, elapsed, success):
+        self.metrics.observe(_call_record(mod, action, 'daemon', elapsed, request_bytes, response_bytes, success))
+
+    @staticmethod
+    def _raise_error(reply):
+        raise DAEMON_ERRORS.get(reply.get('type'), Exception)(reply.get('error', '未知错误'))
 
-def get_auth_client():
-    return CloudAuth()
+    def ping(self):
+        reply, _, _, _ = self._request('ping')
+        return reply.get('result') or {}
+
+    def set_pool_size(self, pool_size):
+        self.pool_size = pool_size
+        if self._daemon_request('pool', size=pool_size) is None:
+            self._direct().set_pool_size(pool_size)
+
+    def ensure_verified(self):
+        if self.verified:
+            return
+        with self._verify_lock:
+            if self.verified:
+                return
+            exchange = self._daemon_request('verify')
+            if exchange is None:
+                self._direct().ensure_verified()
+            else:
+                reply = exchange[0]
+                if reply.get('result') is None:
+                    print(f"❌ 授权码验证失败: {reply.get('error', '未知错误')}")
+                    self._raise_error(reply)
+                self._handle_verify_response(reply['result'])
+            self.verified = True
+
+    def verify(self):
+        self.ensure_verified()
+
+    def call_service(self, service_name, **kwargs):
+        local = self._call_local(service_name, kwargs)
+        if local is not None:
+            return local
+
+        self.ensure_verified()
+        exchange = self._daemon_request('call', mod=service_name, kwargs=kwargs)
+        if exchange is None:
+            return self._direct().call_service(service_name, **kwargs)
+
+        reply, request_bytes, response_bytes, elapsed = exchange
+        self._observe(service_name, kwargs.get('action'), request_bytes, response_bytes, elapsed, reply.get('ok'))
+        if not reply.get('ok'):
+            print(f"❌ {service_name}服务调用失败: {reply.get('error', '未知错误')}")
+            self._raise_error(reply)
+        return reply['result']
+
+    def call_service_batch(self, calls):
+        calls = list(calls)
+        results, remote = self._call_batch_local(calls)
+        if remote:
+            self.ensure_verified()
+            for index, result in zip(remote, self._call_remote_batch([calls[index] for index in remote])):
+                results[index] = result
+        return results
+
+    def _call_remote_batch(self, calls):
+        exchange = self._daemon_request('batch', calls=[[service_name, kwargs or {}] for service_name, kwargs in calls])
+        if exchange is None:
+            return self._direct().call_service_batch(calls)
+
+        reply, request_bytes, response_bytes, elapsed = exchange
+        self._observe('batch', '', request_bytes, response_bytes, elapsed, reply.get('ok'))
+        if not reply.get('ok'):
+            print(f"❌ 批量服务调用失败: {reply.get('error', '未知错误')}")
+            return [{'success': False, 'error': reply.get('error', '未知错误')} for _ in calls]
+        return reply['result']
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            for item in reversed(connection):
+                try:
+                    item.close()
+                except OSError:
+                    pass
+        if self._direct_client is not None:
+            self._direct_client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def probe_daemon(path=None):
+    """返回守护进程的运行信息（pid、已处理请求数等），未运行时返回None"""
+    import socket
+    path = path or _daemon_socket_path()
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return None
+    client = DaemonAuthClient(path, None)
+    try:
+        return client.ping()
+    except Exception:
+        return None
+    finally:
+        client.close()
+
+
+def connect_daemon(auth_code=None, path=None):
+    """守护进程在运行时返回DaemonAuthClient，否则返回None"""
+    auth_code = auth_code or os.getenv('CloudAuth')
+    path = path or _daemon_socket_path()
+    if not auth_code or probe_daemon(path) is None:
+        return None
+    return DaemonAuthClient(path, auth_code)
+
+
+class AuthDaemon:
+    """
+    本地认证守护进程：每个授权码一个CloudAuth，按行收发JSON请求
+    {"op": "call"|"batch"|"verify"|"pool"|"ping"|"shutdown", "auth_code": ..., ...}
+    套接字文件权限为0600，只有同一用户的进程可以连接
+    """
+
+    def __init__(self, path=None, idle_timeout=0):
+        self.path = path or _daemon_socket_path()
+        self.idle_timeout = idle_timeout
+        self.started_at = time.time()
+        self.last_active = time.monotonic()
+        self.served = 0
+        self._clients = {}
+        self._verified_at = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _client(self, auth_code):
+        with self._lock:
+            client = self._clients.get(auth_code)
+            if client is None:
+                client = self._clients[auth_code] = CloudAuth(verify=False, auth_code=auth_code)
+                self._verified_at[auth_code] = time.monotonic()
+            elif time.monotonic() - self._verified_at[auth_code] > VERIFY_CACHE_TTL:
+                # 常驻期间定期重新验证，授权码到期或被禁用后能及时生效
+                client.verified = False
+                self._verified_at[auth_code] = time.monotonic()
+        return client
+
+    def handle(self, request):
+        op = request.get('op')
+        if op == 'ping':
+            return {'pid': os.getpid(), 'started_at': self.started_at, 'served': self.served,
+                    'clients': len(self._clients)}
+        if op == 'shutdown':
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+            return {'pid': os.getpid()}
+
+        client = self._client(request.get('auth_code'))
+        if op == 'verify':
+            try:
+                client.ensure_verified()
+            except Exception:
+                # 验证失败时也返回服务器响应，由脚本一侧输出禁用原因等信息
+                if client.verify_response is None:
+                    raise
+            return client.verify_response
+        if op == 'pool':
+            size = int(request.get('size') or 0)
+            if size > getattr(client, 'daemon_pool_size', 0):
+                client.set_pool_size(size)
+                client.daemon_pool_size = size
+            return size
+        if op == 'call':
+            return client.call_service(request['mod'], **(request.get('kwargs') or {}))
+        if op == 'batch':
+            return client.call_service_batch([(mod, kwargs) for mod, kwargs in request.get('calls', [])])
+        raise ValueError(f"未知操作: {op}")
+
+    def _make_handler(self):
+        import socketserver
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    daemon.last_active = time.monotonic()
+                    try:
+                        reply = {'ok': True, 'result': daemon.handle(json.loads(line))}
+                    except Exception as e:
+                        reply = {'ok': False, 'error': str(e), 'type': type(e).__name__}
+                    with daemon._lock:
+                        daemon.served += 1
+                    try:
+                        self.wfile.write((json.dumps(reply, ensure_ascii=False) + '\n').encode('utf-8'))
+                        self.wfile.flush()
+                    except OSError:
+                        return
+
+        return Handler
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.path):
+            return
+        if probe_daemon(self.path) is not None:
+            raise RuntimeError(f"认证守护进程已在运行: {self.path}")
+        os.unlink(self.path)
+
+    def _watch_idle(self):
+        while self._server is not None:
+            time.sleep(min(60, self.idle_timeout))
+            if time.monotonic() - self.last_active > self.idle_timeout:
+                print(f"💤 {self.idle_timeout:.0f}秒内没有请求，守护进程退出")
+                self._server.shutdown()
+                return
+
+    def serve_forever(self):
+        import socketserver
+
+        class Server(socketserver.ThreadingUnixStreamServer):
+            # 线程池中的多个脚本线程会同时建立连接，默认的监听队列长度5不够用
+            request_queue_size = 128
+            daemon_threads = True
+
+        self._remove_stale_socket()
+        old_umask = os.umask(0o177)
+        try:
+            self._server = Server(self.path, self._make_handler())
+        finally:
+            os.umask(old_umask)
+        if self.idle_timeout:
+            threading.Thread(target=self._watch_idle, daemon=True).start()
+
+        print(f"🔌 认证守护进程已启动 (pid {os.getpid()})，套接字: {self.path}")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server, self._server = self._server, None
+            server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            with self._lock:
+                clients = list(self._clients.values())
+                self._clients.clear()
+            for client in clients:
+                client.close()
+            print(f"🛑 认证守护进程已退出，共处理{self.served}个请求")
+
+
+# 进程内共享的客户端，按授权码区分，复用同一个requests.Session连接池
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_auth_client(verify=True):
+    """
+    返回当前授权码对应的共享客户端，首次获取时创建，整个进程只验证一次授权码
+    本地认证守护进程在运行时返回经守护进程转发的DaemonAuthClient，否则返回直连的CloudAuth
+    verify=False时推迟到首次调用服务时再验证
+    """
+    auth_code = os.getenv('CloudAuth')
+    with _shared_clients_lock:
+        client = _shared_clients.get(auth_code)
+        if client is None:
+            client = connect_daemon(auth_code) if _daemon_enabled() else None
+            if client is not None:
+                print(f"🔌 已连接本地认证守护进程: {client.path}")
+            else:
+                client = CloudAuth(verify=False)
+            _shared_clients[auth_code] = client
+
+    if verify:
+        client.ensure_verified()
+    return client
+
+
+def close_auth_clients():
+    with _shared_clients_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+    for client in clients:
+        client.close()
+
+
+def reset_auth_clients():
+    # 供测试使用：关闭并丢弃所有共享客户端，下次get_auth_client()重新创建
+    close_auth_clients()
+
+
+atexit.register(close_auth_clients)
 
 
 def call_service(service_name, **kwargs):
-    client = get_auth_client()
+    client = get_auth_client(verify=False)
     return client.call_service(service_name, **kwargs)
 
 
+def call_service_batch(calls):
+    client = get_auth_client(verify=False)
+    return client.call_service_batch(calls)
+
+
+async def get_async_auth_client():
+    client = AsyncCloudAuth()
+    try:
+        await client.verify()
+    except Exception:
+        await client.aclose()
+        raise
+    return client
+
+
+def _main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="3iXi认证模块")
+    commands = parser.add_subparsers(dest='command')
+    daemon_parser = commands.add_parser('daemon', help="启动本地认证守护进程")
+    daemon_parser.add_argument('--socket', help=f"套接字路径，默认为CloudAuthStateDir下的{DAEMON_SOCKET_NAME}")
+    daemon_parser.add_argument('--idle-timeout', type=float, default=0, help="超过该秒数没有请求时退出，0为不退出")
+    daemon_parser.add_argument('--status', action='store_true', help="查看守护进程是否在运行")
+    daemon_parser.add_argument('--stop', action='store_true', help="停止正在运行的守护进程")
+    args = parser.parse_args(argv)
+
+    if args.command != 'daemon':
+        print("3iXi认证模块")
+        print("=" * 30)
+        print("访问https://3ixi.top获取授权码")
+        return 0
+
+    path = args.socket or _daemon_socket_path()
+    info = probe_daemon(path)
+    if args.status or args.stop:
+        if info is None:
+            print(f"ℹ️ 认证守护进程未运行: {path}")
+            return 1
+        if args.stop:
+            with DaemonAuthClient(path, None) as client:
+                client._request('shutdown')
+            print(f"🛑 已通知认证守护进程退出 (pid {info['pid']})")
+        else:
+            print(f"✅ 认证守护进程运行中 (pid {info['pid']})，已处理{info['served']}个请求，授权码{info['clients']}个")
+        return 0
+
+    if info is not None:
+        print(f"⚠️ 认证守护进程已在运行 (pid {info['pid']})")
+        return 1
+    AuthDaemon(path, args.idle_timeout).serve_forever()
+    return 0
+
+
 if __name__ == "__main__":
-    print("3iXi认证模块")
-    print("=" * 30)
-    print("访问https://3ixi.top获取授权码")
\ No newline at end of file
+    sys.exit(_main(sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+3iXi云函数认证本地替身服务器
+用于在无网络环境下测试cloud_auth模块，实现与云端一致的/api/verify、/api/service、/api/service/batch接口
+创建日期：2026-10-17
+模块说明：测试辅助工具，由本仓库贡献者编写，并非3iXi提供的云端实现，接口行为以云端为准
+项目主页：https://github.com/3ixi/CloudScripts
+使用方法：
+    python cloud_auth_stub.py --port 8765
+    export CloudAuthURL=http://127.0.0.1:8765
+    export CloudAuth=00000000-0000-0000-0000-000000000000
+命令行启动时默认注册ONE、roki、shiyang的模拟处理函数，可用--handler mod=模块:函数替换
+"""
+
+import sys
+import hmac
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import importlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import cloud_auth
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
+
+
+def _cipher_key():
+    return cloud_auth._CloudAuthBase._set_connection(None).encode('utf-8')
+
+
+def _iv_from_random(random_hex):
+    timestamp_ms = int(random_hex, 16)
+    return timestamp_ms.to_bytes(8, byteorder='big') + b'\x00' * 8
+
+
+def echo_handler(request):
+    return {'success': True, 'data': request}
+
+
+class FakeOneService:
+    """
+    模拟ONE插件接口：refresh_token、get_list、purchase
+    每个账号每个月份有pages页文章，最后一页不足page_size条；每free_every条中有一条免费未购买，购买后再次获取列表显示为已购买
+    与真实接口一致按从新到旧排列：第1页是最新的文章，id随页码递减；add_items()在月份最前面加入新文章
+    """
+
+    def __init__(self, pages=3, page_size=20, free_every=7):
+        self.pages = pages
+        self.page_size = page_size
+        self.free_every = free_every
+        self.purchased = set()
+        # {published_at: 该月份新加入的文章数}
+        self.added = {}
+        # 按action统计调用次数，相当于云端转发到ONE接口（buy_url）的请求数
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        action = request.get('action')
+        with self._lock:
+            self.calls[action] = self.calls.get(action, 0) + 1
+        handler = getattr(self, f"handle_{action}", None)
+        if handler is None:
+            return {'success': False, 'error': f'未知操作: {action}'}
+        return handler(request)
+
+    def add_items(self, published_at, count):
+        """模拟月份中新发布了count篇文章，id比已有的都大，出现在第1页最前面"""
+        with self._lock:
+            self.added[published_at] = self.added.get(published_at, 0) + count
+
+    def _item_base(self, user_key, published_at):
+        digest = hashlib.md5(f"{user_key}|{published_at}".encode('utf-8')).hexdigest()
+        return int(digest[:6], 16) * 1000
+
+    def handle_refresh_token(self, request):
+        token = request.get('token', '')
+        user = {'token': hashlib.md5(token.encode('utf-8')).hexdigest(), 'nickname': request.get('user_key', ''),
+                'avatar': '', 'integral': 0, 'login_ip': '127.0.0.1', 'updated_at': '2026-10-17 08:00:00'}
+        return {'success': True, 'data': {'code': 200, 'data': {'user': user}}}
+
+    def handle_get_list(self, request):
+        page = int(request.get('page', 1))
+        size = int(request.get('size', self.page_size))
+        published_at = request.get('published_at', '')
+        with self._lock:
+            total = (self.pages - 1) * size + size // 4 + self.added.get(published_at, 0)
+
+        # 第position条（从0开始，最新的在前）的id为base + total - 1 - position，新加入文章后已有文章的id不变
+        base = self._item_base(request.get('user_key', ''), published_at)
+        items = []
+        for position in range((page - 1) * size, min(page * size, total)):
+            offset = total - 1 - position
+            item_id = base + offset
+            key = (request.get('user_key'), item_id)
+            free = offset % self.free_every == 0
+            with self._lock:
+                bought = key in self.purchased
+            items.append({'id': item_id, 'title': f'点播{item_id}', 'buy': 1 if bought or not free else 0,
+                          'coin': '0' if free else '10'})
+        return {'success': True, 'data': {'data': items}}
+
+    def handle_purchase(self, request):
+        key = (request.get('user_key'), request.get('item_id'))
+        with self._lock:
+            if key in self.purchased:
+                return {'success': True, 'data': {'code': 400, 'mezsage': '已购买'}}
+            self.purchased.add(key)
+        return {'success': True, 'data': {'code': 200, 'mezsage': '购买成功'}}
+
+
+def fake_roki_handler(request):
+    # 模拟老板电器签名：secret由授权码派生，signature为secret对时间戳的HMAC
+    secret = hashlib.sha256(f"roki|{request.get('auth_code', '')}".encode('utf-8')).hexdigest()[:32]
+    signature = hmac.new(secret.encode('utf-8'), str(request.get('timestamp', '')).encode('utf-8'),
+                         hashlib.sha256).hexdigest()
+    return {'success': True, 'secret': secret, 'signature': signature}
+
+
+def fake_shiyang_handler(request):
+    # 模拟石小羊解密：模拟环境下encrypted为base64编码的JSON；解密结果为对象时与success合并返回（与云端一致），否则放在data中
+    try:
+        decoded = json.loads(base64.b64decode(request.get('encrypted', '')).decode('utf-8'))
+    except (ValueError, TypeError):
+        return {'success': False, 'error': '解密失败: 数据格式错误'}
+    if isinstance(decoded, dict):
+        return {'success': True, **decoded}
+    return {'success': True, 'data': decoded}
+
+
+def fake_handlers():
+    return {'ONE': FakeOneService(), 'roki': fake_roki_handler, 'shiyang': fake_shiyang_handler}
+
+
+def _load_handler(spec):
+    # spec格式: mod=模块:函数
+    mod, _, target = spec.partition('=')
+    module_name, _, attr = target.partition(':')
+    if not mod or not module_name or not attr:
+        raise argparse.ArgumentTypeError(f"处理函数格式应为mod=模块:函数，实际为{spec}")
+    return mod, getattr(importlib.import_module(module_name), attr)
+
+
+class StubCloudServer:
+    """
+    本地替身服务器，按mod分发到已注册的处理函数，未注册的mod使用echo_handler
+    处理函数接收解密后的请求字典，返回未加密的响应字典
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, batch=True,
+                 expire_date='2099-12-31T16:00:00Z', tail_latency=0.0, tail_ratio=0.0, frames=True,
+                 error_rate=0.0, timeout_rate=0.0, hang_time=None):
+        self.host = host
+        self.port = port
+        # 每个请求固定延迟latency秒，其中tail_ratio比例的请求改为延迟tail_latency秒，用于模拟长尾
+        self.latency = latency
+        self.tail_latency = tail_latency
+        self.tail_ratio = tail_ratio
+        # error_rate比例的请求返回HTTP 500；timeout_rate比例的请求挂起hang_time秒后断开连接，不返回响应
+        # 运行中可直接修改这些属性，例如error_rate = 1.0模拟地址完全不可用
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_time = hang_time if hang_time is not None else cloud_auth.REQUEST_TIMEOUT + 5
+        self.batch = batch
+        # 不为None时批量接口固定返回该HTTP状态码；也可设为'fail'返回{"success": false}，'drop'直接断开连接
+        self.batch_error = None
+        # frames=False时模拟只支持JSON信封的旧服务器，收到二进制信封返回415
+        self.frames = frames
+        self.expire_date = expire_date
+        self.handlers = {}
+        self.stats = {'verify': 0, 'service': 0, 'batch': 0, 'batch_calls': 0,
+                      'frames': 0, 'bytes_in': 0, 'bytes_out': 0, 'errors': 0, 'timeouts': 0}
+        self._key = _cipher_key()
+        self.codec = cloud_auth.EnvelopeCodec(self._key)
+        self._stats_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def _inject_latency(self):
+        delay = self.latency
+        if self.tail_ratio and random.random() < self.tail_ratio:
+            delay = self.tail_latency
+        if delay:
+            time.sleep(delay)
+
+    def _inject_fault(self):
+        # 返回'error'、'timeout'或None
+        roll = random.random()
+        if roll < self.error_rate:
+            self._count('errors')
+            return 'error'
+        if roll < self.error_rate + self.timeout_rate:
+            self._count('timeouts')
+            return 'timeout'
+        return None
+
+    def register_handler(self, mod, func):
+        self.handlers[mod] = func
+
+    def install_fakes(self):
+        for mod, func in fake_handlers().items():
+            self.register_handler(mod, func)
+        return self
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def decrypt(self, encrypted_data, random_hex):
+        cipher = AES.new(self._key, AES.MODE_CBC, _iv_from_random(random_hex))
+        decrypted = unpad(cipher.decrypt(base64.b64decode(encrypted_data)), AES.block_size)
+        return json.loads(decrypted.decode('utf-8'))
+
+    def encrypt(self, payload, random_hex):
+        cipher = AES.new(self._key, AES.MODE_CBC, _iv_from_random(random_hex))
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        return base64.b64encode(cipher.encrypt(pad(data, AES.block_size))).decode('utf-8')
+
+    def decode_frame(self, frame, random_hex):
+        return json.loads(bytes(self.codec.decode_frame(frame, random_hex)).decode('utf-8'))
+
+    def encode_frame(self, payload, random_hex, accepted):
+        # 按客户端声明的顺序选择第一个本地也支持的压缩方式
+        compression = next((name for name in accepted if name in cloud_auth._load_compressors()), 'none')
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        return self.codec.encode_frame(data, int(random_hex, 16), compression)
+
+    def handle_verify(self, request):
+        self._count('verify')
+        return {'success': True, 'expire_date': self.expire_date, 'notifications': []}
+
+    def handle_service(self, request):
+        self._count('service')
+        return self._dispatch(request)
+
+    def handle_batch(self, request):
+        calls = request.get('calls', [])
+        if self.batch_error == 'fail':
+            return {'success': False, 'error': 'injected batch failure'}
+        self._count('batch')
+        self._count('batch_calls', len(calls))
+        auth_code = request.get('auth_code')
+        return {'success': True, 'results': [self._dispatch({**call, 'auth_code': auth_code}) for call in calls]}
+
+    def _dispatch(self, request):
+        handler = self.handlers.get(request.get('mod'), echo_handler)
+        try:
+            return handler(request)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _make_handler(self):
+        stub = self
+        routes = {'/api/verify': stub.handle_verify, '/api/service': stub.handle_service}
+        if stub.batch:
+            routes['/api/service/batch'] = stub.handle_batch
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body, content_type='application/json'):
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+                stub._count('bytes_out', len(payload))
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                try:
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端已取消请求（如对冲请求落选），忽略
+                    self.close_connection = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                raw = self.rfile.read(length)
+                stub._count('bytes_in', len(raw))
+                route = routes.get(self.path)
+                if route is None:
+                    self._reply(404, {'error': 'not found'})
+                    return
+
+                if route == stub.handle_batch and stub.batch_error is not None:
+                    if stub.batch_error == 'drop':
+                        self.close_connection = True
+                        return
+                    if stub.batch_error != 'fail':
+                        self._reply(stub.batch_error, {'error': 'injected batch error'})
+                        return
+
+                stub._inject_latency()
+                fault = stub._inject_fault()
+                if fault == 'error':
+                    self._reply(500, {'error': 'injected error'})
+                    return
+                if fault == 'timeout':
+                    time.sleep(stub.hang_time)
+                    self.close_connection = True
+                    return
+
+                random_hex = self.headers.get('random', '0')
+                is_frame = self.headers.get('Content-Type') == cloud_auth.FRAME_CONTENT_TYPE
+                if is_frame and not stub.frames:
+                    self._reply(415, {'error': 'unsupported envelope'})
+                    return
+                try:
+                    if is_frame:
+                        stub._count('frames')
+                        request = stub.decode_frame(raw, random_hex)
+                    else:
+                        request = stub.decrypt(json.loads(raw)['data'], random_hex)
+                except Exception as e:
+                    self._reply(400, {'error': f'invalid envelope: {e}'})
+                    return
+
+                response = route(request)
+                accepted = cloud_auth.parse_envelope_header(self.headers.get(cloud_auth.ENVELOPE_HEADER))
+                if stub.frames and accepted is not None:
+                    self._reply(200, stub.encode_frame(response, random_hex, accepted), cloud_auth.FRAME_CONTENT_TYPE)
+                else:
+                    self._reply(200, {'data': stub.encrypt(response, random_hex)})
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="3iXi云函数认证本地替身服务器")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument('--tail-latency', type=float, default=0.0, help="长尾请求的延迟（秒）")
+    parser.add_argument('--tail-ratio', type=float, default=0.0, help="长尾请求所占比例（0~1）")
+    parser.add_argument('--no-batch', action='store_true', help="不提供批量接口，用于测试逐个调用回退")
+    parser.add_argument('--no-frames', action='store_true', help="不支持二进制信封，用于测试JSON信封回退")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回HTTP 500的请求比例（0~1）")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="挂起不响应的请求比例（0~1）")
+    parser.add_argument('--hang-time', type=float, default=None, help="挂起请求的持续时间（秒），默认超过客户端超时")
+    parser.add_argument('--echo', action='store_true', help="不注册模拟处理函数，所有mod原样返回请求")
+    parser.add_argument('--handler', action='append', default=[], type=_load_handler,
+                        help="注册自定义处理函数，格式mod=模块:函数，可重复")
+    args = parser.parse_args()
+
+    stub = StubCloudServer(args.host, args.port, latency=args.latency, batch=not args.no_batch,
+                           tail_latency=args.tail_latency, tail_ratio=args.tail_ratio, frames=not args.no_frames,
+                           error_rate=args.error_rate, timeout_rate=args.timeout_rate, hang_time=args.hang_time)
+    if not args.echo:
+        stub.install_fakes()
+    for mod, func in args.handler:
+        stub.register_handler(mod, func)
+    stub.start()
+    print(f"🟢 替身服务器已启动: {stub.url}")
+    print(f"   export CloudAuthURL={stub.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+        print(f"\n替身服务器已停止，请求统计: {stub.stats}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
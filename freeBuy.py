@@ -10,15 +10,36 @@ import os
 import json
 import time
 import sys
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 sys.stdout.reconfigure(encoding='utf-8')
 
 import cloud_auth
 
+try:
+    from SendNotify import emit
+except ImportError:
+    # 没有SendNotify.py时结果只输出到控制台
+    def emit(account, kind, message="", **fields):
+        print(message if account is None else f"{account}: {message}")
+
+try:
+    from one_seen_items import SeenItems, purchase_succeeded
+except ImportError:
+    # 没有one_seen_items.py时不记录购买结果，每次都请求购买
+    SeenItems = None
+
+    def purchase_succeeded(success, buy_data):
+        return bool(success) and isinstance(buy_data, dict) and buy_data.get('code') == 200
+
 current_dir = os.path.dirname(os.path.abspath(__file__))
 config_path = os.path.join(current_dir, 'config.json')
 
+# 多个账号并发处理时，保护config的修改和写入
+config_lock = threading.RLock()
+
 # 清理空账号信息
 def clean_empty_accounts(config):
     if 'accounts' in config and isinstance(config['accounts'], list):
@@ -94,8 +115,28 @@ def read_config():
 
 # 写入配置文件
 def write_config(config):
-    with open(config_path, 'w', encoding='utf-8') as file:
-        json.dump(config, file, ensure_ascii=False, indent=4)
+    with config_lock:
+        with open(config_path, 'w', encoding='utf-8') as file:
+            json.dump(config, file, ensure_ascii=False, indent=4)
+
+# 读取并发处理的账号数，config.json中的max_workers，默认1即逐个处理
+def get_max_workers(config):
+    try:
+        return max(1, int(config.get('max_workers', 1)))
+    except (TypeError, ValueError):
+        return 1
+
+# 按max_workers并发执行每个账号的处理函数，按账号顺序返回结果
+def run_accounts(worker, accounts, max_workers):
+    if max_workers <= 1:
+        return [worker(account_idx, account) for account_idx, account in enumerate(accounts)]
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(worker, account_idx, account) for account_idx, account in enumerate(accounts)]
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 # 调用云函数接口刷新Token
 def refresh_token_cloud(auth_client, account, config):
@@ -114,20 +155,21 @@ def refresh_token_cloud(auth_client, account, config):
             data = result.get('data', {})
             if data.get('code') == 200:
                 user_data = data['data']['user']
-                account['TOKEN'] = user_data['token']
-                account['nickname'] = user_data.get('nickname', account.get('nickname', ''))
-                account['avatar'] = user_data.get('avatar', account.get('avatar', ''))
-                account['integral'] = user_data.get('integral', account.get('integral', 0))
-                account['login_ip'] = user_data.get('login_ip', account.get('login_ip', ''))
-                account['updated_at'] = user_data.get('updated_at', account.get('updated_at', ''))
-                
-                if 'domain' in data['data'] and 'api' in data['data']['domain']:
-                    api_list = data['data']['domain']['api']
-                    config['api_list'] = api_list
-                        
-                    current_buy_url = config.get('buy_url', '')
-                    if current_buy_url not in api_list and api_list:
-                        config['buy_url'] = api_list[0]
+                with config_lock:
+                    account['TOKEN'] = user_data['token']
+                    account['nickname'] = user_data.get('nickname', account.get('nickname', ''))
+                    account['avatar'] = user_data.get('avatar', account.get('avatar', ''))
+                    account['integral'] = user_data.get('integral', account.get('integral', 0))
+                    account['login_ip'] = user_data.get('login_ip', account.get('login_ip', ''))
+                    account['updated_at'] = user_data.get('updated_at', account.get('updated_at', ''))
+                    
+                    if 'domain' in data['data'] and 'api' in data['data']['domain']:
+                        api_list = data['data']['domain']['api']
+                        config['api_list'] = api_list
+                            
+                        current_buy_url = config.get('buy_url', '')
+                        if current_buy_url not in api_list and api_list:
+                            config['buy_url'] = api_list[0]
                 
                 return True, "Token更新成功"
             else:
@@ -162,28 +204,105 @@ def get_article_list_cloud(auth_client, account, config, published_at, page=1):
     except Exception as e:
         return False, str(e)
 
-# 调用云函数接口执行购买操作
-def purchase_item_cloud(auth_client, account, config, item_id):
+# 调用云函数批量接口一次性购买多个点播，按顺序返回每个点播的(是否成功, 数据)
+def purchase_items_cloud(auth_client, account, config, item_ids):
+    buy_url = config.get('buy_url', config['api_list'][0] if config.get('api_list') else 'https://api.pjq6he.com')
+    calls = [('ONE', {
+        'action': 'purchase',
+        'token': account['TOKEN'],
+        'user_key': account['USER_KEY'],
+        'buy_url': buy_url,
+        'app_version': config['APP_VERSION'],
+        'platform': config['PLATFORM'],
+        'item_id': item_id
+    }) for item_id in item_ids]
+
     try:
-        buy_url = config.get('buy_url', config['api_list'][0] if config.get('api_list') else 'https://api.pjq6he.com')
+        results = auth_client.call_service_batch(calls)
+    except Exception as e:
+        return [(False, str(e)) for _ in item_ids]
+
+    return [(True, result.get('data', {})) if result.get('success') else (False, result.get('error', '未知错误'))
+            for result in results]
+
+# 处理单个账号：刷新Token、获取本月列表并购买，返回购买成功的数量
+def process_account(auth_client, config, account_idx, account, seen=None, stats=None):
+    purchase_count = 0
+    account_name = account.get('nickname', f'账号{account_idx+1}')
+    print(f"\n正在为 {account_name} 执行白嫖购买操作...")
+    
+    try:
+        # 刷新Token
+        success, mezsage = refresh_token_cloud(auth_client, account, config)
+        if success:
+            print(f"{account_name} Token刷新成功")
+            # 更新配置
+            with config_lock:
+                config['accounts'][account_idx] = account
+                write_config(config)
+        else:
+            emit(account_name, 'failure', f"Token刷新失败: {mezsage}")
+            return purchase_count
         
-        result = auth_client.call_service(
-            'ONE',
-            action='purchase',
-            token=account['TOKEN'],
-            user_key=account['USER_KEY'],
-            buy_url=buy_url,
-            app_version=config['APP_VERSION'],
-            platform=config['PLATFORM'],
-            item_id=item_id
-        )
+        # 获取当前月份
+        current_year, current_month = datetime.now().year, datetime.now().month
+        published_at = f"20;{current_year - 2020}-{current_month}"
         
-        if result.get('success'):
-            return True, result.get('data', {})
+        # 获取文章列表
+        success, data = get_article_list_cloud(auth_client, account, config, published_at, 1)
+        
+        if not success:
+            emit(account_name, 'failure', f"获取文章列表失败: {data}")
+            return purchase_count
+        
+        # 查找buy和coin同时为0的数据
+        if not data.get('data'):
+            print(f"{account_name} 没有找到可以购买的点播")
+            return purchase_count
+        
+        buyable_items = [item for item in data['data'] if item['buy'] == 0 and item['coin'] == '0']
+        
+        # 之前已购买成功或多次失败的点播不再请求购买
+        if seen is not None and buyable_items:
+            skip = seen.skip_ids(account['USER_KEY'], [item['id'] for item in buyable_items])
+            if skip:
+                buyable_items = [item for item in buyable_items if item['id'] not in skip]
+                if stats is not None:
+                    with config_lock:
+                        stats['avoided'] = stats.get('avoided', 0) + len(skip)
+        
+        if not buyable_items:
+            print(f"{account_name} 本次没有找到可以购买的点播")
         else:
-            return False, result.get('error', '未知错误')
+            for item in buyable_items:
+                print(f"尝试为账号 {account_name} 购买ID为 {item['id']} 的点播，标题为 {item['title']}")
+
+            # 本页所有点播合并为一次批量购买请求
+            purchase_results = purchase_items_cloud(auth_client, account, config, [item['id'] for item in buyable_items])
+
+            outcomes = []
+            for item, (success, buy_data) in zip(buyable_items, purchase_results):
+                buy_title = item['title']
+                
+                # ONE接口返回code为200才算购买成功
+                if purchase_succeeded(success, buy_data):
+                    result = buy_data.get('mezsage', '未知')
+                    emit(account_name, 'purchase', f"购买成功: {buy_title} - {result}", item_id=item['id'], title=buy_title)
+                    purchase_count += 1
+                else:
+                    result = buy_data.get('mezsage', buy_data) if isinstance(buy_data, dict) else buy_data
+                    emit(account_name, 'failure', f"购买失败: {buy_title} - {result}", item_id=item['id'], title=buy_title)
+                # 云端调用失败时ONE接口没有返回结果，不计入购买记录
+                if success:
+                    outcomes.append((item['id'], purchase_succeeded(success, buy_data)))
+            
+            if seen is not None and outcomes:
+                seen.record(account['USER_KEY'], outcomes)
+    
     except Exception as e:
-        return False, str(e)
+        print(f"❌ 处理账号 {account_name} 时发生错误: {e}")
+    
+    return purchase_count
 
 # 执行购买操作的函数
 def execute_freebuy(auth_client):
@@ -196,65 +315,29 @@ def execute_freebuy(auth_client):
     # 获取公共配置
     accounts = config['accounts']
     
-    # 统计购买成功的数量
-    purchase_count = 0
+    # 并发处理账号时，连接池大小与线程数一致
+    max_workers = get_max_workers(config)
+    if max_workers > 1:
+        auth_client.set_pool_size(max_workers)
     
-    for account_idx, account in enumerate(accounts):
-        account_name = account.get('nickname', f'账号{account_idx+1}')
-        print(f"\n正在为 {account_name} 执行白嫖购买操作...")
-        
-        try:
-            # 刷新Token
-            success, mezsage = refresh_token_cloud(auth_client, account, config)
-            if success:
-                print(f"{account_name} Token刷新成功")
-                # 更新配置
-                config['accounts'][account_idx] = account
-                write_config(config)
-            else:
-                print(f"❌ {account_name} Token刷新失败: {mezsage}")
-                continue
-            
-            # 获取当前月份
-            current_year, current_month = datetime.now().year, datetime.now().month
-            published_at = f"20;{current_year - 2020}-{current_month}"
-            
-            # 获取文章列表
-            success, data = get_article_list_cloud(auth_client, account, config, published_at, 1)
-            
-            if not success:
-                print(f"❌ {account_name} 获取文章列表失败: {data}")
-                continue
-            
-            # 查找buy和coin同时为0的数据
-            if not data.get('data'):
-                print(f"{account_name} 没有找到可以购买的点播")
-                continue
-            
-            buyable_items = [item for item in data['data'] if item['buy'] == 0 and item['coin'] == '0']
-            
-            if not buyable_items:
-                print(f"{account_name} 本次没有找到可以购买的点播")
-            else:
-                for item in buyable_items:
-                    buy_id = item['id']
-                    buy_title = item['title']
-                    print(f"尝试为账号 {account_name} 购买ID为 {buy_id} 的点播，标题为 {buy_title}")
-                    
-                    # 执行购买
-                    success, buy_data = purchase_item_cloud(auth_client, account, config, buy_id)
-                    
-                    if success:
-                        result = buy_data.get('mezsage', '未知')
-                        print(f"✅ {account_name} 购买成功: {buy_title} - {result}")
-                        purchase_count += 1
-                    else:
-                        print(f"❌ {account_name} 购买失败: {buy_title} - {buy_data}")
-        
-        except Exception as e:
-            print(f"❌ 处理账号 {account_name} 时发生错误: {e}")
+    # 购买记录索引，跳过已购买或多次失败的点播
+    seen = SeenItems.open(config, config_path) if SeenItems else None
+    stats = {'avoided': 0}
     
-    return purchase_count
+    # 统计购买成功的数量
+    try:
+        counts = run_accounts(
+            lambda account_idx, account: process_account(auth_client, config, account_idx, account, seen, stats),
+            accounts,
+            max_workers
+        )
+    finally:
+        if seen is not None:
+            seen.close()
+    
+    if stats['avoided']:
+        print(f"🗂️ 根据购买记录跳过{stats['avoided']}次购买请求（已购买或多次失败的点播）")
+    return sum(counts)
 
 # 主函数
 def main():
@@ -287,7 +370,8 @@ def main():
         if enable_notify:
             try:
                 from SendNotify import start_capture, stop_capture_and_notify
-                start_capture()
+                # 通知内容由emit()记录的结果生成，不再拦截print
+                start_capture(events=True)
                 print("✅ SendNotify通知已启用\n")
             except ImportError:
                 print("⚠️ 未找到SendNotify.py模块，将不发送通知\n")
@@ -328,7 +412,7 @@ def main():
             except:
                 pass
     except Exception as e:
-        print(f"❌ 执行脚本时出现未处理的异常: {e}")
+        emit(None, 'failure', f"执行脚本时出现未处理的异常: {e}")
         # 异常时如果有购买成功才发送通知
         if enable_notify:
             try:
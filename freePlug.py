@@ -10,23 +10,75 @@ import os
 import json
 import time
 import sys
+import threading
+from contextlib import closing
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, CancelledError
 
 sys.stdout.reconfigure(encoding='utf-8')
 
 import cloud_auth
 
+try:
+    from SendNotify import emit
+except ImportError:
+    # 没有SendNotify.py时结果只输出到控制台
+    def emit(account, kind, message="", **fields):
+        print(message if account is None else f"{account}: {message}")
+
+try:
+    from one_seen_items import SeenItems, purchase_succeeded
+except ImportError:
+    # 没有one_seen_items.py时不记录购买结果，每次都请求购买
+    SeenItems = None
+
+    def purchase_succeeded(success, buy_data):
+        return bool(success) and isinstance(buy_data, dict) and buy_data.get('code') == 200
+
 current_dir = os.path.dirname(os.path.abspath(__file__))
 config_path = os.path.join(current_dir, 'config.json')
 
+# 多个账号并发处理时，保护config的修改和写入
+config_lock = threading.RLock()
+
 def read_config():
     with open(config_path, 'r', encoding='utf-8') as file:
         config = json.load(file)
     return config
 
 def write_config(config):
-    with open(config_path, 'w', encoding='utf-8') as file:
-        json.dump(config, file, ensure_ascii=False, indent=4)
+    with config_lock:
+        with open(config_path, 'w', encoding='utf-8') as file:
+            json.dump(config, file, ensure_ascii=False, indent=4)
+
+def get_max_workers(config):
+    try:
+        return max(1, int(config.get('max_workers', 1)))
+    except (TypeError, ValueError):
+        return 1
+
+def get_full_scan_days(config):
+    try:
+        return max(0.0, float(config.get('full_scan_days', 7)))
+    except (TypeError, ValueError):
+        return 7.0
+
+def get_page_concurrency(config):
+    try:
+        return max(1, int(config.get('page_concurrency', 1)))
+    except (TypeError, ValueError):
+        return 1
+
+def run_accounts(worker, accounts, max_workers):
+    if max_workers <= 1:
+        return [worker(account_idx, account) for account_idx, account in enumerate(accounts)]
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(worker, account_idx, account) for account_idx, account in enumerate(accounts)]
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 def check_config():
     if not os.path.exists(config_path):
@@ -63,12 +115,13 @@ def refresh_token_cloud(auth_client, account, config):
             data = result.get('data', {})
             if data.get('code') == 200:
                 user_data = data['data']['user']
-                account['TOKEN'] = user_data['token']
-                account['nickname'] = user_data.get('nickname', account.get('nickname', ''))
-                account['avatar'] = user_data.get('avatar', account.get('avatar', ''))
-                account['integral'] = user_data.get('integral', account.get('integral', 0))
-                account['login_ip'] = user_data.get('login_ip', account.get('login_ip', ''))
-                account['updated_at'] = user_data.get('updated_at', account.get('updated_at', ''))
+                with config_lock:
+                    account['TOKEN'] = user_data['token']
+                    account['nickname'] = user_data.get('nickname', account.get('nickname', ''))
+                    account['avatar'] = user_data.get('avatar', account.get('avatar', ''))
+                    account['integral'] = user_data.get('integral', account.get('integral', 0))
+                    account['login_ip'] = user_data.get('login_ip', account.get('login_ip', ''))
+                    account['updated_at'] = user_data.get('updated_at', account.get('updated_at', ''))
                 return True, "Token更新成功"
             else:
                 return False, f"请求失败: {data.get('mezsage', '未知错误')}"
@@ -101,27 +154,25 @@ def get_article_list_cloud(auth_client, account, config, published_at, page=1):
     except Exception as e:
         return False, str(e)
 
-def purchase_item_cloud(auth_client, account, config, item_id):
+def purchase_items_cloud(auth_client, account, config, item_ids):
+    buy_url = config.get('buy_url', 'https://api.zbdk8ws.com')
+    calls = [('ONE', {
+        'action': 'purchase',
+        'token': account['TOKEN'],
+        'user_key': account['USER_KEY'],
+        'buy_url': buy_url,
+        'app_version': config['APP_VERSION'],
+        'platform': config['PLATFORM'],
+        'item_id': item_id
+    }) for item_id in item_ids]
+
     try:
-        buy_url = config.get('buy_url', 'https://api.zbdk8ws.com')
-        
-        result = auth_client.call_service(
-            'ONE',
-            action='purchase',
-            token=account['TOKEN'],
-            user_key=account['USER_KEY'],
-            buy_url=buy_url,
-            app_version=config['APP_VERSION'],
-            platform=config['PLATFORM'],
-            item_id=item_id
-        )
-        
-        if result.get('success'):
-            return True, result.get('data', {})
-        else:
-            return False, result.get('error', '未知错误')
+        results = auth_client.call_service_batch(calls)
     except Exception as e:
-        return False, str(e)
+        return [(False, str(e)) for _ in item_ids]
+
+    return [(True, result.get('data', {})) if result.get('success') else (False, result.get('error', '未知错误'))
+            for result in results]
 
 def clean_empty_accounts(config):
     if 'accounts' in config and isinstance(config['accounts'], list):
@@ -137,6 +188,368 @@ def clean_empty_accounts(config):
     
     return config
 
+# 每月最多请求的页数，每页20条
+MAX_PAGES = 60
+PAGE_SIZE = 20
+
+def month_range(start, end):
+    # 从start逐月向前直到end（包含），如[(2025, 10), (2025, 9), ...]
+    months = []
+    year, month = start
+    while (year, month) >= end:
+        months.append((year, month))
+        year, month = get_previous_month(year, month)
+    return months
+
+def month_end_timestamp(year, month):
+    # 该月份结束（下个月1日0点）的时间戳
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return datetime(next_year, next_month, 1).timestamp()
+
+class ScanCheckpoint:
+    """
+    各账号逐月扫描的进度，保存在config.json同目录的.freePlug_checkpoint.sqlite：
+    每个月份已处理的页数、是否已扫描到月份末尾、见过的最大点播ID，以及上次完整扫描的时间。
+    每处理完一页就写入，脚本被中断后下次运行从断点继续。
+    """
+
+    def __init__(self, path):
+        import sqlite3
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS months (user_key TEXT, month TEXT, pages INTEGER, '
+                         'exhausted INTEGER, max_id INTEGER, updated_at REAL, scanned_at REAL, '
+                         'PRIMARY KEY (user_key, month))')
+        self._db.execute('CREATE TABLE IF NOT EXISTS accounts (user_key TEXT PRIMARY KEY, '
+                         'full_started REAL, full_finished REAL)')
+        self._db.commit()
+
+    @classmethod
+    def open(cls, config):
+        if not config.get('checkpoint', True):
+            return None
+        import sqlite3
+        path = os.path.join(os.path.dirname(os.path.abspath(config_path)), '.freePlug_checkpoint.sqlite')
+        try:
+            return cls(path)
+        except sqlite3.Error as e:
+            print(f"⚠️ 无法打开扫描进度文件{path}，本次完整扫描: {e}")
+            return None
+
+    def months(self, user_key):
+        with self._lock:
+            rows = self._db.execute('SELECT month, pages, exhausted, max_id, updated_at, scanned_at '
+                                    'FROM months WHERE user_key = ?', (user_key,)).fetchall()
+        return {row[0]: {'pages': row[1], 'exhausted': bool(row[2]), 'max_id': row[3],
+                         'updated_at': row[4], 'scanned_at': row[5]} for row in rows}
+
+    def full_scan(self, user_key):
+        with self._lock:
+            row = self._db.execute('SELECT full_started, full_finished FROM accounts WHERE user_key = ?',
+                                   (user_key,)).fetchone()
+        return row or (None, None)
+
+    def _write(self, sql, params):
+        with self._lock:
+            self._db.execute(sql, params)
+            self._db.commit()
+
+    def start_full_scan(self, user_key, started):
+        self._write('INSERT INTO accounts (user_key, full_started) VALUES (?, ?) '
+                    'ON CONFLICT(user_key) DO UPDATE SET full_started = excluded.full_started', (user_key, started))
+
+    def finish_full_scan(self, user_key):
+        self._write('UPDATE accounts SET full_finished = full_started, full_started = NULL WHERE user_key = ?',
+                    (user_key,))
+
+    def start_month(self, user_key, month):
+        # 从第1页重新扫描，之前的页数作废，最大ID保留
+        self._write('INSERT INTO months (user_key, month, pages, exhausted, max_id, updated_at) '
+                    'VALUES (?, ?, 0, 0, 0, ?) ON CONFLICT(user_key, month) DO UPDATE SET '
+                    'pages = 0, exhausted = 0, updated_at = excluded.updated_at', (user_key, month, time.time()))
+
+    def page_done(self, user_key, month, page, max_id):
+        self._write('UPDATE months SET pages = ?, max_id = MAX(max_id, ?), updated_at = ? '
+                    'WHERE user_key = ? AND month = ?', (page, max_id, time.time(), user_key, month))
+
+    def finish_month(self, user_key, month, max_id=0):
+        now = time.time()
+        self._write('INSERT INTO months (user_key, month, pages, exhausted, max_id, updated_at, scanned_at) '
+                    'VALUES (?, ?, 0, 1, ?, ?, ?) ON CONFLICT(user_key, month) DO UPDATE SET exhausted = 1, '
+                    'max_id = MAX(max_id, excluded.max_id), updated_at = excluded.updated_at, '
+                    'scanned_at = excluded.scanned_at', (user_key, month, max_id, now, now))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def plan_months(months, checkpoint, user_key, full_scan_days, now=None):
+    """
+    根据扫描进度决定本次要扫描的月份，返回(计划, 是否完整扫描, 完整扫描开始时间)，计划中每项为
+    (年, 月, 起始页, 最大ID)：最大ID不为None时只检查新增的点播，遇到全部不超过该ID的页即停止
+    """
+    if checkpoint is None:
+        return [(year, month, 1, None) for year, month in months], True, None
+
+    now = now or time.time()
+    records = checkpoint.months(user_key)
+    full_started, full_finished = checkpoint.full_scan(user_key)
+    full = full_started is not None or full_finished is None or now - full_finished >= full_scan_days * 86400
+    if full and full_started is None:
+        full_started = now
+
+    plan = []
+    for year, month in months:
+        record = records.get(f"{year}-{month}")
+        if full:
+            # 完整扫描：跳过本轮已完成的月份，本轮中断的月份从断点继续
+            if record and record['updated_at'] and record['updated_at'] >= full_started:
+                if record['exhausted']:
+                    continue
+                plan.append((year, month, record['pages'] + 1, None))
+            else:
+                plan.append((year, month, 1, None))
+        elif record is None:
+            plan.append((year, month, 1, None))
+        elif not record['exhausted']:
+            plan.append((year, month, record['pages'] + 1, None))
+        elif record['scanned_at'] and record['scanned_at'] < month_end_timestamp(year, month):
+            # 上次扫描时该月份尚未结束，之后可能有新的点播
+            plan.append((year, month, 1, record['max_id'] or 0))
+    return plan, full, full_started
+
+class PageFetcher:
+    """
+    按顺序返回一个账号各月份的点播列表，后台最多同时请求concurrency页：
+    优先向后预取当前月份的页，空余的额度预取之后月份的第1页（每个月份都需要请求）。
+    当前月份预取不超过上个月份的页数，超过后每次加倍，避免页数少的月份浪费请求；
+    某页不足20条说明当前月份已结束，为该月份多预取的页会被取消，已经发出的请求结果直接丢弃。
+    """
+
+    def __init__(self, auth_client, account, config, months, concurrency):
+        # months中每项为(年, 月, 起始页, ...)
+        self.auth_client = auth_client
+        self.account = account
+        self.config = config
+        self.months = months
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+        self.pending = {}
+        self.generation = 0
+        self.last_pages = 1
+        self.requested = 0
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def _fetch(self, month_index, page):
+        year, month = self.months[month_index][:2]
+        # 记下请求时的Token版本，预取的页因Token刷新而失败时可以重新请求
+        generation = self.generation
+        with self._lock:
+            self.requested += 1
+        success, data = get_article_list_cloud(
+            self.auth_client, self.account, self.config, f"20;{year - 2020}-{month}", page
+        )
+        return generation, success, data
+
+    def _fill(self, month_index, page):
+        start = self.months[month_index][2]
+        count = page - start + 1
+        horizon = start - 1 + (self.last_pages if count <= self.last_pages else 2 * count - 1)
+        wanted = [(month_index, p) for p in range(page, min(page + self.concurrency, horizon + 1, MAX_PAGES + 1))]
+        wanted += [(m, self.months[m][2]) for m in range(month_index + 1, len(self.months))]
+        # 只限制正在请求的页数，已返回但还没轮到处理的页不占额度
+        in_flight = sum(not future.done() for future in self.pending.values())
+        for key in wanted:
+            if in_flight >= self.concurrency:
+                break
+            if key not in self.pending:
+                in_flight += 1
+                self.pending[key] = self.executor.submit(self._fetch, *key)
+
+    def _cancel(self, keep):
+        for key in [key for key in self.pending if not keep(key)]:
+            self.pending.pop(key).cancel()
+
+    def month_pages(self, month_index):
+        """逐页返回(页码, 是否成功, 数据)，调用方遇到最后一页时跳出循环，剩余的预取随之取消"""
+        start = self.months[month_index][2]
+        count = 0
+        try:
+            for page in range(start, MAX_PAGES + 1):
+                if self.executor is None:
+                    _, success, data = self._fetch(month_index, page)
+                else:
+                    self._fill(month_index, page)
+                    future = self.pending.pop((month_index, page), None)
+                    try:
+                        generation, success, data = future.result() if future else self._fetch(month_index, page)
+                    except CancelledError:
+                        generation, success, data = self._fetch(month_index, page)
+                    if not success and generation < self.generation:
+                        _, success, data = self._fetch(month_index, page)
+                self.used += 1
+                count += 1
+                yield page, success, data
+        finally:
+            self.last_pages = max(count, 1)
+            if self.executor is not None:
+                self._cancel(lambda key: key[0] > month_index)
+
+    def token_refreshed(self):
+        self.generation += 1
+
+    def close(self):
+        if self.executor is not None:
+            self._cancel(lambda key: False)
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+def process_account(auth_client, config, account_idx, account, start, end, totals, checkpoint=None, seen=None):
+    current_year, current_month = start
+    end_year, end_month = end
+    account_name = account.get('nickname', f'账号{account_idx+1}')
+    user_key = account['USER_KEY']
+    print(f"\n开始为 {account_name} 执行白嫖操作...")
+    
+    # 先刷新Token
+    success, message = refresh_token_cloud(auth_client, account, config)
+    if success:
+        print(f"{account_name} Token刷新成功")
+        # 更新配置
+        with config_lock:
+            config['accounts'][account_idx] = account
+            write_config(config)
+    else:
+        emit(account_name, 'failure', f"Token刷新失败: {message}")
+        return
+    
+    # 根据扫描进度只扫描新的月份、上次未完成的月份和可能有新点播的月份
+    months = month_range((current_year, current_month), (end_year, end_month))
+    plan, full_scan, full_started = plan_months(months, checkpoint, user_key, get_full_scan_days(config))
+    if checkpoint is not None:
+        if full_scan:
+            checkpoint.start_full_scan(user_key, full_started)
+            print(f"{account_name}: 本次完整扫描{len(plan)}个月份")
+        if len(plan) < len(months):
+            print(f"⏭️ {account_name}: 跳过{len(months) - len(plan)}个已扫描完成的月份")
+    
+    fetcher = PageFetcher(auth_client, account, config, plan, get_page_concurrency(config))
+    started = time.perf_counter()
+    all_exhausted = True
+    
+    try:
+        for month_index, (scan_year, scan_month, start_page, known_max_id) in enumerate(plan):
+            month_key = f"{scan_year}-{scan_month}"
+            if known_max_id is not None:
+                print(f"{account_name}: 检查 {scan_year}年{scan_month}月 新增的点播...")
+            elif start_page > 1:
+                print(f"{account_name}: 从第 {start_page} 页继续扫描 {scan_year}年{scan_month}月 的数据...")
+            else:
+                print(f"{account_name}: 开始扫描 {scan_year}年{scan_month}月 的数据...")
+                if checkpoint is not None:
+                    checkpoint.start_month(user_key, month_key)
+            
+            month_purchase_count = 0  # 本月购买成功的数量
+            month_max_id = 0
+            exhausted = False
+            
+            # 每月最多请求60页，页面由fetcher按顺序返回（可能已在后台预取）
+            with closing(fetcher.month_pages(month_index)) as pages:
+                for page, success, data in pages:
+                    if not success:
+                        emit(account_name, 'failure', f"{scan_year}年{scan_month}月 第 {page} 页请求失败: {data}",
+                             month=month_key, page=page)
+                        break
+                    
+                    # 如果没有数据，跳过当前月
+                    if not data.get('data'):
+                        exhausted = True
+                        break
+                    
+                    page_max_id = max(item['id'] for item in data['data'])
+                    month_max_id = max(month_max_id, page_max_id)
+                    
+                    # 查找buy和coin同时为0的数据
+                    buyable_items = [item for item in data['data'] if item['buy'] == 0 and item['coin'] == '0']
+                    
+                    # 之前已购买成功或多次失败的点播不再请求购买
+                    if seen is not None and buyable_items:
+                        skip = seen.skip_ids(user_key, [item['id'] for item in buyable_items])
+                        if skip:
+                            buyable_items = [item for item in buyable_items if item['id'] not in skip]
+                            with config_lock:
+                                totals['avoided'] = totals.get('avoided', 0) + len(skip)
+                    
+                    if buyable_items:
+                        # 本页所有点播合并为一次批量购买请求
+                        purchase_results = purchase_items_cloud(auth_client, account, config, [item['id'] for item in buyable_items])
+                        
+                        outcomes = []
+                        for item, (success, buy_data) in zip(buyable_items, purchase_results):
+                            buy_title = item['title']
+                            
+                            # ONE接口返回code为200才算购买成功
+                            if purchase_succeeded(success, buy_data):
+                                result = buy_data.get('mezsage', '未知')
+                                emit(account_name, 'purchase', f"购买成功 - {buy_title} ({result})",
+                                     item_id=item['id'], title=buy_title, month=month_key)
+                                month_purchase_count += 1
+                                with config_lock:
+                                    totals['purchase_count'] += 1
+                            else:
+                                result = buy_data.get('mezsage', buy_data) if isinstance(buy_data, dict) else buy_data
+                                emit(account_name, 'failure', f"购买失败 - {buy_title} ({result})",
+                                     item_id=item['id'], title=buy_title, month=month_key)
+                            # 云端调用失败时ONE接口没有返回结果，不计入购买记录
+                            if success:
+                                outcomes.append((item['id'], purchase_succeeded(success, buy_data)))
+                        
+                        if seen is not None and outcomes:
+                            seen.record(user_key, outcomes)
+                    
+                    # 只检查新增点播时，本页没有比上次更新的点播说明之后的页都已处理过
+                    if known_max_id is not None:
+                        if page_max_id <= known_max_id:
+                            exhausted = True
+                            break
+                    elif checkpoint is not None:
+                        checkpoint.page_done(user_key, month_key, page, page_max_id)
+                    
+                    # 如果是最后一页，跳出循环
+                    if len(data['data']) < PAGE_SIZE or page == MAX_PAGES:
+                        exhausted = True
+                        break
+            
+            if checkpoint is not None and exhausted:
+                checkpoint.finish_month(user_key, month_key, month_max_id)
+            all_exhausted = all_exhausted and exhausted
+            
+            if month_purchase_count > 0:
+                print(f"📊 {account_name}: {scan_year}年{scan_month}月 共购买成功 {month_purchase_count} 个点播")
+            
+            # 请求完当前月份后，刷新当前账号TOKEN
+            success, message = refresh_token_cloud(auth_client, account, config)
+            if success:
+                fetcher.token_refreshed()
+                with config_lock:
+                    config['accounts'][account_idx] = account
+                    write_config(config)
+        
+        if checkpoint is not None and full_scan and all_exhausted:
+            checkpoint.finish_full_scan(user_key)
+        if months:
+            print(f"{account_name}: 已达到结束月份 {end_year}年{end_month}月，结束扫描。")
+    finally:
+        fetcher.close()
+        elapsed = time.perf_counter() - started
+        with config_lock:
+            totals['pages'] = totals.get('pages', 0) + fetcher.used
+            totals['page_requests'] = totals.get('page_requests', 0) + fetcher.requested
+            totals['skipped_months'] = totals.get('skipped_months', 0) + len(months) - len(plan)
+        if fetcher.used:
+            print(f"📄 {account_name}: 获取{fetcher.used}页列表，{fetcher.used / max(elapsed, 1e-6):.1f}页/秒")
+
 def main():
     # 检查配置文件
     if not check_config():
@@ -171,104 +584,48 @@ def main():
     if enable_notify:
         try:
             from SendNotify import start_capture, stop_capture_and_notify
-            start_capture()
+            # 通知内容由emit()记录的结果生成，不再拦截print
+            start_capture(events=True)
             print("✅ SendNotify通知已启用\n")
         except ImportError:
             print("⚠️ 未找到SendNotify.py模块，将不发送通知\n")
             enable_notify = False
     
-    # 统计购买成功的数量
-    total_purchase_count = 0
+    # 统计购买成功的数量，并发处理时由各账号线程在config_lock内累加
+    totals = {'purchase_count': 0, 'pages': 0, 'page_requests': 0, 'skipped_months': 0, 'avoided': 0}
+    started = time.perf_counter()
+    checkpoint = ScanCheckpoint.open(config)
+    seen = SeenItems.open(config, config_path) if SeenItems else None
     
     try:
         auth_client = cloud_auth.get_auth_client()
         
+        # 并发处理账号、并发请求列表页时，连接池大小与同时发出的请求数一致
+        max_workers = get_max_workers(config)
+        page_concurrency = get_page_concurrency(config)
+        if max_workers * page_concurrency > 1:
+            auth_client.set_pool_size(max_workers * page_concurrency)
+        
         # 为每个账号执行白嫖操作
-        for account_idx, account in enumerate(config['accounts']):
-            account_name = account.get('nickname', f'账号{account_idx+1}')
-            print(f"\n开始为 {account_name} 执行白嫖操作...")
-            
-            # 先刷新Token
-            success, message = refresh_token_cloud(auth_client, account, config)
-            if success:
-                print(f"{account_name} Token刷新成功")
-                # 更新配置
-                config['accounts'][account_idx] = account
-                write_config(config)
-            else:
-                print(f"❌ {account_name} Token刷新失败: {message}")
-                continue
-            
-            # 重置当前年月
-            scan_year, scan_month = current_year, current_month
-            
-            while (scan_year > end_year) or (scan_year == end_year and scan_month >= end_month):
-                published_at = f"20;{scan_year - 2020}-{scan_month}"
-                
-                print(f"{account_name}: 开始扫描 {scan_year}年{scan_month}月 的数据...")
-                
-                # 每月请求60页
-                page = 1
-                has_data = True  # 标记当前月份是否有数据
-                month_purchase_count = 0  # 本月购买成功的数量
-                
-                while page <= 60 and has_data:
-                    # 获取文章列表
-                    success, data = get_article_list_cloud(auth_client, account, config, published_at, page)
-                    
-                    if not success:
-                        print(f"❌ {account_name}: {scan_year}年{scan_month}月 第 {page} 页请求失败: {data}")
-                        break
-                    
-                    # 如果没有数据，跳过当前月
-                    if not data.get('data'):
-                        has_data = False
-                        break
-                    
-                    # 查找buy和coin同时为0的数据
-                    buyable_items = [item for item in data['data'] if item['buy'] == 0 and item['coin'] == '0']
-                    
-                    if buyable_items:
-                        for item in buyable_items:
-                            buy_id = item['id']
-                            buy_title = item['title']
-                            
-                            # 执行购买
-                            success, buy_data = purchase_item_cloud(auth_client, account, config, buy_id)
-                            
-                            if success:
-                                result = buy_data.get('mezsage', '未知')
-                                print(f"✅ {account_name}: 购买成功 - {buy_title} ({result})")
-                                month_purchase_count += 1
-                                total_purchase_count += 1
-                            else:
-                                print(f"❌ {account_name}: 购买失败 - {buy_title} ({buy_data})")
-                    
-                    # 如果是最后一页，跳出循环
-                    if len(data['data']) < 20:
-                        break
-                    
-                    # 增加页数，继续请求下一页
-                    page += 1
-                
-                if month_purchase_count > 0:
-                    print(f"📊 {account_name}: {scan_year}年{scan_month}月 共购买成功 {month_purchase_count} 个点播")
-                
-                # 请求完当前月份后，刷新当前账号TOKEN
-                success, message = refresh_token_cloud(auth_client, account, config)
-                if success:
-                    config['accounts'][account_idx] = account
-                    write_config(config)
-                
-                # 更新当前月份为前一个月
-                scan_year, scan_month = get_previous_month(scan_year, scan_month)
-                
-                # 如果已经到达结束月份，退出循环
-                if (scan_year < end_year) or (scan_year == end_year and scan_month < end_month):
-                    print(f"{account_name}: 已达到结束月份 {end_year}年{end_month}月，结束扫描。")
-                    break
+        run_accounts(
+            lambda account_idx, account: process_account(
+                auth_client, config, account_idx, account,
+                (current_year, current_month), (end_year, end_month), totals, checkpoint, seen
+            ),
+            config['accounts'],
+            max_workers
+        )
+        total_purchase_count = totals['purchase_count']
         
         print("\n====== ONE插件白嫖脚本执行完成 ======")
+        elapsed = time.perf_counter() - started
+        discarded = totals['page_requests'] - totals['pages']
+        print(f"📄 共获取{totals['pages']}页列表，{totals['pages'] / max(elapsed, 1e-6):.1f}页/秒"
+              f"（每个账号同时请求{page_concurrency}页" + (f"，{discarded}页预取未使用" if discarded > 0 else "") + "）")
+        if totals['skipped_months']:
+            print(f"⏭️ 根据扫描进度共跳过{totals['skipped_months']}个已完成的月份")
+        if totals['avoided']:
+            print(f"🗂️ 根据购买记录跳过{totals['avoided']}次购买请求（已购买或多次失败的点播）")
         
         if total_purchase_count > 0:
             print(f"🎉 本次共成功购买 {total_purchase_count} 个点播")
@@ -285,10 +642,12 @@ def main():
     
     except KeyboardInterrupt:
         print("\n⚠️  脚本被用户中断")
+        if checkpoint is not None:
+            print("💾 扫描进度已保存，下次运行将从中断处继续")
         # 中断时如果有购买成功也发送通知
         if enable_notify:
             try:
-                if 'total_purchase_count' in locals() and total_purchase_count > 0:
+                if totals['purchase_count'] > 0:
                     from SendNotify import stop_capture_and_notify
                     stop_capture_and_notify("ONE插件白嫖脚本执行结果")
                 else:
@@ -297,11 +656,11 @@ def main():
             except:
                 pass
     except Exception as e:
-        print(f"❌ 执行脚本时出现未处理的异常: {e}")
+        emit(None, 'failure', f"执行脚本时出现未处理的异常: {e}")
         # 异常时如果有购买成功才发送通知
         if enable_notify:
             try:
-                if 'total_purchase_count' in locals() and total_purchase_count > 0:
+                if totals['purchase_count'] > 0:
                     from SendNotify import stop_capture_and_notify
                     stop_capture_and_notify("ONE插件白嫖脚本执行结果")
                 else:
@@ -309,6 +668,11 @@ def main():
                     _global_output_capture.stop_capture()
             except:
                 pass
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+        if seen is not None:
+            seen.close()
 
 if __name__ == "__main__":
     main()
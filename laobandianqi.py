@@ -8,12 +8,14 @@
 　　变量名：laobandianqi
 　　变量值：x-user-token
 　　多个账号间用#分隔：x-user-token1#x-user-token2
+　　可选变量：laobandianqi_concurrency，同时处理的账号数，默认1
 Token获取：打开小程序登录，抓包域名https://aio.myroki.com 请求头中的x-user-token的值
 """
 
 import os
 import sys
 import time
+import asyncio
 from typing import Optional, Dict, Any
 
 try:
@@ -42,6 +44,15 @@ except ImportError:
     def stop_capture_and_notify(title=""):
         pass
 
+try:
+    from SendNotify import emit
+    EVENTS_ENABLED = True
+except ImportError:
+    # 旧版SendNotify.py没有结构化事件，结果只输出到控制台，通知内容仍来自捕获的输出
+    EVENTS_ENABLED = False
+    def emit(account, kind, message="", **fields):
+        print(message if account is None else f"{account}: {message}")
+
 
 class LaoBanDianQi:
     def __init__(self):
@@ -50,12 +61,22 @@ class LaoBanDianQi:
         self.nonce = "1234567890123456"
 
         self.user_tokens = self._load_user_tokens()
+        # 同时处理的账号数，默认逐个处理
+        self.concurrency = self._load_concurrency()
+        self.auth_client = None
 
+    async def _init_auth_client(self):
         try:
-            self.auth_client = cloud_auth.get_auth_client()
+            self.auth_client = await cloud_auth.get_async_auth_client()
         except Exception as e:
             print(f"❌ 初始化认证客户端失败: {e}")
             sys.exit(1)
+
+    def _load_concurrency(self) -> int:
+        try:
+            return max(1, int(os.getenv('laobandianqi_concurrency', '1')))
+        except ValueError:
+            return 1
     
     def _load_user_tokens(self) -> list:
         token_env = os.getenv('laobandianqi')
@@ -73,9 +94,9 @@ class LaoBanDianQi:
     def _get_timestamp(self) -> int:
         return int(time.time() * 1000)
     
-    def _get_auth_info(self, timestamp: int) -> Dict[str, str]:
+    async def _get_auth_info(self, timestamp: int) -> Dict[str, str]:
         try:
-            response = self.auth_client.call_service(
+            response = await self.auth_client.call_service(
                 self.mod,
                 timestamp=timestamp
             )
@@ -171,10 +192,12 @@ class LaoBanDianQi:
         print(f"处理第 {user_index + 1} 个账号")
         print(f"{'='*30}")
         
+        account = f"账号{user_index + 1}"
         timestamp = self._get_timestamp()
         try:
-            auth_info = self._get_auth_info(timestamp)
-        except Exception:
+            auth_info = await self._get_auth_info(timestamp)
+        except Exception as e:
+            emit(account, 'failure', f"获取认证信息失败: {e}")
             return
         
         get_headers = self._build_headers(
@@ -196,14 +219,15 @@ class LaoBanDianQi:
         async with httpx.AsyncClient(http2=True, timeout=30.0) as client:
             user_profile = await self.get_user_profile(client, get_headers)
             if not user_profile:
+                emit(account, 'failure', "获取用户信息失败，请检查Token是否有效")
                 return
             
             nick_name = user_profile.get('nickName', '未知用户')
             today_is_check_in = user_profile.get('todayIsCheckIn', 0)
             
             if today_is_check_in == 1:
-                print(f"【{nick_name}】Token有效，今日已签到")
-                await self._show_points_info(client, get_headers)
+                emit(account, 'signin', f"【{nick_name}】Token有效，今日已签到", nickname=nick_name, already=True)
+                await self._show_points_info(client, get_headers, account)
                 return
             else:
                 print(f"【{nick_name}】Token有效，今日未签到")
@@ -211,30 +235,46 @@ class LaoBanDianQi:
             check_in_result = await self.check_in(client, post_headers)
             if check_in_result:
                 consecutive_days = check_in_result.get('consecutiveDays', 0)
-                print(f"✅ 签到成功，已连续签到{consecutive_days}天")
+                emit(account, 'signin', f"【{nick_name}】签到成功，已连续签到{consecutive_days}天",
+                     nickname=nick_name, consecutive_days=consecutive_days)
                 
-                await self._show_points_info(client, get_headers)
+                await self._show_points_info(client, get_headers, account)
+            else:
+                emit(account, 'failure', f"【{nick_name}】签到失败")
     
-    async def _show_points_info(self, client: httpx.AsyncClient, headers: Dict[str, str]):
+    async def _show_points_info(self, client: httpx.AsyncClient, headers: Dict[str, str], account: str):
         user_profile = await self.get_user_profile(client, headers)
         if user_profile:
             points = user_profile.get('points', 0)
             expiring_points = user_profile.get('expiringPoints', 0)
             
             if expiring_points > 0:
-                print(f"📊 当前积分{points}，有{expiring_points}积分即将过期")
+                emit(account, 'points', f"当前积分{points}，有{expiring_points}积分即将过期",
+                     points=points, expiring_points=expiring_points)
             else:
-                print(f"📊 当前积分{points}")
+                emit(account, 'points', f"当前积分{points}", points=points)
     
     async def run(self):
-        if NOTIFICATION_ENABLED:
+        if NOTIFICATION_ENABLED and EVENTS_ENABLED:
+            # 通知内容由emit()记录的结果生成，不再拦截print
+            start_capture(events=True)
+        elif NOTIFICATION_ENABLED:
             start_capture()
             
         print("🟢 老板电器签到脚本启动")
         print(f"📋️ 共找到 {len(self.user_tokens)} 个账号")
-        
-        for i, token in enumerate(self.user_tokens):
-            await self.process_user(token, i)
+
+        await self._init_auth_client()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(token, index):
+            async with semaphore:
+                await self.process_user(token, index)
+
+        try:
+            await asyncio.gather(*(limited(token, i) for i, token in enumerate(self.user_tokens)))
+        finally:
+            await self.auth_client.aclose()
         
         print(f"\n{'='*30}")
         print("✅ 所有账号处理完成")
@@ -250,15 +290,14 @@ async def main():
         client = LaoBanDianQi()
         await client.run()
     except KeyboardInterrupt:
-        print("\n❌ 脚本被用户中断")
+        emit(None, 'warning', "脚本被用户中断")
         if NOTIFICATION_ENABLED:
             stop_capture_and_notify("老板电器脚本中断")
     except Exception as e:
-        print(f"❌ 脚本运行出错: {e}")
+        emit(None, 'failure', f"脚本运行出错: {e}")
         if NOTIFICATION_ENABLED:
             stop_capture_and_notify("老板电器脚本运行错误")
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ONE点播购买记录
+freeBuy.py与freePlug.py共用，保存在config.json同目录的.one_seen_items.sqlite，按账号（USER_KEY）记录每个点播的购买结果：
+- 已购买成功的点播不再请求购买
+- 连续失败SEEN_MAX_FAILURES次的点播在SEEN_FAILURE_COOLDOWN秒内跳过，之后再尝试
+在config.json中设置"seen_index": false可关闭
+"""
+
+import os
+import time
+import threading
+
+SEEN_FILE_NAME = '.one_seen_items.sqlite'
+SEEN_MAX_FAILURES = 3
+SEEN_FAILURE_COOLDOWN = 7 * 86400
+
+
+def purchase_succeeded(success, buy_data):
+    """云端调用成功且ONE接口返回code为200时才算购买成功，code不为200（如已购买、余额不足）记为失败"""
+    return bool(success) and isinstance(buy_data, dict) and buy_data.get('code') == 200
+
+
+class SeenItems:
+    """各账号点播的购买结果，可被多个线程共享；文件读写失败时不再跳过任何点播，不影响购买"""
+
+    def __init__(self, path):
+        import sqlite3
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS items (user_key TEXT, item_id INTEGER, purchased INTEGER, '
+                         'failures INTEGER, updated_at REAL, PRIMARY KEY (user_key, item_id)) WITHOUT ROWID')
+        self._db.commit()
+
+    @classmethod
+    def open(cls, config, config_path):
+        """config中seen_index为false或文件无法打开时返回None"""
+        if not config.get('seen_index', True):
+            return None
+        import sqlite3
+        path = os.path.join(os.path.dirname(os.path.abspath(config_path)), SEEN_FILE_NAME)
+        try:
+            return cls(path)
+        except sqlite3.Error as e:
+            print(f"⚠️ 无法打开购买记录文件{path}，本次不跳过已处理的点播: {e}")
+            return None
+
+    def _disable(self, error):
+        print(f"⚠️ 读写购买记录文件失败，本次运行不再跳过已处理的点播: {error}")
+        try:
+            self._db.close()
+        except Exception:
+            pass
+        self._db = None
+
+    def skip_ids(self, user_key, item_ids):
+        """返回item_ids中无需再请求购买的点播ID"""
+        if not item_ids:
+            return set()
+        import sqlite3
+        placeholders = ','.join('?' * len(item_ids))
+        with self._lock:
+            if self._db is None:
+                return set()
+            try:
+                rows = self._db.execute(
+                    f'SELECT item_id FROM items WHERE user_key = ? AND item_id IN ({placeholders}) '
+                    'AND (purchased = 1 OR (failures >= ? AND updated_at > ?))',
+                    (user_key, *item_ids, SEEN_MAX_FAILURES, time.time() - SEEN_FAILURE_COOLDOWN)
+                ).fetchall()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return set()
+        return {row[0] for row in rows}
+
+    def record(self, user_key, outcomes):
+        """outcomes为[(点播ID, 是否购买成功)]，是否成功应由purchase_succeeded()判断"""
+        import sqlite3
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._db.executemany(
+                    'INSERT INTO items (user_key, item_id, purchased, failures, updated_at) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(user_key, item_id) DO UPDATE SET purchased = MAX(purchased, excluded.purchased), '
+                    'failures = CASE WHEN excluded.purchased = 1 THEN 0 ELSE failures + 1 END, '
+                    'updated_at = excluded.updated_at',
+                    [(user_key, item_id, int(success), 0 if success else 1, now) for item_id, success in outcomes]
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._disable(e)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -8,6 +8,7 @@
     变量名：sxyjy
     变量值：Xyjy-Auth的值
     多个账号用#分隔：Xyjy-Auth1#Xyjy-Auth2
+    可选变量：sxyjy_concurrency，同时处理的账号数，默认1
 说明：登录小程序，任意选择社区/职业，注册后开启抓包，随便点一下页面，抓包任意https://xy-api-jswm.gxshiyang.cn 网址请求头中的Xyjy-Auth的值。
 """
 
@@ -15,6 +16,7 @@ import os
 import sys
 import time
 import random
+import asyncio
 from typing import Optional, Dict, Any, List
 
 try:
@@ -30,14 +32,22 @@ except ImportError:
     print("访问https://github.com/3ixi/CloudScripts获取")
     sys.exit(1)
 
+def _print_event(account, kind, message="", **fields):
+    # 没有SendNotify.py或旧版没有结构化事件时，结果只输出到控制台
+    print(message if account is None else f"{account}: {message}")
+
 try:
     import SendNotify as _sn
     SendNotify = getattr(_sn, 'SendNotify', lambda title="", content="": None)
     start_capture = getattr(_sn, 'start_capture', lambda: None)
     stop_capture_and_notify = getattr(_sn, 'stop_capture_and_notify', lambda title="": None)
+    emit = getattr(_sn, 'emit', _print_event)
     NOTIFICATION_ENABLED = hasattr(_sn, 'SendNotify')
+    EVENTS_ENABLED = hasattr(_sn, 'emit')
 except ImportError:
     NOTIFICATION_ENABLED = False
+    EVENTS_ENABLED = False
+    emit = _print_event
     def SendNotify(title="", content=""):
         return None
     def start_capture():
@@ -52,13 +62,23 @@ class ShiXiaoYang:
         self.mod = "shiyang"
 
         self.user_tokens = self._load_user_tokens()
+        # 同时处理的账号数，默认逐个处理
+        self.concurrency = self._load_concurrency()
+        self.auth_client = None
 
+    async def _init_auth_client(self):
         try:
-            self.auth_client = cloud_auth.get_auth_client()
+            self.auth_client = await cloud_auth.get_async_auth_client()
         except Exception as e:
             print(f"❌ 初始化认证客户端失败: {e}")
             sys.exit(1)
 
+    def _load_concurrency(self) -> int:
+        try:
+            return max(1, int(os.getenv('sxyjy_concurrency', '1')))
+        except ValueError:
+            return 1
+
     def _load_user_tokens(self) -> List[str]:
         token_env = os.getenv('sxyjy')
         if not token_env:
@@ -90,9 +110,9 @@ class ShiXiaoYang:
         }
         return headers
 
-    def _decrypt_response(self, raw_text: str) -> Optional[Dict[str, Any]]:
+    async def _decrypt_response(self, raw_text: str) -> Optional[Dict[str, Any]]:
         try:
-            resp = self.auth_client.call_service(self.mod, encrypted=raw_text)
+            resp = await self.auth_client.call_service(self.mod, encrypted=raw_text)
 
             if isinstance(resp, dict):
                 if 'code' in resp:
@@ -111,7 +131,7 @@ class ShiXiaoYang:
             r = await client.get(url, headers=headers)
             r.raise_for_status()
             raw = r.text
-            decrypted = self._decrypt_response(raw)
+            decrypted = await self._decrypt_response(raw)
             if not decrypted:
                 print("❌ 解密后内容无效")
                 return None
@@ -131,7 +151,7 @@ class ShiXiaoYang:
             r = await client.post(url, headers=local_headers, content=body_bytes)
             r.raise_for_status()
             raw = r.text
-            decrypted = self._decrypt_response(raw)
+            decrypted = await self._decrypt_response(raw)
             if not decrypted:
                 print("❌ 解密后内容无效")
                 return None
@@ -154,11 +174,27 @@ class ShiXiaoYang:
             print(f"❌ POST请求失败: {e}")
             return None
 
+    async def _print_rewards(self, pending_rewards: List[tuple], account: str):
+        calls = [(self.mod, {'encrypted': reward_raw}) for _, reward_raw in pending_rewards]
+        try:
+            results = await self.auth_client.call_service_batch(calls)
+        except Exception as e:
+            results = [{'success': False, 'error': str(e)} for _ in calls]
+
+        for (task_name, reward_raw), result in zip(pending_rewards, results):
+            if result.get('success'):
+                reward_decrypted = result.get('data') if 'data' in result else result
+            else:
+                emit(account, 'warning', f"任务【{task_name}】奖励解密失败: {result.get('error', '未知错误')}", task=task_name)
+                reward_decrypted = reward_raw
+            emit(account, 'reward', f"任务【{task_name}】奖励领取成功: {reward_decrypted}", task=task_name, reward=reward_decrypted)
+
     async def process_user(self, user_token: str, user_index: int):
         print(f"\n{'='*30}")
         print(f"处理第 {user_index + 1} 个账号")
         print(f"{'='*30}")
 
+        account = f"账号{user_index + 1}"
         async with httpx.AsyncClient(http2=True, timeout=30.0) as client:
             # 1. 获取账号信息
             ts = self._get_timestamp()
@@ -166,16 +202,17 @@ class ShiXiaoYang:
             headers = self._build_headers(user_token, "GET")
             info = await self._get_and_decrypt(client, path, headers)
             if not info:
+                emit(account, 'failure', "获取账号信息失败")
                 return
 
             if info.get('code') != 200:
-                print(f"❌ {info.get('msg')}")
+                emit(account, 'failure', f"{info.get('msg')}")
                 return
 
             data = info.get('data', {})
             user_name = data.get('userName', '未知用户')
             credit = data.get('credit', 0)
-            print(f"【{user_name}】Token有效，当前积分{credit}")
+            emit(account, 'points', f"【{user_name}】Token有效，当前积分{credit}", username=user_name, points=credit)
 
             # 2. 检查是否签到
             ts = self._get_timestamp()
@@ -183,10 +220,11 @@ class ShiXiaoYang:
             headers = self._build_headers(user_token, "POST")
             rule_resp = await self._post_and_decrypt(client, path, headers, {})
             if not rule_resp:
+                emit(account, 'failure', "获取签到配置失败")
                 return
 
             if rule_resp.get('code') != 200:
-                print(f"❌ {rule_resp.get('msg')}")
+                emit(account, 'failure', f"{rule_resp.get('msg')}")
                 return
 
             rules = rule_resp.get('data', [])
@@ -197,10 +235,10 @@ class ShiXiaoYang:
                     break
 
             if not today_item:
-                print("⚠️ 未找到今日签到配置，跳过")
+                emit(account, 'warning', "未找到今日签到配置，跳过")
             else:
                 if today_item.get('isSign'):
-                    print(f"【{user_name}】已签到，跳过签到")
+                    emit(account, 'signin', f"【{user_name}】已签到，跳过签到", already=True)
                 else:
                     # 提交签到
                     ts = self._get_timestamp()
@@ -209,7 +247,9 @@ class ShiXiaoYang:
                     payload = {"id": str(today_item.get('id','')) , "reward": int(today_item.get('reward',0))}
                     sign_resp = await self._post_and_decrypt(client, path, headers, payload)
                     if sign_resp and sign_resp.get('code') == 200:
-                        print(f"{sign_resp.get('data')}")
+                        emit(account, 'signin', f"{sign_resp.get('data')}", reward=today_item.get('reward'))
+                    else:
+                        emit(account, 'failure', "签到失败")
 
             # 3. 获取未做任务
             ts = self._get_timestamp()
@@ -217,10 +257,11 @@ class ShiXiaoYang:
             headers = self._build_headers(user_token, "GET")
             tasks_resp = await self._get_and_decrypt(client, path, headers)
             if not tasks_resp:
+                emit(account, 'failure', "获取任务列表失败")
                 return
 
             if tasks_resp.get('code') != 200:
-                print(f"❌ {tasks_resp.get('msg')}")
+                emit(account, 'failure', f"{tasks_resp.get('msg')}")
                 return
 
             tasks = tasks_resp.get('data', [])
@@ -242,15 +283,15 @@ class ShiXiaoYang:
                 plain_resp = await self._post_plain(client, path, headers, payload)
                 if plain_resp:
                     msg = plain_resp.get('msg', '')
-                    print(f"任务【{name}】提交完成，{msg}")
+                    emit(account, 'task', f"任务【{name}】提交完成，{msg}", task=name)
                 else:
-                    print(f"任务【{name}】提交失败")
+                    emit(account, 'failure', f"任务【{name}】提交失败", task=name)
 
-                await __import__('asyncio').sleep(random.uniform(1,3))
+                await asyncio.sleep(random.uniform(1,3))
 
             # 等待一段时间让任务状态更新
             print("等待任务状态更新...")
-            await __import__('asyncio').sleep(3)
+            await asyncio.sleep(3)
 
             # 所有待做任务提交完成后，获取已完成待领取奖励的任务列表并尝试领取
             ts = self._get_timestamp()
@@ -258,10 +299,10 @@ class ShiXiaoYang:
             headers = self._build_headers(user_token, "GET")
             finished_resp = await self._get_and_decrypt(client, path, headers)
             if not finished_resp:
-                print("⚠️ 获取已完成任务列表失败或解密失败")
+                emit(account, 'warning', "获取已完成任务列表失败或解密失败")
             else:
                 if finished_resp.get('code') != 200:
-                    print(f"⚠️ 获取已完成任务列表返回错误: {finished_resp.get('msg')}")
+                    emit(account, 'warning', f"获取已完成任务列表返回错误: {finished_resp.get('msg')}")
                 else:
                     finished_tasks = finished_resp.get('data', [])
                     print(f"📋 获取到 {len(finished_tasks)} 个任务状态信息")
@@ -278,12 +319,14 @@ class ShiXiaoYang:
 
                     if len(to_receive) > 0:
                         print("开始领取任务奖励...")
+                        # 加密的奖励内容先收集起来，最后合并为一次批量云解密
+                        pending_rewards = []
                         for item in to_receive:
                             task_name = item.get('name')
                             task_id = item.get('id')
                             print(f"准备领取任务【{task_name}】奖励")
                             if not task_id:
-                                print(f"  ⚠️ 任务【{task_name}】缺少ID，跳过")
+                                emit(account, 'warning', f"任务【{task_name}】缺少ID，跳过", task=task_name)
                                 continue
                             ts = self._get_timestamp()
                             recv_path = f"/credit-shop/app/creditTask/receive?taskId={task_id}&xy_timestamp={ts}"
@@ -294,32 +337,24 @@ class ShiXiaoYang:
                                 r.raise_for_status()
                                 recv_resp = r.json()
                             except Exception as e:
-                                print(f"  ⚠️ 任务【{task_name}】领取奖励时请求失败: {e}")
+                                emit(account, 'warning', f"任务【{task_name}】领取奖励时请求失败: {e}", task=task_name)
                                 continue
 
                             if recv_resp.get('code') != 200:
-                                print(f"  ⚠️ 任务【{task_name}】领取奖励返回错误: {recv_resp.get('msg')}")
+                                emit(account, 'warning', f"任务【{task_name}】领取奖励返回错误: {recv_resp.get('msg')}", task=task_name)
                                 continue
 
                             reward_raw = recv_resp.get('data')
-                            reward_decrypted = None
-                            try:
-                                if isinstance(reward_raw, str):
-                                    maybe = self.auth_client.call_service(self.mod, encrypted=reward_raw)
-                                    if isinstance(maybe, dict):
-                                        reward_decrypted = maybe.get('data') if 'data' in maybe else maybe
-                                    else:
-                                        reward_decrypted = maybe
-                                else:
-                                    reward_decrypted = reward_raw
-                            except Exception as e:
-                                print(f"  ⚠️ 任务【{task_name}】奖励解密失败: {e}")
-                                reward_decrypted = reward_raw
-
-                            print(f"  ✅ 任务【{task_name}】奖励领取成功: {reward_decrypted}")
+                            if isinstance(reward_raw, str):
+                                pending_rewards.append((task_name, reward_raw))
+                            else:
+                                emit(account, 'reward', f"任务【{task_name}】奖励领取成功: {reward_raw}", task=task_name, reward=reward_raw)
 
                             # 每次领取奖励后等待一下
-                            await __import__('asyncio').sleep(1)
+                            await asyncio.sleep(1)
+
+                        if pending_rewards:
+                            await self._print_rewards(pending_rewards, account)
                     else:
                         print("暂无待领取奖励的任务")
             # 在所有任务完成后，再次请求最新的积分
@@ -330,22 +365,34 @@ class ShiXiaoYang:
             if latest and latest.get('code') == 200:
                 latest_data = latest.get('data', {})
                 credit_now = latest_data.get('credit', credit)
-                print(f"今日任务完成，当前积分{credit_now}")
+                emit(account, 'points', f"今日任务完成，当前积分{credit_now}", points=credit_now)
             else:
                 if latest and 'msg' in latest:
-                    print(f"⚠️ 获取最新积分失败: {latest.get('msg')}")
+                    emit(account, 'warning', f"获取最新积分失败: {latest.get('msg')}")
                 else:
-                    print("⚠️ 获取最新积分失败或解密失败")
+                    emit(account, 'warning', "获取最新积分失败或解密失败")
 
     async def run(self):
-        if NOTIFICATION_ENABLED:
+        if NOTIFICATION_ENABLED and EVENTS_ENABLED:
+            # 通知内容由emit()记录的结果生成，不再拦截print
+            start_capture(events=True)
+        elif NOTIFICATION_ENABLED:
             start_capture()
 
         print("🟢 石小羊家园自动任务脚本启动")
         print(f"📋️ 共找到 {len(self.user_tokens)} 个账号")
 
-        for i, token in enumerate(self.user_tokens):
-            await self.process_user(token, i)
+        await self._init_auth_client()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(token, index):
+            async with semaphore:
+                await self.process_user(token, index)
+
+        try:
+            await asyncio.gather(*(limited(token, i) for i, token in enumerate(self.user_tokens)))
+        finally:
+            await self.auth_client.aclose()
 
         print(f"\n{'='*30}")
         print("✅ 所有账号处理完成")
@@ -360,15 +407,14 @@ async def main():
         client = ShiXiaoYang()
         await client.run()
     except KeyboardInterrupt:
-        print("\n❌ 脚本被用户中断")
+        emit(None, 'warning', "脚本被用户中断")
         if NOTIFICATION_ENABLED:
             stop_capture_and_notify("石小羊家园脚本中断")
     except Exception as e:
-        print(f"❌ 脚本运行出错: {e}")
+        emit(None, 'failure', f"脚本运行出错: {e}")
         if NOTIFICATION_ENABLED:
             stop_capture_and_notify("石小羊家园脚本运行错误")
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
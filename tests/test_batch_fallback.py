@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量接口整体失败（返回失败、HTTP 500、连接中断）时改为逐个调用，每个调用都真正发到云端，且不影响地址健康状态
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('CloudAuth', '00000000-0000-0000-0000-000000000000')
+os.environ['CloudAuthDaemon'] = '0'
+
+import cloud_auth
+from cloud_auth_stub import StubCloudServer, FakeOneService
+
+
+class BatchFallbackTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = StubCloudServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
+    def setUp(self):
+        os.environ['CloudAuthStateDir'] = tempfile.mkdtemp()
+        os.environ['CloudAuthURL'] = self.stub.url
+        self.one = FakeOneService()
+        self.stub.register_handler('ONE', self.one)
+        self.stub.batch_error = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.client = cloud_auth.CloudAuth(auth_code=os.environ['CloudAuth'])
+
+    def tearDown(self):
+        self.stub.batch_error = None
+        self.client.close()
+
+    def _purchase(self, count=3):
+        calls = [('ONE', {'action': 'purchase', 'user_key': 'user', 'item_id': item_id}) for item_id in range(count)]
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            results = self.client.call_service_batch(calls)
+        return results, output.getvalue()
+
+    def _assert_fell_back(self, results):
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual(self.one.calls.get('purchase'), 3)
+        self.assertFalse(self.client.batch_supported)
+        # 批量接口失败不代表地址不可用，健康状态中不应有失败记录
+        entry = self.client.health.endpoints.get(self.stub.url, {})
+        self.assertNotIn(0, entry.get('outcomes', []))
+        self.assertEqual(self.client.health.state(self.stub.url), 'closed')
+
+    def test_batch_used_when_available(self):
+        batches = self.stub.stats['batch']
+        results, _ = self._purchase()
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual(self.stub.stats['batch'], batches + 1)
+        self.assertTrue(self.client.batch_supported)
+
+    def test_batch_failure_response_falls_back(self):
+        self.stub.batch_error = 'fail'
+        results, output = self._purchase()
+        self._assert_fell_back(results)
+        self.assertIn('改为逐个调用', output)
+
+        # 之后的批量调用直接逐个调用，不再请求批量接口
+        results, _ = self._purchase()
+        self.assertEqual(self.one.calls.get('purchase'), 6)
+
+    def test_batch_server_error_falls_back(self):
+        self.stub.batch_error = 500
+        results, _ = self._purchase()
+        self._assert_fell_back(results)
+
+    def test_batch_dropped_connection_falls_back(self):
+        self.stub.batch_error = 'drop'
+        results, _ = self._purchase()
+        self._assert_fell_back(results)
+
+    def test_batch_not_supported_falls_back_quietly(self):
+        self.stub.batch_error = 404
+        results, output = self._purchase()
+        self._assert_fell_back(results)
+        self.assertNotIn('⚠️', output)
+
+
+if __name__ == "__main__":
+    unittest.main()
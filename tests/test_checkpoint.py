@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+freePlug扫描进度：再次运行时已结束的月份直接跳过，当前月份只检查新增的点播，遇到全部是已见过点播的页即停止
+ONE接口由cloud_auth_stub.FakeOneService模拟，与真实接口一样从新到旧排列
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import json
+import tempfile
+import unittest
+import contextlib
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class IncrementalScanTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ['CloudAuth'] = '00000000-0000-0000-0000-000000000000'
+        os.environ['CloudAuthStateDir'] = tempfile.mkdtemp()
+        os.environ['CloudAuthDaemon'] = '0'
+        from cloud_auth_stub import StubCloudServer, FakeOneService
+        cls.one = FakeOneService()
+        cls.stub = StubCloudServer().start()
+        cls.stub.register_handler('ONE', cls.one)
+        os.environ['CloudAuthURL'] = cls.stub.url
+
+        import cloud_auth
+        import freePlug
+        cloud_auth.reset_auth_clients()
+        cls.freePlug = freePlug
+        now = datetime.now()
+        cls.published_at = f"20;{now.year - 2020}-{now.month}"
+        freePlug.config_path = os.path.join(tempfile.mkdtemp(), 'config.json')
+        with open(freePlug.config_path, 'w', encoding='utf-8') as file:
+            json.dump({'API_URL': 'https://example.com', 'APP_VERSION': '1.0', 'PLATFORM': 'android',
+                       'end_month': f"{now.year - 1}-{now.month}", 'SendNotify': False,
+                       'accounts': [{'TOKEN': 'token', 'USER_KEY': 'user'}]}, file)
+
+    @classmethod
+    def tearDownClass(cls):
+        import cloud_auth
+        cloud_auth.reset_auth_clients()
+        cls.stub.stop()
+
+    def _run(self):
+        self.one.calls.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.freePlug.main()
+        return self.one.calls.get('get_list', 0), self.one.calls.get('purchase', 0)
+
+    def test_incremental_scan_stops_at_known_items(self):
+        first_lists, first_purchases = self._run()
+        # 13个月份，每月3页
+        self.assertEqual(first_lists, 39)
+        self.assertGreater(first_purchases, 0)
+
+        # 再次运行：只有当前月份可能有新点播，第1页都已见过即停止
+        lists, purchases = self._run()
+        self.assertEqual((lists, purchases), (1, 0))
+
+        # 当前月份新发布10篇，第1页有新点播，第2页全部已见过，之后的页不再请求
+        self.one.add_items(self.published_at, 10)
+        lists, purchases = self._run()
+        self.assertEqual(lists, 2)
+        self.assertEqual(purchases, 1)
+        base = self.one._item_base('user', self.published_at)
+        # 原有45篇的偏移为0-44，新增的为45-54，其中偏移49的为免费点播
+        self.assertIn(('user', base + 49), self.one.purchased)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+二进制信封压缩：导入cloud_auth和选择压缩方式时不导入zstandard，首次编解码二进制信封时才加载
+在子进程中运行，不受其他测试已导入的模块影响
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = '''
+import sys
+import cloud_auth
+
+compression = cloud_auth._preferred_compression()
+print('after_import', 'zstandard' in sys.modules)
+
+codec = cloud_auth.EnvelopeCodec(b'0123456789abcdef')
+plaintext = b'{"data": "' + b'a' * 1000 + b'"}'
+frame = codec.encode_frame(plaintext, 1700000000000, compression)
+print('after_encode', 'zstandard' in sys.modules)
+print('round_trip', bytes(codec.decode_frame(frame, format(1700000000000, 'x'))) == plaintext)
+print('compressed', len(frame) < len(plaintext))
+'''
+
+
+class LazyCompressorsTest(unittest.TestCase):
+    def _run(self, compress):
+        env = dict(os.environ, PYTHONPATH=ROOT, CloudAuthCompress=compress)
+        result = subprocess.run([sys.executable, '-c', CHECK], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return dict(line.split() for line in result.stdout.splitlines())
+
+    def test_zstandard_loaded_on_first_frame(self):
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            self.skipTest("未安装zstandard")
+        lines = self._run('auto')
+        self.assertEqual(lines['after_import'], 'False')
+        self.assertEqual(lines['after_encode'], 'True')
+        self.assertEqual((lines['round_trip'], lines['compressed']), ('True', 'True'))
+
+    def test_zlib_frame_round_trip(self):
+        lines = self._run('zlib')
+        self.assertEqual(lines['after_import'], 'False')
+        self.assertEqual((lines['round_trip'], lines['compressed']), ('True', 'True'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+服务器地址熔断器：closed → open（连续失败或错误率过高）→ 冷却期后half_open → 探测成功回到closed、探测失败重新open
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cloud_auth
+from cloud_auth import EndpointHealth
+
+PRIMARY = 'https://primary.example'
+BACKUP = 'https://backup.example'
+
+
+class EndpointHealthTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'health.json')
+        self.health = EndpointHealth(path=self.path, cooldown=60)
+
+    def _fail(self, url, times=1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(times):
+                self.health.record_failure(url)
+
+    def test_consecutive_failures_open_circuit(self):
+        self._fail(PRIMARY, EndpointHealth.CONSECUTIVE_FAILURES - 1)
+        self.assertEqual(self.health.state(PRIMARY), 'closed')
+        self._fail(PRIMARY)
+        self.assertEqual(self.health.state(PRIMARY), 'open')
+
+        # 熔断的地址不出现在请求计划中，备用地址优先
+        self.assertEqual(self.health.plan([PRIMARY, BACKUP]), [(BACKUP, cloud_auth.REQUEST_TIMEOUT)])
+
+    def test_success_resets_consecutive_failures(self):
+        # 先有足够多的成功记录，错误率不会达到阈值
+        for _ in range(EndpointHealth.WINDOW // 2):
+            self.health.record_success(PRIMARY, 50)
+        self._fail(PRIMARY, EndpointHealth.CONSECUTIVE_FAILURES - 1)
+        self.health.record_success(PRIMARY, 50)
+        self._fail(PRIMARY)
+        self.assertEqual(self.health.state(PRIMARY), 'closed')
+
+    def test_error_rate_opens_circuit(self):
+        # 成功与失败交替，连续失败次数不超过1，但错误率达到阈值
+        for _ in range(EndpointHealth.MIN_SAMPLES // 2):
+            self.health.record_success(PRIMARY, 50)
+            self._fail(PRIMARY)
+        self.assertEqual(self.health.state(PRIMARY), 'open')
+
+    def test_half_open_probe_success_closes_circuit(self):
+        self._fail(PRIMARY, EndpointHealth.CONSECUTIVE_FAILURES)
+        opened_at = self.health.endpoints[PRIMARY]['opened_at']
+        self.assertEqual(self.health.state(PRIMARY, now=opened_at + 59), 'open')
+        self.assertEqual(self.health.state(PRIMARY, now=opened_at + 60), 'half_open')
+
+        # 半开地址以短超时探测，同一时间只放行一个探测请求
+        plan = self.health.plan([PRIMARY, BACKUP])
+        self.assertEqual(plan, [(PRIMARY, cloud_auth.PROBE_TIMEOUT), (BACKUP, cloud_auth.REQUEST_TIMEOUT)])
+        self.assertEqual(self.health.plan([PRIMARY, BACKUP]), [(BACKUP, cloud_auth.REQUEST_TIMEOUT)])
+
+        self.health.record_success(PRIMARY, 80)
+        self.assertEqual(self.health.state(PRIMARY), 'closed')
+        self.assertEqual(self.health.error_rate(PRIMARY), 0.0)
+
+    def test_half_open_probe_failure_reopens_circuit(self):
+        self._fail(PRIMARY, EndpointHealth.CONSECUTIVE_FAILURES)
+        self.health.endpoints[PRIMARY]['opened_at'] = time.time() - 60
+        self.assertEqual(self.health.state(PRIMARY), 'half_open')
+
+        self._fail(PRIMARY)
+        self.assertEqual(self.health.state(PRIMARY), 'open')
+        self.assertGreater(self.health.endpoints[PRIMARY]['opened_at'], time.time() - 5)
+
+    def test_all_open_still_tries_every_url(self):
+        self._fail(PRIMARY, EndpointHealth.CONSECUTIVE_FAILURES)
+        self._fail(BACKUP, EndpointHealth.CONSECUTIVE_FAILURES)
+        self.assertEqual(self.health.plan([PRIMARY, BACKUP]),
+                         [(PRIMARY, cloud_auth.REQUEST_TIMEOUT), (BACKUP, cloud_auth.REQUEST_TIMEOUT)])
+
+    def test_state_survives_restart(self):
+        self._fail(PRIMARY, EndpointHealth.CONSECUTIVE_FAILURES)
+        with open(self.path, 'r', encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['endpoints'][PRIMARY]['state'], 'open')
+        self.assertEqual(EndpointHealth(path=self.path, cooldown=60).state(PRIMARY), 'open')
+
+
+if __name__ == "__main__":
+    unittest.main()
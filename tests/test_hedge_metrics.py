@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对冲请求统计：发出对冲请求及备用地址先返回的次数计入调用统计，随CloudAuthMetricsFile一起导出
+验证授权码后把首选地址的本地替身服务器改为延迟较高，另一地址立即返回
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('CloudAuth', '00000000-0000-0000-0000-000000000000')
+os.environ['CloudAuthDaemon'] = '0'
+
+import cloud_auth
+from cloud_auth_stub import StubCloudServer
+
+
+class HedgeMetricsTest(unittest.TestCase):
+    def setUp(self):
+        os.environ['CloudAuthStateDir'] = tempfile.mkdtemp()
+        self.primary = StubCloudServer().start()
+        self.backup = StubCloudServer().start()
+        os.environ['CloudAuthURL'] = f"{self.primary.url},{self.backup.url}"
+        self._delay = cloud_auth.HEDGE_DEFAULT_DELAY
+        cloud_auth.HEDGE_DEFAULT_DELAY = 0.05
+
+    def tearDown(self):
+        cloud_auth.HEDGE_DEFAULT_DELAY = self._delay
+        self.primary.stop()
+        self.backup.stop()
+
+    def _roki_series(self):
+        for series in cloud_auth.METRICS.snapshot():
+            if series['mod'] == 'roki':
+                return series
+        return {'hedged': 0, 'backup_wins': 0}
+
+    def test_hedged_calls_are_exported(self):
+        before = self._roki_series()
+        with contextlib.redirect_stdout(io.StringIO()):
+            client = cloud_auth.CloudAuth(hedge_mods=('roki',))
+        # 首选地址由健康状态决定，不一定是CloudAuthURL中的第一个
+        first = client._request_plan()[0][0]
+        (self.primary if first == self.primary.url else self.backup).latency = 0.5
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = client.call_service('roki', timestamp=1)
+        finally:
+            client.close()
+        self.assertTrue(result.get('success'))
+
+        after = self._roki_series()
+        self.assertEqual(after['hedged'] - before['hedged'], 1)
+        self.assertEqual(after['backup_wins'] - before['backup_wins'], 1)
+        prometheus = cloud_auth.METRICS.to_prometheus()
+        self.assertIn(f'cloud_auth_hedged_total{{mod="roki",action=""}} {after["hedged"]}', prometheus)
+        self.assertIn(f'cloud_auth_backup_wins_total{{mod="roki",action=""}} {after["backup_wins"]}', prometheus)
+
+
+if __name__ == "__main__":
+    unittest.main()
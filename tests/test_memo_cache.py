@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+幂等调用结果缓存：按mod或mod/action的有效期过期，按条数和字节数LRU淘汰，持久化文件可跨运行命中，写入失败时退回只用内存
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+import unittest
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cloud_auth import MemoCache
+
+
+def result(value):
+    return {'success': True, 'data': {'value': value}}
+
+
+class MemoCacheTest(unittest.TestCase):
+    def test_hit_returns_copy(self):
+        memo = MemoCache(rules={'shiyang': 60}, store='0')
+        memo.put('shiyang', {'data': 'a'}, result(1))
+        cached = memo.get('shiyang', {'data': 'a'})
+        self.assertEqual(cached, result(1))
+        cached['data']['value'] = 2
+        self.assertEqual(memo.get('shiyang', {'data': 'a'}), result(1))
+        self.assertIsNone(memo.get('shiyang', {'data': 'b'}))
+        self.assertEqual(memo.stats['shiyang'], {'hits': 2, 'misses': 1})
+
+    def test_only_cacheable_successes_are_stored(self):
+        memo = MemoCache(rules={'shiyang': 60, 'roki/sign': 60}, store='0')
+        memo.put('shiyang', {'data': 'a'}, {'success': False, 'error': '失败'})
+        memo.put('ONE', {'action': 'purchase'}, result(1))
+        memo.put('roki', {'action': 'other'}, result(1))
+        memo.put('roki', {'action': 'sign'}, result(2))
+        self.assertEqual(len(memo.entries), 1)
+        self.assertEqual(memo.get('roki', {'action': 'sign'}), result(2))
+
+    def test_entries_expire_after_ttl(self):
+        memo = MemoCache(rules={'roki': 0.05}, store='0')
+        memo.put('roki', {'timestamp': 1}, result(1))
+        self.assertIsNotNone(memo.get('roki', {'timestamp': 1}))
+        time.sleep(0.1)
+        self.assertIsNone(memo.get('roki', {'timestamp': 1}))
+        self.assertEqual((len(memo.entries), memo.size), (0, 0))
+
+    def test_lru_eviction_by_entries(self):
+        memo = MemoCache(rules={'shiyang': 60}, max_entries=2, store='0')
+        memo.put('shiyang', {'data': 'a'}, result(1))
+        memo.put('shiyang', {'data': 'b'}, result(2))
+        # 访问a后b成为最久未使用的条目，加入c时淘汰b
+        memo.get('shiyang', {'data': 'a'})
+        memo.put('shiyang', {'data': 'c'}, result(3))
+        self.assertIsNotNone(memo.get('shiyang', {'data': 'a'}))
+        self.assertIsNone(memo.get('shiyang', {'data': 'b'}))
+        self.assertIsNotNone(memo.get('shiyang', {'data': 'c'}))
+
+    def test_lru_eviction_by_bytes(self):
+        one_entry = len('{"success":true,"data":{"value":"' + 'x' * 100 + '"}}')
+        memo = MemoCache(rules={'shiyang': 60}, max_bytes=one_entry * 2, store='0')
+        for name in 'abc':
+            memo.put('shiyang', {'data': name}, result('x' * 100))
+        self.assertEqual(len(memo.entries), 2)
+        self.assertLessEqual(memo.size, memo.max_bytes)
+        self.assertIsNone(memo.get('shiyang', {'data': 'a'}))
+
+        # 单个结果超过上限时不缓存，也不会挤掉已有条目
+        memo.put('shiyang', {'data': 'big'}, result('x' * one_entry * 2))
+        self.assertEqual(len(memo.entries), 2)
+
+    def test_store_persists_between_runs(self):
+        path = os.path.join(tempfile.mkdtemp(), 'memo.sqlite')
+        memo = MemoCache(rules={'shiyang': 60, 'roki': 0.05}, store=path)
+        memo.put('shiyang', {'data': 'a'}, result(1))
+        memo.put('roki', {'timestamp': 1}, result(2))
+        memo.close()
+        time.sleep(0.1)
+
+        memo = MemoCache(rules={'shiyang': 60, 'roki': 0.05}, store=path)
+        self.assertEqual(memo.get('shiyang', {'data': 'a'}), result(1))
+        self.assertIsNone(memo.get('roki', {'timestamp': 1}))
+        memo.close()
+
+    def test_store_failure_falls_back_to_memory(self):
+        path = os.path.join(tempfile.mkdtemp(), 'memo.sqlite')
+        memo = MemoCache(rules={'shiyang': 60}, store=path)
+        memo._db.close()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            memo.put('shiyang', {'data': 'a'}, result(1))
+        self.assertIn('只在内存中缓存', output.getvalue())
+        self.assertIsNone(memo._db)
+        self.assertEqual(memo.get('shiyang', {'data': 'a'}), result(1))
+        memo.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+freeBuy购买结果：只有ONE接口返回code为200时才计为购买成功，云端调用失败（ONE接口没有返回结果）的点播不写入购买记录
+ONE接口由cloud_auth_stub.FakeOneService模拟
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import io
+import os
+import sys
+import json
+import tempfile
+import unittest
+import contextlib
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import freeBuy
+from cloud_auth_stub import FakeOneService
+from one_seen_items import SeenItems
+
+
+class FakeAuthClient:
+    """直接调用FakeOneService；批量购买的第二个点播ONE接口拒绝购买，第三个模拟云端调用失败"""
+
+    def __init__(self, one):
+        self.one = one
+
+    def call_service(self, service_name, **kwargs):
+        return self.one(kwargs)
+
+    def call_service_batch(self, calls):
+        return [self.one(calls[0][1]),
+                {'success': True, 'data': {'code': 400, 'mezsage': '积分不足'}},
+                {'success': False, 'error': '云端请求超时'}]
+
+
+class PurchaseOutcomeTest(unittest.TestCase):
+    def setUp(self):
+        self.one = FakeOneService()
+        freeBuy.config_path = os.path.join(tempfile.mkdtemp(), 'config.json')
+        self.config = {'API_URL': 'https://example.com', 'buy_url': 'https://example.com', 'APP_VERSION': '1.0',
+                       'PLATFORM': 'android', 'accounts': [{'TOKEN': 'token', 'USER_KEY': 'user'}]}
+        with open(freeBuy.config_path, 'w', encoding='utf-8') as file:
+            json.dump(self.config, file)
+        self.seen = SeenItems.open(self.config, freeBuy.config_path)
+
+        self.events = []
+        self._emit = freeBuy.emit
+        freeBuy.emit = lambda account, kind, message="", **fields: self.events.append((kind, fields.get('item_id')))
+
+    def tearDown(self):
+        freeBuy.emit = self._emit
+        self.seen.close()
+
+    def test_only_code_200_counts_and_failed_calls_are_not_recorded(self):
+        now = datetime.now()
+        base = self.one._item_base('user', f"20;{now.year - 2020}-{now.month}")
+        # 第1页中免费的点播偏移为42、35、28
+        bought, rejected, failed = base + 42, base + 35, base + 28
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            count = freeBuy.process_account(FakeAuthClient(self.one), self.config, 0,
+                                            self.config['accounts'][0], seen=self.seen)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(self.events, [('purchase', bought), ('failure', rejected), ('failure', failed)])
+        self.assertEqual(self.seen.skip_ids('user', [bought, rejected, failed]), {bought})
+        recorded = {row[0] for row in self.seen._db.execute('SELECT item_id FROM items WHERE user_key = ?', ('user',))}
+        self.assertEqual(recorded, {bought, rejected})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+令牌桶限流：突发额度、按速率补充、超过最长等待时间时拒绝且不扣除令牌，多个进程通过文件锁共享同一份额度
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cloud_auth
+from cloud_auth import RateLimiter, RateLimitExceeded, _load_rate_limits
+
+# 子进程中连续预留令牌，输出不需要等待的次数
+WORKER = '''
+import sys
+from cloud_auth import RateLimiter
+
+limiter = RateLimiter(limits={'ONE': (0.001, 6)}, path=sys.argv[1])
+print(sum(1 for _ in range(int(sys.argv[2])) if limiter.reserve({'ONE': 1}) == 0))
+'''
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'ratelimit.json')
+
+    def test_parse_limits(self):
+        self.assertEqual(_load_rate_limits('ONE=5, roki=2:4,*=0.5,bad=x,zero=0'),
+                         {'ONE': (5.0, 5.0), 'roki': (2.0, 4.0), '*': (0.5, 1.0)})
+        self.assertEqual(_load_rate_limits(''), {})
+
+    def test_burst_then_wait_by_rate(self):
+        limiter = RateLimiter(limits={'roki': (2, 3)}, path=self.path)
+        self.assertEqual([limiter.reserve({'roki': 1}) for _ in range(3)], [0.0, 0.0, 0.0])
+        # 令牌用完后按每秒2个补充，第4个约需等待0.5秒，第5个约1秒（先到先得）
+        self.assertAlmostEqual(limiter.reserve({'roki': 1}), 0.5, delta=0.05)
+        self.assertAlmostEqual(limiter.reserve({'roki': 1}), 1.0, delta=0.05)
+        self.assertEqual(limiter.stats['roki']['waited'], 2)
+
+    def test_wildcard_and_unlimited_mods(self):
+        limiter = RateLimiter(limits={'*': (1, 1)}, path=self.path)
+        self.assertTrue(limiter.try_acquire('shiyang'))
+        self.assertFalse(limiter.try_acquire('shiyang'))
+        # 每个mod各有一个桶
+        self.assertTrue(limiter.try_acquire('roki'))
+
+        unlimited = RateLimiter(limits={'roki': (1, 1)}, path=self.path)
+        self.assertEqual(unlimited.reserve({'ONE': 100}), 0.0)
+
+    def test_max_wait_rejects_without_spending_tokens(self):
+        limiter = RateLimiter(limits={'ONE': (1, 2)}, path=self.path, max_wait=0.5)
+        self.assertEqual(limiter.reserve({'ONE': 2}), 0.0)
+        with self.assertRaises(RateLimitExceeded):
+            limiter.reserve({'ONE': 1})
+        self.assertEqual(limiter.stats['ONE']['rejected'], 1)
+        # 被拒绝的请求没有扣除令牌，仍然只需等待约1秒
+        self.assertAlmostEqual(limiter.reserve({'ONE': 1}, max_wait=5), 1.0, delta=0.05)
+
+    def test_batch_costs_wait_for_slowest_mod(self):
+        limiter = RateLimiter(limits={'ONE': (1, 1), 'roki': (10, 10)}, path=self.path)
+        self.assertAlmostEqual(limiter.reserve({'ONE': 2, 'roki': 2}), 1.0, delta=0.05)
+
+    def test_corrupt_state_file_is_reset(self):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write('{broken')
+        limiter = RateLimiter(limits={'ONE': (1, 1)}, path=self.path)
+        self.assertTrue(limiter.try_acquire('ONE'))
+
+    @unittest.skipIf(cloud_auth.fcntl is None, "没有fcntl时只在进程内限流")
+    def test_processes_share_budget_through_file_lock(self):
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        workers = [subprocess.Popen([sys.executable, '-c', WORKER, self.path, '5'], cwd=ROOT, env=env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                   for _ in range(4)]
+        immediate = 0
+        for worker in workers:
+            stdout, stderr = worker.communicate(timeout=60)
+            self.assertEqual(worker.returncode, 0, stderr)
+            immediate += int(stdout)
+        # 4个进程共预留20次，突发额度只有6个，其余都需要等待
+        self.assertEqual(immediate, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ONE点播购买记录：只有ONE接口返回code为200时才记为已购买，被拒绝的购买之后还会重试
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from one_seen_items import SeenItems, purchase_succeeded, SEEN_MAX_FAILURES
+
+
+class SeenItemsTest(unittest.TestCase):
+    def setUp(self):
+        config_path = os.path.join(tempfile.mkdtemp(), 'config.json')
+        with open(config_path, 'w', encoding='utf-8') as file:
+            json.dump({}, file)
+        self.seen = SeenItems.open({}, config_path)
+
+    def tearDown(self):
+        self.seen.close()
+
+    def _record(self, item_id, success, buy_data):
+        self.seen.record('user', [(item_id, purchase_succeeded(success, buy_data))])
+
+    def test_business_success_is_skipped(self):
+        self._record(1, True, {'code': 200, 'mezsage': '购买成功'})
+        self.assertEqual(self.seen.skip_ids('user', [1]), {1})
+        # 其他账号不受影响
+        self.assertEqual(self.seen.skip_ids('other', [1]), set())
+
+    def test_rejected_purchase_is_retried(self):
+        # 云端调用成功但ONE接口拒绝购买，不能记为已购买
+        self._record(2, True, {'code': 400, 'mezsage': '积分不足'})
+        self.assertEqual(self.seen.skip_ids('user', [2]), set())
+
+    def test_repeated_failures_are_skipped(self):
+        for _ in range(SEEN_MAX_FAILURES - 1):
+            self._record(3, False, '请求失败')
+        self.assertEqual(self.seen.skip_ids('user', [3]), set())
+        self._record(3, True, {'code': 500})
+        self.assertEqual(self.seen.skip_ids('user', [3]), {3})
+
+    def test_disabled_by_config(self):
+        self.assertIsNone(SeenItems.open({'seen_index': False}, 'config.json'))
+
+
+if __name__ == "__main__":
+    unittest.main()
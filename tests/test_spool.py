@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SendNotify汇总模式：只有一条通知写入汇总文件、之后没有其他脚本运行时，窗口到期后也会发送
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 替代青龙的notify.py，把收到的通知追加写入sent.jsonl
+FAKE_NOTIFY = '''
+import json
+
+def send(title, content):
+    with open('sent.jsonl', 'a', encoding='utf-8') as file:
+        file.write(json.dumps({'title': title, 'content': content}, ensure_ascii=False) + "\\n")
+'''
+
+
+class SpoolDeadlineTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        with open(os.path.join(self.workdir, 'notify.py'), 'w', encoding='utf-8') as file:
+            file.write(FAKE_NOTIFY)
+        self.env = dict(os.environ, PYTHONPATH=ROOT, CloudAuthStateDir=self.workdir,
+                        SendNotifySpool='1', SendNotifyTimeout='5')
+
+    def _sent(self):
+        path = os.path.join(self.workdir, 'sent.jsonl')
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def _run_script(self, title, content):
+        code = f"from SendNotify import SendNotify; SendNotify({title!r}, {content!r})"
+        return subprocess.run([sys.executable, '-c', code], cwd=self.workdir, env=self.env,
+                              capture_output=True, text=True, timeout=30)
+
+    def test_single_entry_is_sent_after_window(self):
+        result = self._run_script('老板电器签到结果', '✅ 账号1 签到成功')
+        self.assertIn('📥', result.stdout)
+        # 脚本已经结束，通知还在汇总文件中，尚未发送
+        self.assertEqual(self._sent(), [])
+
+        deadline = time.time() + 15
+        while not self._sent() and time.time() < deadline:
+            time.sleep(0.2)
+
+        sent = self._sent()
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(sent[0]['title'], '老板电器签到结果')
+        self.assertIn('✅ 账号1 签到成功', sent[0]['content'])
+        self.assertFalse(os.path.exists(os.path.join(self.workdir, '.sendnotify_spool.json'))
+                         and os.path.getsize(os.path.join(self.workdir, '.sendnotify_spool.json')))
+
+    def test_entries_in_one_window_are_sent_once(self):
+        self._run_script('老板电器签到结果', '✅ 账号1 签到成功')
+        self._run_script('石小羊家园签到结果', '✅ 账号1 签到成功')
+
+        deadline = time.time() + 15
+        while not self._sent() and time.time() < deadline:
+            time.sleep(0.2)
+        # 再等一会，确认没有重复发送
+        time.sleep(1.5)
+
+        sent = self._sent()
+        self.assertEqual(len(sent), 1)
+        self.assertIn('老板电器签到结果', sent[0]['content'])
+        self.assertIn('石小羊家园签到结果', sent[0]['content'])
+
+
+if __name__ == "__main__":
+    unittest.main()
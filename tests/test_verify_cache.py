@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+授权验证缓存：命中/未命中次数计入调用统计，随CloudAuthMetricsFile一起导出
+用法：python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cloud_auth import VerifyCache, METRICS
+
+
+class VerifyCacheMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.cache = VerifyCache(path=os.path.join(self.workdir, 'cache.json'), ttl=3600, refresh_days=1)
+
+    def _counts(self):
+        return METRICS.memo_snapshot().get('verify', {'hits': 0, 'misses': 0})
+
+    def test_hits_and_misses_are_exported(self):
+        before = self._counts()
+        expire_date = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+        self.assertIsNone(self.cache.get('code'))
+        self.cache.put('code', {'success': True, 'expire_date': expire_date})
+        self.assertEqual(self.cache.get('code')['expire_date'], expire_date)
+        self.assertEqual(self.cache.get('code')['expire_date'], expire_date)
+
+        after = self._counts()
+        self.assertEqual(after['hits'] - before['hits'], 2)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+
+        path = os.path.join(self.workdir, 'metrics.json')
+        METRICS.export(path)
+        with open(path, 'r', encoding='utf-8') as file:
+            self.assertEqual(json.load(file)['memo']['verify'], after)
+        self.assertIn(f'cloud_auth_memo_total{{mod="verify",result="hits"}} {after["hits"]}', METRICS.to_prometheus())
+
+
+if __name__ == "__main__":
+    unittest.main()